@@ -0,0 +1,343 @@
+import io
+import json
+import os
+import sys
+from main import *
+from typing import Dict, Iterable, List, TextIO, Tuple
+
+
+def diagnostics_to_json(error_stream: Dict[int, List[str]], parsing_errors: Dict[int, List[str]],
+                        semantic_errors: Dict[int, List[str]]) -> List[Dict]:
+    """Flattens the errors of all phases into a list of diagnostics.
+
+    Args:
+    - error_stream: the lexical errors (by line).
+    - parsing_errors: the parsing errors (by line).
+    - semantic_errors: the semantic errors (by line).
+
+    Returns:
+    a list of diagnostics holding the line, error and error type.
+    """
+
+    diagnostics = []
+    for phase, errors in (("Lexical", error_stream), ("Parsing", parsing_errors), ("Semantic", semantic_errors)):
+        for line, errs in errors.items():
+            for err in errs:
+                diagnostics.append({"line": line + 1, "error": err, "type": phase})
+
+    return diagnostics
+
+
+def records_to_json(semantic_symbol_table: SymbolTable) -> List[Dict]:
+    """Converts the records of the semantic symbol table to dictionaries.
+
+    Args:
+    - semantic_symbol_table: the symbol table populated by the parser.
+
+    Returns:
+    a list of dictionaries, one per record.
+    """
+
+    return [{"name": record.name, "return_type": record.return_type, "scope": record.scope, "size": record.size}
+            for record in semantic_symbol_table]
+
+
+def to_json(token_stream: Dict[int, str], symbol_table: Dict[int, str], error_stream: Dict[int, List[str]],
+            parser_trace: List[str], parsing_errors: Dict[int, List[str]],
+            semantic_errors: Dict[int, List[str]], semantic_symbol_table: SymbolTable) -> Dict:
+    """Converts the output of the analysis to a JSON serializable dictionary.
+
+    Args:
+    - token_stream: the tokenized lexemes (by line).
+    - symbol_table: the lexical symbol table.
+    - error_stream: the lexical errors (by line).
+    - parser_trace: the trace of the parser.
+    - parsing_errors: the parsing errors (by line).
+    - semantic_errors: the semantic errors (by line).
+    - semantic_symbol_table: the symbol table populated by the parser.
+
+    Returns:
+    a dictionary holding the tokens, diagnostics and symbol tables.
+    """
+
+    return {
+        "tokens": [token_stream[line] for line in sorted(token_stream)],
+        "symbol_table": {str(ix): entry for ix, entry in symbol_table.items()},
+        "trace": parser_trace,
+        "diagnostics": diagnostics_to_json(error_stream, parsing_errors, semantic_errors),
+        "semantic_symbol_table": records_to_json(semantic_symbol_table),
+    }
+
+
+class AnalysisResult:
+    """The output of an analysis, held in memory."""
+
+    def __init__(self, name: str, token_stream: Dict[int, str], symbol_table: Dict[int, str],
+                 error_stream: Dict[int, List[str]], parser_trace: List[str], parsing_errors: Dict[int, List[str]],
+                 semantic_errors: Dict[int, List[str]], semantic_symbol_table: SymbolTable) -> None:
+        """Initializes the result.
+
+        Args:
+        - self: this result, the one to create. Mandatory object reference.
+        - name: the name of the source, which the sinks name their output by.
+        - token_stream: the tokenized lexemes (by line).
+        - symbol_table: the lexical symbol table.
+        - error_stream: the lexical errors (by line).
+        - parser_trace: the trace of the parser.
+        - parsing_errors: the parsing errors (by line).
+        - semantic_errors: the semantic errors (by line).
+        - semantic_symbol_table: the symbol table populated by the parser.
+
+        Returns:
+        None.
+        """
+
+        self.name = name
+        self.token_stream = token_stream
+        self.symbol_table = symbol_table
+        self.error_stream = error_stream
+        self.parser_trace = parser_trace
+        self.parsing_errors = parsing_errors
+        self.semantic_errors = semantic_errors
+        self.semantic_symbol_table = semantic_symbol_table
+
+    def astuple(self) -> Tuple:
+        """Returns the output in the order analyze() returns it."""
+
+        return self.token_stream, self.symbol_table, self.error_stream, self.parser_trace, self.parsing_errors, \
+            self.semantic_errors, self.semantic_symbol_table
+
+    def diagnostics(self) -> Dict[str, Dict[int, List[str]]]:
+        """Returns the errors (by line) of every phase, by phase."""
+
+        return {"Lexical": self.error_stream, "Parsing": self.parsing_errors, "Semantic": self.semantic_errors}
+
+    def error_count(self) -> int:
+        """Returns the number of errors of all phases."""
+
+        return sum(len(errors) for phase in self.diagnostics().values() for errors in phase.values())
+
+    def records(self) -> List[Record]:
+        """Returns the records of the semantic symbol table, in order."""
+
+        return list(self.semantic_symbol_table)
+
+    def to_json(self) -> Dict:
+        """Returns the output as a JSON serializable dictionary, as to_json()
+        does, along with the name of the source."""
+
+        return dict(name=self.name, **to_json(*self.astuple()))
+
+    def dump_errors(self, stream: TextIO) -> None:
+        """Writes the errors of all phases to an open stream, in the format of
+        the error files main.py writes.
+
+        Args:
+        - self: mandatory object reference.
+        - stream: the stream to write to.
+
+        Returns:
+        None.
+        """
+
+        for ix, (phase, errors) in enumerate(self.diagnostics().items()):
+            dump_error_stream(errors, stream, phase, ix == 0)
+
+
+class FileSink:
+    """Writes every result to the files main.py writes, in the same formats
+    and directories, named after the result."""
+
+    def __init__(self, directory: str = None) -> None:
+        """Initializes the sink.
+
+        Args:
+        - self: this sink, the one to create. Mandatory object reference.
+        - directory: the directory holding the output directories, by default
+        the one main.py writes to.
+
+        Returns:
+        None.
+        """
+
+        self.directory = get_abs_file_path("") if directory is None else directory
+
+    def __open(self, folder: str, name: str) -> TextIO:
+        """Opens an output file for writing, creating its directory if need be.
+
+        Args:
+        - self: mandatory object reference.
+        - folder: the output directory, e.g. TokenStream.
+        - name: the name of the file.
+
+        Returns:
+        the open file.
+        """
+
+        os.makedirs(os.path.join(self.directory, folder), exist_ok=True)
+        return open(os.path.join(self.directory, folder, name), "w")
+
+    def write(self, result: AnalysisResult) -> None:
+        """Writes a result.
+
+        Args:
+        - self: mandatory object reference.
+        - result: the result.
+
+        Returns:
+        None.
+        """
+
+        with self.__open("TokenStream", f'{result.name}.out') as stream:
+            dump_token_stream(result.token_stream, stream)
+        with self.__open("SymbolTable", f'{result.name}.sym') as stream:
+            dump_symb_tbl(result.symbol_table, stream)
+        with self.__open("ErrorStream", f'{result.name}.err') as stream:
+            result.dump_errors(stream)
+        with self.__open("ParserTrace", f'{result.name}.tr') as stream:
+            dump_parser_trace(result.parser_trace, stream)
+        with self.__open("SemanticSymbolTable", f'{result.name}.sym') as stream:
+            dump_semantic_symb_tbl(result.semantic_symbol_table, stream)
+
+
+class StreamSink:
+    """Writes every result to a text stream, one section per output, in the
+    formats of the files main.py writes."""
+
+    def __init__(self, stream: TextIO = None) -> None:
+        """Initializes the sink.
+
+        Args:
+        - self: this sink, the one to create. Mandatory object reference.
+        - stream: the stream to write to, by default the standard output as
+        it is when a result is written.
+
+        Returns:
+        None.
+        """
+
+        self.stream = stream
+
+    def write(self, result: AnalysisResult) -> None:
+        """Writes a result.
+
+        Args:
+        - self: mandatory object reference.
+        - result: the result.
+
+        Returns:
+        None.
+        """
+
+        stream = sys.stdout if self.stream is None else self.stream
+        sections = (
+            ("Token Stream", dump_token_stream, result.token_stream),
+            ("Symbol Table", dump_symb_tbl, result.symbol_table),
+            ("Parser Trace", dump_parser_trace, result.parser_trace),
+            ("Semantic Symbol Table", dump_semantic_symb_tbl, result.semantic_symbol_table),
+        )
+        for title, dump, output in sections:
+            stream.write(f'== {result.name}: {title} ==\n')
+            dump(output, stream)
+            stream.write("\n")
+        stream.write(f'== {result.name}: Errors ==\n')
+        result.dump_errors(stream)
+
+
+class JsonLinesSink:
+    """Writes every result to a text stream as a JSON object on a line of its
+    own, as AnalysisResult.to_json() returns it."""
+
+    def __init__(self, stream: TextIO = None) -> None:
+        """Initializes the sink.
+
+        Args:
+        - self: this sink, the one to create. Mandatory object reference.
+        - stream: the stream to write to, by default the standard output as
+        it is when a result is written.
+
+        Returns:
+        None.
+        """
+
+        self.stream = stream
+
+    def write(self, result: AnalysisResult) -> None:
+        """Writes a result.
+
+        Args:
+        - self: mandatory object reference.
+        - result: the result.
+
+        Returns:
+        None.
+        """
+
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write(json.dumps(result.to_json()) + "\n")
+
+
+class NullSink:
+    """Discards every result, for callers that must pass a sink but only want
+    the results in memory."""
+
+    def write(self, result: AnalysisResult) -> None:
+        """Discards a result."""
+
+        pass
+
+
+def analyze_source(source: str, name: str = "<source>", sinks: Iterable = (), budget: ErrorBudget = None,
+                   compact: bool = False, passes: "PassManager" = None, pool: InternPool = None) -> AnalysisResult:
+    """Runs the lexical, syntax and semantic analysis over source text. No
+    input or output takes place other than what the sinks do.
+
+    Args:
+    - source: the source text.
+    - name: the name of the source, which the sinks name their output by.
+    - sinks: the sinks to write the result to, none by default.
+    - budget: the maximum number of errors per phase, as for analyze().
+    - compact: keep the token stream with repeated whitespace tokens
+    run-length encoded.
+    - passes: run the semantic checks as separate passes, as for analyze().
+    - pool: the interning pool of the analysis, as for analyze().
+
+    Returns:
+    the result of the analysis.
+    """
+
+    # split as reading the source from a file would, so that the lines and
+    # line endings are the ones the other entry points see
+    lines = io.StringIO(source, newline=None).readlines()
+    result = AnalysisResult(name, *analyze(lines, budget, compact, passes, pool))
+    for sink in sinks:
+        sink.write(result)
+    return result
+
+
+# the sinks selectable by name, e.g. from the command line
+sink_types = {
+    "file": FileSink,
+    "stdout": StreamSink,
+    "jsonl": JsonLinesSink,
+    "null": NullSink,
+}
+
+
+# driver code
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Analyzes TUPLE source files, writing the results to the "
+                                                     "chosen sinks.")
+    arg_parser.add_argument("sources", nargs="+", help="the source files to analyze")
+    arg_parser.add_argument("--sink", action="append", choices=list(sink_types),
+                            help="a sink to write the results to, repeatable; stdout by default")
+    arg_parser.add_argument("--output", default=None, help="the directory the file sink writes to")
+    args = arg_parser.parse_args()
+
+    chosen = [FileSink(args.output) if sink == "file" else sink_types[sink]() for sink in args.sink or ["stdout"]]
+    for path in args.sources:
+        with open(path) as source_file:
+            text = source_file.read()
+        analyze_source(text, os.path.splitext(os.path.basename(path))[0], chosen)
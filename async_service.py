@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from main import *
+from analysis import diagnostics_to_json, records_to_json
+from server import warm_up
+from shared_tokens import attach_tokens, release_tokens, share_tokens
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+class ServiceBusy(Exception):
+    """Raised when a request is rejected because the service queue is full."""
+
+
+def lex_stage(lines: List[str]) \
+        -> Tuple[Dict[int, str], Dict[int, str], Dict[int, List[str]], List[str], List[int]]:
+    """The lexical stage of a request, run on a worker process.
+
+    Args:
+    - lines: the lines of the input stream.
+
+    Returns:
+    the token stream, symbol table, error stream, the tokens for the parser
+    and their lines.
+    """
+
+    return lex_lines(lines)
+
+
+def parse_stage(token_list: List[str], symbol_table: Dict[int, str], line_numbers: List[int]) \
+        -> Tuple[List[str], Dict, Dict, List[Dict]]:
+    """The syntax and semantic stage of a request, run on a worker process.
+
+    Args:
+    - token_list: the tokens for the parser.
+    - symbol_table: the lexical symbol table.
+    - line_numbers: the line of every token.
+
+    Returns:
+    the parser trace, parsing errors, semantic errors and the records of the
+    semantic symbol table.
+    """
+
+    parser_trace, parsing_errors, semantic_errors, semantic_symbol_table = \
+        parse_tokens(token_list, symbol_table, line_numbers=line_numbers)
+    return parser_trace, parsing_errors, semantic_errors, records_to_json(semantic_symbol_table)
+
+
+def lex_stage_shared(lines: List[str]) -> Tuple[Dict[int, str], Dict[int, str], Dict[int, List[str]], str]:
+    """The lexical stage of a request, handing the tokens for the parser over
+    in a shared memory segment instead of pickling them back.
+
+    Args:
+    - lines: the lines of the input stream.
+
+    Returns:
+    the token stream, symbol table, error stream and the name of the segment
+    holding the tokens for the parser. The caller owns the segment.
+    """
+
+    token_stream, symbol_table, error_stream, token_list, line_numbers = lex_lines(lines)
+    return token_stream, symbol_table, error_stream, share_tokens(token_list, line_numbers, symbol_table)
+
+
+def parse_stage_shared(segment: str) -> Tuple[List[str], Dict, Dict, List[Dict]]:
+    """The syntax and semantic stage of a request, reading its tokens from a
+    shared memory segment written by lex_stage_shared().
+
+    Args:
+    - segment: the name of the segment.
+
+    Returns:
+    the parser trace, parsing errors, semantic errors and the records of the
+    semantic symbol table.
+    """
+
+    token_list, line_numbers, symbol_table = attach_tokens(segment)
+    return parse_stage(token_list, symbol_table, line_numbers)
+
+
+class AnalysisService:
+    """Accepts concurrent analysis requests on an event loop and runs the
+    CPU-bound stages on a process pool.
+
+    At most 'max_active' requests occupy the pool at a time; up to
+    'max_queued' more wait for a slot and anything beyond that is rejected
+    with ServiceBusy, so a burst of requests cannot grow memory without bound.
+
+    The parsing stage may run on a pool of its own, sized independently of
+    the lexing pool, with the tokens handed over in shared memory.
+    """
+
+    def __init__(self, workers: int = os.cpu_count() or 1, max_active: Optional[int] = None,
+                 max_queued: int = 256, timeout: Optional[float] = None, parse_workers: Optional[int] = None,
+                 shared_memory: bool = False) -> None:
+        """Initializes the service and its process pool.
+
+        Args:
+        - self: this service, the one to create. Mandatory object reference.
+        - workers: the number of worker processes.
+        - max_active: the number of requests allowed in the pool at once,
+        defaults to twice the number of workers.
+        - max_queued: the number of requests allowed to wait for a slot.
+        - timeout: the default per-request timeout in seconds.
+        - parse_workers: the number of worker processes of a separate parsing
+        pool. The parsing stage runs on the lexing pool if not given.
+        - shared_memory: hand the tokens from the lexing to the parsing stage
+        in shared memory segments instead of pickling them.
+
+        Returns:
+        None.
+        """
+
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+        self.parse_pool = self.pool
+        if parse_workers is not None:
+            self.parse_pool = ProcessPoolExecutor(max_workers=parse_workers, initializer=warm_up)
+        self.shared_memory = shared_memory
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.queued = 0
+        self.__slots = asyncio.Semaphore(max_active or 2 * workers)
+
+    async def __run(self, deadline: Optional[float], pool: ProcessPoolExecutor, function, *args,
+                    abandoned: Optional[Callable] = None):
+        """Runs a stage on the process pool, bounded by the request deadline.
+        Cancelling the caller cancels the stage if it has not started yet.
+
+        Args:
+        - self: mandatory object reference.
+        - deadline: the loop time by which the request must finish.
+        - pool: the pool to run the stage on.
+        - function: the stage to run.
+        - args: the arguments of the stage.
+        - abandoned: called with the result of a stage that was already
+        running when the caller was cancelled or timed out, once the stage
+        finishes, to free what the result holds.
+
+        Returns:
+        the result of the stage.
+        """
+
+        work = pool.submit(function, *args)
+        future = asyncio.wrap_future(work)
+        if abandoned is not None:
+            # the stage goes on running on its worker after the caller gives
+            # up on it, so its result is only freed once it is done
+            def on_finished(work) -> None:
+                if not work.cancelled() and work.exception() is None:
+                    abandoned(work.result())
+
+            def on_cancelled(future) -> None:
+                if future.cancelled():
+                    work.add_done_callback(on_finished)
+
+            future.add_done_callback(on_cancelled)
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            return await future
+        return await asyncio.wait_for(future, max(deadline - loop.time(), 0))
+
+    async def stream(self, lines: List[str], timeout: Optional[float] = None) -> AsyncIterator[Dict]:
+        """Analyzes the given lines and yields the results as soon as each
+        stage finishes: first the tokens, then the diagnostics.
+
+        Args:
+        - self: mandatory object reference.
+        - lines: the lines of the input stream.
+        - timeout: the timeout for this request in seconds, overriding the
+        service default.
+
+        Returns:
+        an asynchronous iterator over the 'tokens' and 'diagnostics' events.
+        """
+
+        if self.queued >= self.max_queued:
+            raise ServiceBusy(f'{self.queued} requests already waiting')
+
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        self.queued += 1
+        try:
+            if deadline is None:
+                await self.__slots.acquire()
+            else:
+                await asyncio.wait_for(self.__slots.acquire(), max(deadline - loop.time(), 0))
+        finally:
+            self.queued -= 1
+
+        segment = None
+        try:
+            if self.shared_memory:
+                token_stream, symbol_table, error_stream, segment = \
+                    await self.__run(deadline, self.pool, lex_stage_shared, lines,
+                                     abandoned=lambda result: release_tokens(result[3]))
+            else:
+                token_stream, symbol_table, error_stream, token_list, line_numbers = \
+                    await self.__run(deadline, self.pool, lex_stage, lines)
+            yield {"event": "tokens",
+                   "tokens": [token_stream[line] for line in sorted(token_stream)],
+                   "symbol_table": {str(ix): entry for ix, entry in symbol_table.items()}}
+
+            if segment is not None:
+                parser_trace, parsing_errors, semantic_errors, records = \
+                    await self.__run(deadline, self.parse_pool, parse_stage_shared, segment)
+            else:
+                parser_trace, parsing_errors, semantic_errors, records = \
+                    await self.__run(deadline, self.parse_pool, parse_stage, token_list, symbol_table, line_numbers)
+            yield {"event": "diagnostics",
+                   "trace": parser_trace,
+                   "diagnostics": diagnostics_to_json(error_stream, parsing_errors, semantic_errors),
+                   "semantic_symbol_table": records}
+        finally:
+            # the segment is owned by the request, whether it completed or not
+            if segment is not None:
+                release_tokens(segment)
+            self.__slots.release()
+
+    async def analyze(self, lines: List[str], timeout: Optional[float] = None) -> Dict:
+        """Analyzes the given lines and returns the merged result once every
+        stage has finished.
+
+        Args:
+        - self: mandatory object reference.
+        - lines: the lines of the input stream.
+        - timeout: the timeout for this request in seconds.
+
+        Returns:
+        a dictionary holding the tokens, diagnostics and symbol tables.
+        """
+
+        result = {}
+        async for event in self.stream(lines, timeout):
+            result.update(event)
+        del result["event"]
+        return result
+
+    def close(self) -> None:
+        """Stops the process pools.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self.parse_pool is not self.pool:
+            self.parse_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Returns the given percentile of the samples (nearest rank).
+
+    Args:
+    - samples: the measured values.
+    - fraction: the percentile as a fraction, e.g. 0.99.
+
+    Returns:
+    the value at the given percentile.
+    """
+
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def generate_load(service: AnalysisService, lines: List[str], requests: int,
+                        concurrency: int) -> Dict[str, float]:
+    """Sends the given number of requests with a fixed number of concurrent
+    clients and measures the time to the first event and to completion.
+
+    Args:
+    - service: the service under load.
+    - lines: the source sent with every request.
+    - requests: the total number of requests.
+    - concurrency: the number of concurrent clients.
+
+    Returns:
+    the p50/p99 latencies in milliseconds and the throughput.
+    """
+
+    first_event = []
+    complete = []
+    remaining = [requests]
+
+    async def client() -> None:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            first = None
+            async for _ in service.stream(lines):
+                if first is None:
+                    first = time.perf_counter() - start
+            first_event.append(first)
+            complete.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {"first_p50_ms": percentile(first_event, 0.5) * 1000,
+            "first_p99_ms": percentile(first_event, 0.99) * 1000,
+            "p50_ms": percentile(complete, 0.5) * 1000,
+            "p99_ms": percentile(complete, 0.99) * 1000,
+            "requests_per_s": requests / elapsed}
+
+
+# driver code
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Load generator for the asyncio analysis service.")
+    arg_parser.add_argument("path", help="the TUPLE source sent with every request")
+    arg_parser.add_argument("--requests", type=int, default=200)
+    arg_parser.add_argument("--concurrency", type=int, default=32)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--parse-workers", type=int, help="run the parsing stage on a separate pool")
+    arg_parser.add_argument("--shared-memory", action="store_true", help="hand tokens over in shared memory")
+    args = arg_parser.parse_args()
+
+    with open(args.path) as source:
+        source_lines = source.readlines()
+
+    async def run() -> None:
+        service = AnalysisService(args.workers, max_queued=args.concurrency, parse_workers=args.parse_workers,
+                                  shared_memory=args.shared_memory)
+        try:
+            stats = await generate_load(service, source_lines, args.requests, args.concurrency)
+        finally:
+            service.close()
+        for name, value in stats.items():
+            print("{:<16} {:>10.2f}".format(name, value))
+
+    asyncio.run(run())
@@ -1,13 +1,93 @@
 # The list of compatible types
 
-type_equilvalence = {
-                    ("int", "int", '+') : "int",
-                    ("int", "int", '-') : "int",
-                    ("int", "int", '*') : "int",
-                    ("int", "int", '/') : "int",
-                    ("float", "float", '+') : "float",
-                    ("float", "float", '-') : "float",
-                    ("float", "float", '*') : "float",
-                    ("float", "float", '/') : "float",
-                    ("int", "float", "*") : "float",
-                    }
\ No newline at end of file
+# the data types of TUPLE, indexed by their type code
+types = ["bool", "char", "int", "float"]
+type_codes = {name: code for code, name in enumerate(types)}
+
+# the promotion lattice: the type each type implicitly widens to
+promotes_to = {"bool": None, "char": "int", "int": "float", "float": None}
+
+# the binary operators, indexed by their operator code
+arithmetic_ops = ["+", "-", "*", "/", "^"]
+relational_ops = ["LT", "GT", "LE", "GE"]
+equality_ops = ["EQ", "NE"]
+logical_ops = ["and", "or"]
+operators = arithmetic_ops + ["mod"] + relational_ops + equality_ops + logical_ops
+operator_codes = {name: code for code, name in enumerate(operators)}
+
+# arithmetic operators that accept operands of different numeric types
+promoting_ops = {"*"}
+
+numeric_types = {"int", "float"}
+
+
+def join(left, right):
+    """Returns the least upper bound of two types in the promotion lattice,
+    or None if neither widens to the other."""
+
+    widening = left
+    while widening is not None:
+        if widening == right:
+            return right
+        widening = promotes_to[widening]
+    widening = right
+    while widening is not None:
+        if widening == left:
+            return left
+        widening = promotes_to[widening]
+    return None
+
+
+def rule(left, right, op):
+    """The typing rule of a binary operator, used to compile the table."""
+
+    common = join(left, right)
+    if op in arithmetic_ops:
+        if left in numeric_types and right in numeric_types and (left == right or op in promoting_ops):
+            return common
+    elif op == "mod":
+        if left == right == "int":
+            return "int"
+    elif op in relational_ops:
+        if common in numeric_types or left == right == "char":
+            return "bool"
+    elif op in equality_ops:
+        if common is not None:
+            return "bool"
+    elif op in logical_ops:
+        if left == right == "bool":
+            return "bool"
+    return None
+
+
+# the result type code of every (operator, left, right) combination, 255 when
+# the operand types are incompatible
+result_table = bytes(
+    (type_codes[rule(left, right, op)] if rule(left, right, op) is not None else 255)
+    for op in operators for left in types for right in types)
+
+# whether a value of the column type may be assigned to the row type
+assign_table = bytes(int(target == value) for target in types for value in types)
+
+
+def result_type(left, right, op):
+    """Returns the type of a binary operation, or None if the operand types
+    are incompatible or unknown."""
+
+    left_code = type_codes.get(left)
+    right_code = type_codes.get(right)
+    if left_code is None or right_code is None:
+        return None
+    code = result_table[(operator_codes[op] * len(types) + left_code) * len(types) + right_code]
+    return None if code == 255 else types[code]
+
+
+def assignable(target, value):
+    """Checks if a value of the given type may be assigned to a target of the
+    given type. Two unknown types are not reported a second time."""
+
+    target_code = type_codes.get(target)
+    value_code = type_codes.get(value)
+    if target_code is None or value_code is None:
+        return target == value
+    return assign_table[target_code * len(types) + value_code] == 1
@@ -0,0 +1,69 @@
+from typing import Dict, Optional
+
+
+class ErrorBudgetExceeded(Exception):
+    """Raised once a phase has recorded as many errors as its budget allows."""
+
+    def __init__(self, phase: str, limit: int) -> None:
+        """Initializes the exception.
+
+        Args:
+        - self: this exception, the one to create. Mandatory object reference.
+        - phase: the phase whose budget ran out.
+        - limit: the number of errors the phase was allowed.
+
+        Returns:
+        None.
+        """
+
+        super().__init__(f'Too many {phase.lower()} errors ({limit}), analysis stopped')
+        self.phase = phase
+        self.limit = limit
+
+
+class ErrorBudget:
+    """The maximum number of errors recorded per phase before the analysis
+    stops. A budget of None leaves the phase unbounded."""
+
+    def __init__(self, lexical: Optional[int] = None, parsing: Optional[int] = None,
+                 semantic: Optional[int] = None, fail_fast: bool = False) -> None:
+        """Initializes the budget.
+
+        Args:
+        - self: this budget, the one to create. Mandatory object reference.
+        - lexical: the budget for lexical errors.
+        - parsing: the budget for parsing errors.
+        - semantic: the budget for semantic errors.
+        - fail_fast: stop at the first error of any phase, overriding the
+        other budgets.
+
+        Returns:
+        None.
+        """
+
+        if fail_fast:
+            lexical = parsing = semantic = 1
+        self.limits: Dict[str, Optional[int]] = {"Lexical": lexical, "Parsing": parsing, "Semantic": semantic}
+        self.counts: Dict[str, int] = {"Lexical": 0, "Parsing": 0, "Semantic": 0}
+        self.exceeded: Optional[str] = None
+
+    def record(self, phase: str) -> None:
+        """Counts an error against the budget of the given phase.
+
+        Args:
+        - self: mandatory object reference.
+        - phase: the phase the error was found in - Lexical, Parsing or
+        Semantic.
+
+        Returns:
+        None.
+
+        Raises:
+        ErrorBudgetExceeded: if the error used up the budget of the phase.
+        """
+
+        self.counts[phase] += 1
+        limit = self.limits[phase]
+        if limit is not None and self.counts[phase] >= limit:
+            self.exceeded = phase
+            raise ErrorBudgetExceeded(phase, limit)
@@ -0,0 +1,189 @@
+import argparse
+import io
+import random
+import signal
+import sys
+import time
+from lexer import *
+from main import analyze
+from typing import Callable, Dict, List
+
+
+class LexingTimeout(Exception):
+    """Raised when lexing or analyzing a single input takes longer than its
+    time limit."""
+
+
+def on_alarm(signum, frame) -> None:
+    raise LexingTimeout()
+
+
+def lex(source: str) -> int:
+    """Lexes the given source line by line, the way main.lex_lines does.
+
+    Args:
+    - source: the input to lex.
+
+    Returns:
+    the number of tokens generated.
+    """
+
+    symbol_table = {}
+    symbol_index = {}
+    symbol_count = 1
+    count = 0
+    for line in source.splitlines():
+        lexer = Lexer(line, symbol_table, symbol_count, symbol_index)
+        while lexer.peek() != '\0':
+            _, symbol_table, symbol_count, _ = lexer.get_token()
+            count += 1
+
+    return count
+
+
+def analyze_all(source: str) -> None:
+    """Runs every phase of the analysis over the given source, reading its
+    lines the way main.py reads a file.
+
+    Args:
+    - source: the input to analyze.
+
+    Returns:
+    None.
+    """
+
+    analyze(io.StringIO(source, newline=None).readlines())
+
+
+# adversarial inputs, each built for a given size in characters
+adversarial: Dict[str, Callable[[int], str]] = {
+    "unterminated comment": lambda n: "/$ " + "x" * n,
+    "comment of dollars": lambda n: "/$" + "$ " * (n // 2),
+    "doubled dollar without slash": lambda n: "/$ a $$" + "b" * n,
+    "unterminated string": lambda n: "\"" + "a" * n,
+    "unterminated char constant": lambda n: "'" + "ab" * (n // 2),
+    "long identifier": lambda n: "a" * n,
+    "long invalid identifier": lambda n: "a" * n + "@",
+    "long number": lambda n: "1" * n,
+    "digits then letters": lambda n: "1" + "a" * n,
+    "long float": lambda n: "1." + "2" * n,
+    "float with dangling exponent": lambda n: "1.23E" + "x" * n,
+    "dots": lambda n: "." * n,
+    "unrecognized characters": lambda n: "@#!~`?" * (n // 6),
+    "uppercase V": lambda n: "V" * n,
+    "many identifiers": lambda n: " ".join(f'v{i}' for i in range(n // 6)),
+    "operators": lambda n: "+-*/^<>=!" * (n // 9),
+    "slashes": lambda n: "/" * n,
+    "nul bytes": lambda n: "\0" * n,
+    "many short lines": lambda n: "int a;\n" * (n // 7),
+}
+
+
+def random_input(rng: random.Random, n: int) -> str:
+    """Builds a random input mixing the lexical building blocks of TUPLE
+    with arbitrary characters.
+
+    Args:
+    - rng: the random number generator.
+    - n: the approximate size in characters.
+
+    Returns:
+    the generated input.
+    """
+
+    pieces = list(letters + digits + "_.,;(){}[]'\"$/+-*^<>=! \t@#\\\x00\n") + \
+        ["if", "int", "float", "for", "1.5", "2.0E", "3.25E5", "/$", "$/", "\"s\""]
+    return "".join(rng.choice(pieces) for _ in range(n // 2))
+
+
+def time_lexing(source: str, limit: float, phases: Callable[[str], object] = lex) -> float:
+    """Lexes the source under a time limit.
+
+    Args:
+    - source: the input to lex.
+    - limit: the time limit in seconds.
+    - phases: the phases to run over the source, by default only the lexer.
+
+    Returns:
+    the time taken in seconds.
+    """
+
+    signal.setitimer(signal.ITIMER_REAL, limit)
+    try:
+        start = time.perf_counter()
+        phases(source)
+        return time.perf_counter() - start
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def run(size: int, growth: int, limit: float, fuzz_cases: int, seed: int) -> List[str]:
+    """Lexes every adversarial input at two sizes, checking that each
+    finishes within the time limit and that the time grows at most linearly,
+    then lexes random inputs under the same time limit. Every input is also
+    analyzed end to end at the base size, checking that the parser and the
+    semantic analysis get through whatever tokens the lexer generates.
+
+    Args:
+    - size: the base size of the inputs in characters.
+    - growth: the factor between the two sizes.
+    - limit: the time limit per input in seconds.
+    - fuzz_cases: the number of random inputs.
+    - seed: the seed of the random inputs.
+
+    Returns:
+    a description of every failure.
+    """
+
+    signal.signal(signal.SIGALRM, on_alarm)
+    failures = []
+
+    for name, build in adversarial.items():
+        try:
+            small = min(time_lexing(build(size), limit) for _ in range(3))
+            large = min(time_lexing(build(size * growth), limit) for _ in range(3))
+        except LexingTimeout:
+            failures.append(f'{name}: exceeded {limit}s')
+            continue
+        # allow for timer noise on the small input and a constant factor
+        ratio = large / max(small, 1e-4)
+        status = "ok" if ratio <= 2 * growth else "SUPERLINEAR"
+        print("{:<32} {:>10.5f}s {:>10.5f}s  x{:<6.1f} {}".format(name, small, large, ratio, status))
+        if status != "ok":
+            failures.append(f'{name}: time grew x{ratio:.1f} for x{growth} input')
+        try:
+            time_lexing(build(size), limit, analyze_all)
+        except LexingTimeout:
+            failures.append(f'{name}: analysis exceeded {limit}s')
+        except Exception as err:
+            failures.append(f'{name}: analysis raised {err!r}')
+
+    rng = random.Random(seed)
+    for case in range(fuzz_cases):
+        source = random_input(rng, rng.randint(1, size))
+        try:
+            time_lexing(source, limit)
+            time_lexing(source, limit, analyze_all)
+        except LexingTimeout:
+            failures.append(f'fuzz case {case}: exceeded {limit}s on {source[:60]!r}')
+        except Exception as err:
+            failures.append(f'fuzz case {case}: {err!r} on {source[:60]!r}')
+    print(f'{fuzz_cases} fuzz cases, {len(failures)} failures')
+
+    return failures
+
+
+# driver code
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Adversarial and fuzz inputs for the lexer.")
+    arg_parser.add_argument("--size", type=int, default=20000, help="base input size in characters")
+    arg_parser.add_argument("--growth", type=int, default=8, help="factor between the two input sizes")
+    arg_parser.add_argument("--limit", type=float, default=5.0, help="time limit per input in seconds")
+    arg_parser.add_argument("--fuzz", type=int, default=500, help="number of random inputs")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    found = run(args.size, args.growth, args.limit, args.fuzz, args.seed)
+    for failure in found:
+        print(failure)
+    sys.exit(1 if found else 0)
@@ -0,0 +1,342 @@
+import marshal
+import os
+import re
+import sys
+import zlib
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+epsilon = "epsilon"
+end_marker = "<$>"
+# bumped whenever the layout of the compiled tables changes
+tables_version = 1
+here = os.path.dirname(os.path.abspath(__file__))
+grammar_path = os.path.join(here, "tuple.grammar")
+tables_path = os.path.join(here, "parser_tables.marshal")
+
+rule_line = re.compile(r"(\w+)\s*->(.*)")
+symbol = re.compile(r'"[^"]*"|\||\S+')
+
+
+class GrammarError(Exception):
+    """Raised when a grammar file is malformed."""
+
+
+class Grammar:
+    """A context free grammar whose terminals are spelled the way the parser
+    tests tokens: the token kind 'dt' as '<dt' and the lexeme 'for' as
+    'for>'."""
+
+    def __init__(self, rules: Dict[str, List[Tuple[str, ...]]], sync: FrozenSet[str]) -> None:
+        """Initializes the grammar.
+
+        Args:
+        - self: this grammar, the one to create. Mandatory object reference.
+        - rules: the alternatives of every nonterminal, in order, the first
+        nonterminal being the start symbol. The empty alternative is ().
+        - sync: the terminals to resynchronize on after an error.
+
+        Returns:
+        None.
+        """
+
+        self.rules = rules
+        self.start = next(iter(rules))
+        self.sync = sync
+
+    def productions(self) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Returns every production, numbered by its position in the list."""
+
+        return [(nonterminal, alternative) for nonterminal, alternatives in self.rules.items()
+                for alternative in alternatives]
+
+
+def terminal(name: str) -> str:
+    """Spells a grammar symbol that has no rule as the parser tests it.
+
+    Args:
+    - name: a quoted lexeme, e.g. '"for"', or a token kind, e.g. 'dt'.
+
+    Returns:
+    the terminal, e.g. 'for>' or '<dt'.
+    """
+
+    if name.startswith('"'):
+        return name[1:-1] + ">"
+    return "<" + name
+
+
+def read_grammar(text: str) -> Grammar:
+    """Reads a grammar in the format of tuple.grammar.
+
+    Args:
+    - text: the contents of the grammar file.
+
+    Returns:
+    the grammar.
+
+    Raises:
+    GrammarError: if the grammar is malformed.
+    """
+
+    bodies: Dict[str, List[str]] = {}
+    sync = []
+    current = None
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].rstrip()
+        if not line:
+            continue
+        if line.startswith("%sync"):
+            sync.extend(symbol.findall(line[len("%sync"):]))
+            current = None
+            continue
+        if line[0].isspace():
+            if current is None:
+                raise GrammarError(f'line {number}: continuation line outside a rule')
+            bodies[current].extend(symbol.findall(line))
+            continue
+        matched = rule_line.fullmatch(line)
+        if matched is None:
+            raise GrammarError(f'line {number}: expected "nonterminal -> alternatives"')
+        current = matched.group(1)
+        if current in bodies:
+            raise GrammarError(f'line {number}: second rule for {current}')
+        bodies[current] = symbol.findall(matched.group(2))
+    if not bodies:
+        raise GrammarError("no rules")
+
+    rules = {}
+    for nonterminal, body in bodies.items():
+        alternatives = [[]]
+        for name in body:
+            if name == "|":
+                alternatives.append([])
+            elif name != "ε":
+                alternatives[-1].append(name if name in bodies else terminal(name))
+        rules[nonterminal] = [tuple(alternative) for alternative in alternatives]
+
+    return Grammar(rules, frozenset(terminal(name) for name in sync))
+
+
+def first_of(sequence: Tuple[str, ...], first: Dict[str, Set[str]]) -> Set[str]:
+    """Computes the FIRST set of a sequence of symbols.
+
+    Args:
+    - sequence: the symbols.
+    - first: the FIRST set of every nonterminal computed so far.
+
+    Returns:
+    the terminals that may start the sequence, with epsilon if it may be
+    empty.
+    """
+
+    found = set()
+    for name in sequence:
+        if name not in first:
+            found.add(name)
+            return found
+        found |= first[name] - {epsilon}
+        if epsilon not in first[name]:
+            return found
+    found.add(epsilon)
+    return found
+
+
+def first_sets(grammar: Grammar) -> Dict[str, Set[str]]:
+    """Computes the FIRST set of every nonterminal.
+
+    Args:
+    - grammar: the grammar.
+
+    Returns:
+    the FIRST sets, holding epsilon for the nonterminals deriving the empty
+    string.
+    """
+
+    first = {nonterminal: set() for nonterminal in grammar.rules}
+    changed = True
+    while changed:
+        changed = False
+        for nonterminal, alternative in grammar.productions():
+            found = first_of(alternative, first)
+            if not found <= first[nonterminal]:
+                first[nonterminal] |= found
+                changed = True
+    return first
+
+
+def follow_sets(grammar: Grammar, first: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+    """Computes the FOLLOW set of every nonterminal.
+
+    Args:
+    - grammar: the grammar.
+    - first: the FIRST sets.
+
+    Returns:
+    the FOLLOW sets, holding the end marker after the start symbol.
+    """
+
+    follow = {nonterminal: set() for nonterminal in grammar.rules}
+    follow[grammar.start].add(end_marker)
+    changed = True
+    while changed:
+        changed = False
+        for nonterminal, alternative in grammar.productions():
+            for ix, name in enumerate(alternative):
+                if name not in follow:
+                    continue
+                rest = first_of(alternative[ix + 1:], first)
+                found = rest - {epsilon}
+                if epsilon in rest:
+                    found |= follow[nonterminal]
+                if not found <= follow[name]:
+                    follow[name] |= found
+                    changed = True
+    return follow
+
+
+def predict_table(grammar: Grammar, first: Dict[str, Set[str]],
+                  follow: Dict[str, Set[str]]) -> Tuple[Dict[str, Dict[str, int]], List[str]]:
+    """Builds the LL(1) prediction table.
+
+    Args:
+    - grammar: the grammar.
+    - first: the FIRST sets.
+    - follow: the FOLLOW sets.
+
+    Returns:
+    the number of the production to expand every nonterminal by on every
+    lookahead terminal, and a description of every conflict, where two
+    productions are predicted on the same lookahead.
+    """
+
+    productions = grammar.productions()
+    table = {nonterminal: {} for nonterminal in grammar.rules}
+    conflicts = []
+    for number, (nonterminal, alternative) in enumerate(productions):
+        lookaheads = first_of(alternative, first)
+        if epsilon in lookaheads:
+            lookaheads = (lookaheads - {epsilon}) | follow[nonterminal]
+        for lookahead in sorted(lookaheads):
+            predicted = table[nonterminal].setdefault(lookahead, number)
+            if predicted != number:
+                conflicts.append(f'{nonterminal} on {lookahead}: '
+                                 f'{" ".join(productions[predicted][1]) or "ε"} / {" ".join(alternative) or "ε"}')
+    return table, conflicts
+
+
+def grammar_crc(text: str) -> int:
+    """Computes the checksum the compiled tables record of their grammar.
+
+    Args:
+    - text: the contents of the grammar file, read as text, so that its line
+    endings are translated.
+
+    Returns:
+    the CRC-32 of the text.
+    """
+
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def compile_grammar(text: str) -> Tuple[dict, List[str]]:
+    """Compiles a grammar into the tables of the parser.
+
+    Args:
+    - text: the contents of the grammar file.
+
+    Returns:
+    the tables and the LL(1) conflicts of the grammar.
+    """
+
+    grammar = read_grammar(text)
+    first = first_sets(grammar)
+    follow = follow_sets(grammar, first)
+    predict, conflicts = predict_table(grammar, first, follow)
+    tables = {
+        "version": tables_version,
+        "grammar_crc": grammar_crc(text),
+        "start": grammar.start,
+        "first": {nonterminal: frozenset(found) for nonterminal, found in first.items()},
+        "follow": {nonterminal: frozenset(found) for nonterminal, found in follow.items()},
+        "sync": grammar.sync,
+        "productions": tuple(grammar.productions()),
+        "predict": predict,
+    }
+    return tables, conflicts
+
+
+def write_tables(tables: dict, path: str = tables_path) -> None:
+    """Writes compiled tables in the marshal format.
+
+    Args:
+    - tables: the tables, as returned by compile_grammar().
+    - path: the path of the file.
+
+    Returns:
+    None.
+    """
+
+    with open(path, "wb") as stream:
+        marshal.dump(tables, stream)
+
+
+def load_tables(path: str = tables_path, grammar: str = grammar_path) -> dict:
+    """Loads the compiled tables of a grammar, compiling the grammar instead
+    if they are missing or were compiled from a different version of it.
+
+    Args:
+    - path: the path of the compiled tables.
+    - grammar: the path of the grammar file.
+
+    Returns:
+    the tables.
+    """
+
+    # read as text, as the driver reads the grammar it compiles, so that a
+    # grammar checked out with other line endings is not taken for stale
+    with open(grammar, encoding="utf-8") as stream:
+        text = stream.read()
+    tables: Optional[dict] = None
+    try:
+        with open(path, "rb") as stream:
+            tables = marshal.loads(stream.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    if isinstance(tables, dict) and tables.get("version") == tables_version \
+            and tables.get("grammar_crc") == grammar_crc(text):
+        return tables
+
+    import warnings
+    warnings.warn(f'{path} is missing or stale, compiling {grammar}; run grammar_compiler.py to update it')
+    return compile_grammar(text)[0]
+
+
+# driver code
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Compiles the TUPLE grammar into FIRST/FOLLOW sets and an "
+                                                     "LL(1) prediction table.")
+    arg_parser.add_argument("grammar", nargs="?", default=grammar_path, help="the grammar file")
+    arg_parser.add_argument("--output", default=tables_path, help="the compiled tables to write")
+    arg_parser.add_argument("--print", action="store_true", help="print the FIRST and FOLLOW sets")
+    args = arg_parser.parse_args()
+
+    with open(args.grammar, encoding="utf-8") as source:
+        try:
+            compiled, found_conflicts = compile_grammar(source.read())
+        except GrammarError as error:
+            sys.exit(f'{args.grammar}: {error}')
+
+    if args.print:
+        for name in compiled["first"]:
+            print(f'{name:<16} FIRST  {{{", ".join(sorted(compiled["first"][name]))}}}')
+            print(f'{"":<16} FOLLOW {{{", ".join(sorted(compiled["follow"][name]))}}}')
+    if found_conflicts:
+        for conflict in found_conflicts:
+            print(f'LL(1) conflict: {conflict}', file=sys.stderr)
+        sys.exit(f'{len(found_conflicts)} conflicts, {args.output} not written')
+
+    write_tables(compiled, args.output)
+    print(f'{len(compiled["productions"])} productions, {len(compiled["first"])} nonterminals, '
+          f'written to {args.output}')
@@ -0,0 +1,116 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# the median cumulative import time allowed for every entry point, in
+# milliseconds, with bytecode already cached
+import_budgets = {
+    "main": 30.0,
+    "rd_parser": 30.0,
+    "lexer": 25.0,
+}
+
+# modules only some features need, which are imported on first use and must
+# not be imported by the entry points
+lazy_modules = (
+    "argparse",
+    "concurrent.futures",
+    "logging",
+    "multiprocessing",
+    "semantic_passes",
+    "syntax_tree",
+    "token_binary",
+)
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """Imports a module in a fresh interpreter with -X importtime.
+
+    Args:
+    - module: the name of the module to import.
+
+    Returns:
+    the self and cumulative import time of every module imported, in
+    microseconds, by name.
+    """
+
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f'import {module}'],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def measure(module: str, runs: int) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Measures the time to import a module, the first run warming the
+    bytecode cache up.
+
+    Args:
+    - module: the name of the module to import.
+    - runs: the number of timed runs.
+
+    Returns:
+    the median cumulative import time in milliseconds, and the import times
+    of the median run.
+    """
+
+    import_times(module)
+    timed = sorted((import_times(module) for _ in range(runs)), key=lambda times: times[module][1])
+    median = timed[len(timed) // 2]
+    return statistics.median(times[module][1] for times in timed) / 1000, median
+
+
+def check(modules: List[str], runs: int, top: int) -> List[str]:
+    """Checks the import time of every entry point against its budget and
+    that none of them imports a lazily imported module.
+
+    Args:
+    - modules: the entry points to check.
+    - runs: the number of timed runs per entry point.
+    - top: the number of slowest imports to list per entry point.
+
+    Returns:
+    a description of every violation.
+    """
+
+    violations = []
+    for module in modules:
+        milliseconds, times = measure(module, runs)
+        budget = import_budgets[module]
+        print(f'{module:<12} {milliseconds:8.2f} ms  budget {budget:6.2f} ms')
+        for name, (own, _) in sorted(times.items(), key=lambda item: -item[1][0])[:top]:
+            print(f'    {name:<28} {own / 1000:8.2f} ms')
+
+        if milliseconds > budget:
+            violations.append(f'{module} takes {milliseconds:.2f} ms to import, over its {budget:.2f} ms budget')
+        eager = [name for name in lazy_modules if name in times]
+        if eager:
+            violations.append(f'{module} imports {", ".join(eager)}, which should be imported on first use')
+    return violations
+
+
+# driver code
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Checks the startup time of the entry points against their "
+                                                     "import time budgets.")
+    arg_parser.add_argument("modules", nargs="*", default=list(import_budgets),
+                            help=f'the entry points to check, among {", ".join(import_budgets)}')
+    arg_parser.add_argument("--runs", type=int, default=9)
+    arg_parser.add_argument("--top", type=int, default=5, help="list this many of the slowest imports")
+    args = arg_parser.parse_args()
+    unknown = [module for module in args.modules if module not in import_budgets]
+    if unknown:
+        arg_parser.error(f'no import time budget for {", ".join(unknown)}')
+
+    found = check(args.modules, args.runs, args.top)
+    for violation in found:
+        print(violation, file=sys.stderr)
+    sys.exit(1 if found else 0)
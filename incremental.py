@@ -0,0 +1,118 @@
+from lexer import *
+from typing import Dict, List, Tuple
+
+
+class LexedSource:
+    """The result of a lexical analysis kept per line, so that edited lines
+    can be re-tokenized and spliced back without lexing the whole input again.
+
+    The symbol table is only ever appended to: identifiers that are already
+    recorded keep their ids across edits and new identifiers are numbered
+    after the existing ones.
+    """
+
+    def __init__(self, lines: List[str]) -> None:
+        """Lexes the given lines.
+
+        Args:
+        - self: this analysis, the one to create. Mandatory object reference.
+        - lines: the lines of the input stream, as returned by readlines().
+
+        Returns:
+        None.
+        """
+
+        self.lines = []
+        self.line_tokens = []
+        self.line_errors = []
+        self.symbol_table = {}
+        self.symbol_index = {}
+        self.symbol_count = 1
+        self.relex([(0, 0, lines)])
+
+    def __lex_line(self, line: str) -> Tuple[List[str], List[str]]:
+        """Tokenizes a single line against the maintained symbol table.
+
+        Args:
+        - self: mandatory object reference.
+        - line: the line to tokenize.
+
+        Returns:
+        the tokens and the errors of the line.
+        """
+
+        lexer = Lexer(line, self.symbol_table, self.symbol_count, self.symbol_index)
+        tokens = []
+        errors = []
+        while lexer.peek() != '\0':
+            token, _, self.symbol_count, error = lexer.get_token()
+            tokens.append(token)
+            if error != "":
+                errors.append(error)
+
+        return tokens, errors
+
+    def relex(self, edits: List[Tuple[int, int, List[str]]]) -> None:
+        """Applies the given edits and re-tokenizes only the edited lines.
+
+        Args:
+        - self: mandatory object reference.
+        - edits: non-overlapping edits, each replacing the lines [start, end)
+        of the current input with the given new lines. Positions refer to the
+        input before any of the edits is applied.
+
+        Returns:
+        None.
+        """
+
+        # lex in source order so that new identifiers are numbered by first
+        # occurrence, then splice from the back so that positions stay valid
+        lexed = []
+        for start, end, new_lines in sorted(edits, key=lambda edit: edit[0]):
+            tokens, errors = [], []
+            for line in new_lines:
+                line_tokens, line_errors = self.__lex_line(line)
+                tokens.append(line_tokens)
+                errors.append(line_errors)
+            lexed.append((start, end, new_lines, tokens, errors))
+
+        for start, end, new_lines, tokens, errors in reversed(lexed):
+            self.lines[start:end] = new_lines
+            self.line_tokens[start:end] = tokens
+            self.line_errors[start:end] = errors
+
+    def token_stream(self) -> Dict[int, str]:
+        """Returns the token stream in the format written by the lexer.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        the tokenized lexemes (by line).
+        """
+
+        return {i: ''.join(tokens) for i, tokens in enumerate(self.line_tokens) if tokens}
+
+    def error_stream(self) -> Dict[int, List[str]]:
+        """Returns the lexical errors in the format written by the lexer.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        the errors (by line).
+        """
+
+        return {i: errors for i, errors in enumerate(self.line_errors) if errors}
+
+    def token_list(self) -> List[str]:
+        """Returns the flat list of tokens to be filtered for the parser.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        all tokens in order.
+        """
+
+        return [token for tokens in self.line_tokens for token in tokens]
@@ -0,0 +1,106 @@
+import sys
+from compatibility_spec import types
+from typing import Dict, Iterable
+
+
+class InternPool:
+    """A pool of strings shared by the lexer, the parser and the symbol tables
+    of an analysis, or of a batch of analyses, so that every distinct token,
+    identifier name and type name is stored once however often it occurs.
+
+    Strings taken from the pool are the same object whenever their text is
+    equal, so comparing them only compares pointers. Unlike sys.intern(), the
+    pool is freed along with the analyses holding it.
+    """
+
+    def __init__(self, strings: Iterable[str] = types) -> None:
+        """Initializes the pool.
+
+        Args:
+        - self: this pool, the one to create. Mandatory object reference.
+        - strings: the strings to start with, by default the names of the
+        data types, so that the types of the symbol tables are the very
+        strings compatibility_spec compares them to.
+
+        Returns:
+        None.
+        """
+
+        self.strings: Dict[str, str] = {text: text for text in strings}
+        self.requests = 0
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __contains__(self, text: str) -> bool:
+        return text in self.strings
+
+    def intern(self, text: str) -> str:
+        """Returns the pooled string of the given text, adding it if it is
+        not in the pool yet.
+
+        Args:
+        - self: mandatory object reference.
+        - text: the text.
+
+        Returns:
+        the pooled string, equal to the text.
+        """
+
+        self.requests += 1
+        return self.strings.setdefault(text, text)
+
+    def nbytes(self) -> int:
+        """Returns the size of the pooled strings in bytes."""
+
+        return sum(sys.getsizeof(text) for text in self.strings)
+
+
+# driver code
+if __name__ == "__main__":
+    import argparse
+    import gc
+    import time
+    import tracemalloc
+    from main import analyze, lex_lines, parse_tokens
+
+    arg_parser = argparse.ArgumentParser(description="Compares the memory held by the results of a batch of "
+                                                     "analyses with and without a shared interning pool.")
+    arg_parser.add_argument("sources", nargs="+", help="the source files to analyze")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="analyze every source this many times over")
+    args = arg_parser.parse_args()
+
+    sys.setrecursionlimit(10000)
+    batch = []
+    for path in args.sources:
+        with open(path) as source:
+            batch.append(source.readlines())
+    batch *= args.repeat
+
+    def without_pool(lines: list) -> tuple:
+        token_stream, symbol_table, error_stream, token_list, line_numbers = lex_lines(lines)
+        return (token_stream, symbol_table, error_stream) + tuple(parse_tokens(token_list, symbol_table,
+                                                                               line_numbers=line_numbers))
+
+    def held(run) -> tuple:
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        results = [run(lines) for lines in batch]
+        seconds = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del results
+        return size, seconds
+
+    shared = InternPool()
+    measured = {
+        "no pool": held(without_pool),
+        "pool per analysis": held(analyze),
+        "pool per batch": held(lambda lines: analyze(lines, pool=shared)),
+    }
+    baseline = measured["no pool"][0]
+    print(f'{len(batch)} analyses, {len(shared)} distinct strings in the shared pool')
+    for title, (size, seconds) in measured.items():
+        print(f'{title:<20} {size / 1024:10.1f} KiB  saved {100 * (1 - size / baseline):5.1f}%  '
+              f'{seconds * 1000:9.1f} ms')
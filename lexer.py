@@ -1,11 +1,39 @@
 from tuple_spec import *
-from typing import Dict, Tuple
+from intern_pool import InternPool
+from typing import Dict, Optional, Tuple
+import re
+
+# precompiled tables for recognizing reserved words and scanning whole runs
+# of characters at once
+keyword_set = frozenset(keywords)
+data_type_set = frozenset(data_types)
+letter_set = frozenset(letters)
+digit_set = frozenset(digits)
+punctuation_set = frozenset(punctuation)
+arithmetic_set = frozenset(arithmetic_op)
+whitespace_set = frozenset(whitespaces)
+# the characters that end a float: punctuators other than '.' and whitespace
+float_end_set = frozenset(punc for punc in punctuation if punc != ".") | whitespace_set
+
+identifier_run = re.compile("[" + re.escape(letters + digits + underscore) + "]*")
+digit_run = re.compile("[" + re.escape(digits) + "]*")
+float_tail_run = re.compile("[^" + re.escape("".join(float_end_set)) + "]*")
+char_const_run = re.compile("[^" + re.escape("'\n" + "".join(punctuation)) + "]*")
+
+# the tokens that carry no meaning for the parser - whitespace and comments.
+# They are kept on a side channel that only the token stream writer reads.
+trivia = frozenset({"<blank>", "<tab>", "<newline>", "<Comment>"})
+
+# the tokens of lexical errors that do not start with '<Invalid'. Like the
+# '<Invalid' ones they are reported as errors and not passed on to the parser.
+error_tokens = frozenset({"<Character not recognised!>", "<Unsupported character>"})
 
 
 class Lexer:
     """An lexical analyzer."""
 
-    def __init__(self, input_stream: str, symbol_table: Dict[int, str], symbol_count: int) -> None:
+    def __init__(self, input_stream: str, symbol_table: Dict[int, str], symbol_count: int,
+                 symbol_index: Optional[Dict[str, int]] = None, pool: Optional[InternPool] = None) -> None:
         """Initializes the lexer for the given portion of the input stream.
 
         Args:
@@ -14,6 +42,11 @@ class Lexer:
         particular line.
         - symbol_table: the maintained symbol table.
         - symbol_count: the number of entries in the symbol table.
+        - symbol_index: the reverse mapping of the symbol table, from entry to
+        key. It is shared across lexers so that it need not be rebuilt for
+        every line; it is built from the symbol table if not given.
+        - pool: the interning pool to take the tokens and symbol table
+        entries from, if any.
 
         Returns:
         None.
@@ -24,6 +57,10 @@ class Lexer:
         self.cur_pos = -1
         self.symbol_table = symbol_table
         self.symbol_count = symbol_count
+        if symbol_index is None:
+            symbol_index = {entry: ix for ix, entry in symbol_table.items()}
+        self.symbol_index = symbol_index
+        self.pool = pool
         self.error = ""
         self.__next_char()
 
@@ -46,6 +83,38 @@ class Lexer:
         else:
             self.cur_char = self.input[self.cur_pos]
 
+    def __skip_to(self, pos: int) -> str:
+        """Moves the file pointer to the given position and returns the
+        lexeme between the current position and that one.
+
+        Args:
+        - self: mandatory object reference.
+        - pos: the position to move to.
+
+        Returns:
+        the skipped portion of the input.
+        """
+
+        lexeme = self.input[self.cur_pos:pos]
+        self.__next_char(pos - self.cur_pos)
+        return lexeme
+
+    def __find(self, char: str, start: int) -> int:
+        """Finds the next occurrence of a character.
+
+        Args:
+        - self: mandatory object reference.
+        - char: the character to look for.
+        - start: the position to start looking from.
+
+        Returns:
+        the position of the character, or the end of the input if it does
+        not occur.
+        """
+
+        pos = self.input.find(char, start)
+        return len(self.input) if pos == -1 else pos
+
     def peek(self) -> str:
         """Returns the lookahead character.
 
@@ -74,9 +143,7 @@ class Lexer:
         in the symbol table
         """
 
-        for ix, val in self.symbol_table.items():
-            if val == f'{identifier}, id':
-                return ix
+        return self.symbol_index.get(f'{identifier}, id')
 
     def __check_comment(self) -> str:
         """Evaluates and returns a token corresponding to whether or not
@@ -92,23 +159,25 @@ class Lexer:
         token = ""
         if self.peek() == "$":
             self.__next_char(2)
-            while self.cur_char != "$":
-                self.__next_char()
+            start = self.cur_pos
+            # the '$' that closes the comment, ends the line or is doubled
+            end = self.__find("$", start)
+            while end < len(self.input) - 1 and self.input[end + 1] not in "/\n$":
+                end = self.__find("$", end + 1)
+            self.__skip_to(end)
             if self.peek() == "/":
                 token = "<Comment>"
                 self.__next_char(2)
-            elif self.peek() == "\n":
+            elif self.peek() == "$" and self.input.find("/", self.cur_pos + 1) != -1:
+                self.__skip_to(self.__find("/", self.cur_pos + 1) - 1)
+                token = "<Comment>"
+                self.__next_char(2)
+            else:
+                # no closing '$/' before the end of the line
                 token = "<Invalid Comment>"
                 self.error = "Comment not closed properly!"
-                while self.cur_char != "\n":
-                    self.__next_char()
-            elif self.peek() == "$":
-                while self.peek() != "/":
-                    self.__next_char()
-                if self.peek() == "/":
-                    token = "<Comment>"
-                    self.__next_char(2)
-        elif self.cur_char in arithmetic_op:
+                self.__skip_to(self.__find("\n", min(self.cur_pos, start)))
+        elif self.cur_char in arithmetic_set:
             # if a '/' is encountered, record as arithmetic operator
             token = f'<{self.cur_char}>'
             self.__next_char()
@@ -127,30 +196,32 @@ class Lexer:
         identifier is encountered.
         """
 
-        save_string = ""
         token = ""
-        while self.cur_char in letters or self.cur_char in digits or self.cur_char in underscore:
-            save_string += self.cur_char
-            self.__next_char()
+        save_string = self.__skip_to(identifier_run.match(self.input, self.cur_pos).end())
         if self.cur_char == ".":
             token = "<Invalid Identifier!>"
             self.error = f'{save_string}{self.cur_char} (Invalid Identifier!)'
             self.__next_char()
-        elif self.cur_char not in whitespaces.keys() and self.cur_char not in punctuation \
-                and self.cur_char not in arithmetic_op:
+        elif self.cur_char not in whitespace_set and self.cur_char not in punctuation_set \
+                and self.cur_char not in arithmetic_set:
             token = "<Invalid Identifier!>"
             self.error = f'{save_string} (Invalid Identifier!)'
-        elif save_string in keywords:
+        elif save_string in keyword_set:
             token = f'<keyword, {save_string}>'
-        elif save_string in data_types:
+        elif save_string in data_type_set:
             token = f'<dt, {save_string}>'
         else:
-            if f'{save_string}, id' not in self.symbol_table.values():
-                self.symbol_table[self.symbol_count] = f'{save_string}, id'
+            ix = self.__find_symb_tbl_ix(save_string)
+            if ix is None:
+                entry = f'{save_string}, id'
+                if self.pool is not None:
+                    entry = self.pool.intern(entry)
+                self.symbol_table[self.symbol_count] = entry
+                self.symbol_index[entry] = self.symbol_count
                 token = f'<id, {self.symbol_count}>'
                 self.symbol_count += 1
             else:
-                token = f'<id, {self.__find_symb_tbl_ix(save_string)}>'
+                token = f'<id, {ix}>'
 
         return token
 
@@ -168,58 +239,42 @@ class Lexer:
         """
 
         save_string = ""
-        if self.peek() not in digits and self.peek() != "E":
-            while self.cur_char != "\n":
-                save_string += self.cur_char
-                self.__next_char()
-            return save_string, False
+        if self.peek() not in digit_set and self.peek() != "E":
+            return self.__skip_to(self.__find("\n", self.cur_pos)), False
         else:
             save_string += self.cur_char
             self.__next_char()
-            if self.cur_char in digits:
-                if self.peek() in [punc for punc in punctuation if punc != "."] \
-                        or self.peek() in whitespaces.keys():
+            if self.cur_char in digit_set:
+                if self.peek() in float_end_set:
                     save_string += self.cur_char
                     self.__next_char()
                     return save_string, True
                 if self.peek() == "E":
                     save_string += self.cur_char
                     self.__next_char()
-                    if self.peek() in digits or self.peek() in letters:
-                        while self.cur_char != "\n":
-                            save_string += self.cur_char
-                            self.__next_char()
+                    if self.peek() in digit_set or self.peek() in letter_set:
+                        save_string += self.__skip_to(self.__find("\n", self.cur_pos))
                         return save_string, False
                     else:
                         save_string += self.cur_char
                         self.__next_char()
                         return save_string, True
-                elif self.peek() in digits:
-                    while self.cur_char in digits:
-                        save_string += self.cur_char
-                        self.__next_char()
-                    if self.cur_char in [punc for punc in punctuation if punc != "."] \
-                            or self.cur_char in whitespaces.keys():
+                elif self.peek() in digit_set:
+                    save_string += self.__skip_to(digit_run.match(self.input, self.cur_pos).end())
+                    if self.cur_char in float_end_set:
                         return save_string, True
-                    if self.cur_char not in digits:
+                    if self.cur_char not in digit_set:
                         if self.cur_char == "E":
-                            if self.peek() not in digits:
-                                while self.cur_char not in [punc for punc in punctuation if punc != "."] \
-                                        and self.cur_char not in whitespaces.keys():
-                                    save_string += self.cur_char
-                                    self.__next_char()
+                            if self.peek() not in digit_set:
+                                save_string += self.__skip_to(float_tail_run.match(self.input, self.cur_pos).end())
                                 return save_string, True
-                        while self.cur_char != "\n":
-                            save_string += self.cur_char
-                            self.__next_char()
+                        save_string += self.__skip_to(self.__find("\n", self.cur_pos))
                         return save_string, False
                     if self.peek() == "E":
                         save_string += self.cur_char
                         self.__next_char()
-                        if self.peek() in digits or self.peek() in letters:
-                            while self.cur_char != "\n":
-                                save_string += self.cur_char
-                                self.__next_char()
+                        if self.peek() in digit_set or self.peek() in letter_set:
+                            save_string += self.__skip_to(self.__find("\n", self.cur_pos))
                             return save_string, False
                         else:
                             save_string += self.cur_char
@@ -228,15 +283,10 @@ class Lexer:
                     else:
                         return save_string, True
                 else:
-                    while self.cur_char not in [punc for punc in punctuation if punc != "."] \
-                            and self.cur_char not in whitespaces.keys():
-                        save_string += self.cur_char
-                        self.__next_char()
+                    save_string += self.__skip_to(float_tail_run.match(self.input, self.cur_pos).end())
                     return save_string, False
             else:
-                while self.cur_char != "\n":
-                    save_string += self.cur_char
-                    self.__next_char()
+                save_string += self.__skip_to(self.__find("\n", self.cur_pos))
                 return save_string, False
 
     def __check_digit(self) -> str:
@@ -251,13 +301,12 @@ class Lexer:
 
         save_string = ""
         token = ""
-        if self.peek() in letters:
+        if self.peek() in letter_set:
+            save_string = self.__skip_to(identifier_run.match(self.input, self.cur_pos).end())
             token = "<Unsupported character>"
             self.error = f'{save_string} (Unsupported character found with digit!)'
         else:
-            while self.cur_char in digits:
-                save_string += self.cur_char
-                self.__next_char()
+            save_string = self.__skip_to(digit_run.match(self.input, self.cur_pos).end())
             if self.cur_char == ".":
                 floatString, isFloat = self.__checkFloat()
                 if isFloat:
@@ -281,13 +330,8 @@ class Lexer:
         a string tokenizing the read arithmetic operator or negative numeric value.
         """
 
-        save_string = ""
-        if self.cur_char == "-" and self.peek() in digits:
-            save_string += self.cur_char
-            self.__next_char()
-            while self.cur_char in digits:
-                save_string += self.cur_char
-                self.__next_char()
+        if self.cur_char == "-" and self.peek() in digit_set:
+            save_string = self.__skip_to(digit_run.match(self.input, self.cur_pos + 1).end())
             token = f'<num, {save_string}>'
         else:
             token = f'<{self.cur_char}>'
@@ -349,13 +393,16 @@ class Lexer:
         a string tokenizing the read string literal.
         """
 
-        save_string = ""
         self.__next_char()
-        while self.cur_char != "\"":
-            save_string += self.cur_char
+        end = self.__find("\"", self.cur_pos)
+        if end < len(self.input):
+            save_string = self.__skip_to(end)
+            token = f'<literal, {save_string}>'
             self.__next_char()
-        token = f'<literal, {save_string}>'
-        self.__next_char()
+        else:
+            save_string = self.__skip_to(self.__find("\n", self.cur_pos))
+            token = "<Invalid Literal>"
+            self.error = f'"{save_string} (String literal not closed properly!)'
 
         return token
 
@@ -370,11 +417,7 @@ class Lexer:
         a string tokenizing the read character literal.
         """
 
-        save_string = self.cur_char
-        self.__next_char()
-        while self.cur_char != "'" and self.cur_char != "\n" and self.cur_char not in punctuation:
-            save_string += self.cur_char
-            self.__next_char()
+        save_string = self.__skip_to(char_const_run.match(self.input, self.cur_pos + 1).end())
         if len(save_string) == 1:
             token = f'<char_constant, {save_string}>'
         else:
@@ -428,31 +471,43 @@ class Lexer:
         """
 
         token = ""
+        start = self.cur_pos
         if self.cur_char == "/":
             token = self.__check_comment()
-        elif self.cur_char in letters:
+        elif self.cur_char in letter_set:
             token = self.__check_key_dt_id()
-        elif self.cur_char in digits:
+        elif self.cur_char in digit_set:
             token = self.__check_digit()
-        elif self.cur_char in arithmetic_op:
+        elif self.cur_char in arithmetic_set:
             token = self.__check_arith_op()
         elif self.cur_char in assignment:
             token = self.__check_assign_op()
-        elif self.cur_char in relational_ops_single:
+        elif self.cur_char in relational_ops_single or (self.cur_char == "!" and self.peek() == "="):
             token = self.__check_rel_op()
         elif self.cur_char == "\"":
             token = self.__check_string_literal()
         elif self.cur_char == "'":
             token = self.__check_char_const()
-        elif self.cur_char in punctuation:
+        elif self.cur_char in punctuation_set:
             token = self.__check_punctuation()
-        elif self.cur_char in whitespaces.keys():
+        elif self.cur_char in whitespace_set:
             token = self.__check_whitespaces()
         else:
-            token = self.error = "<Character not recognised!>"
+            token = "<Character not recognised!>"
+            self.error = f'{self.cur_char} (Character not recognised!)'
+            self.__next_char()
+
+        # every scanner is a bounded find or match that stops at the end of the
+        # input, and every token consumes at least one character, so lexing a
+        # line is linear in its length
+        if self.cur_pos == start and self.cur_char != '\0':
+            self.__next_char()
 
         # reset error string for next token
         err_cpy = self.error
         self.error = ""
 
+        if self.pool is not None:
+            token = self.pool.intern(token)
+
         return token, self.symbol_table, self.symbol_count, err_cpy
@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from main import lex_lines
+from parallel_parser import signature, split_functions
+from rd_parser import Parser
+from symbol_table import SymbolTable
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def lex_unit(lines: List[str]) -> Tuple:
+    """Lexes a file and summarizes its interface. Run on a worker process.
+
+    Args:
+    - lines: the lines of the file, as returned by readlines().
+
+    Returns:
+    the token stream, lexical symbol table, lexical errors, tokens for the
+    parser and their lines, as returned by lex_lines(), followed by the
+    interface and the names of every identifier in the file.
+    """
+
+    token_stream, symbol_table, error_stream, token_list, line_numbers = lex_lines(lines)
+
+    starts = split_functions(token_list)
+    interface = []
+    for start, end in zip(starts, starts[1:] + [len(token_list)]):
+        function = signature(token_list[start:end], symbol_table)
+        if function is not None:
+            interface.append(function)
+    names = frozenset(entry.split(", ")[0] for entry in symbol_table.values())
+
+    return token_stream, symbol_table, error_stream, token_list, line_numbers, tuple(interface), names
+
+
+def parse_unit(token_list: List[str], symbol_table: Dict[int, str], line_numbers: List[int],
+               seeds: Tuple[Tuple[str, str], ...]) -> Tuple:
+    """Parses a file against the functions it uses from the other files. Run
+    on a worker process.
+
+    Args:
+    - token_list: the tokens for the parser.
+    - symbol_table: the lexical symbol table.
+    - line_numbers: the line of every token.
+    - seeds: the name and return type of every function the file uses from
+    the other files.
+
+    Returns:
+    the parser trace, parsing errors, semantic errors and the records the
+    file added to the semantic symbol table.
+    """
+
+    parsing_symb_table = SymbolTable()
+    for name, return_type in seeds:
+        parsing_symb_table.enter(name, return_type, 0, 2)
+
+    parser = Parser(token_list, symbol_table, 0, parsing_symb_table, line_numbers=line_numbers)
+    parser_trace, parsing_errors, semantic_errors, semantic_symbol_table = parser.parseToken()
+
+    return parser_trace, parsing_errors, semantic_errors, semantic_symbol_table.table[len(seeds):]
+
+
+class LinkUnit:
+    """A file of a program as last linked: its lexical analysis, its
+    interface, i.e. the name and return type of every function it defines,
+    which is what the parser enters into scope 0 of its semantic symbol
+    table, and the result of its last analysis."""
+
+    def __init__(self, path: str, digest: str, lexed: Tuple) -> None:
+        """Initializes the unit.
+
+        Args:
+        - self: this unit, the one to create. Mandatory object reference.
+        - path: the path of the file.
+        - digest: the digest of the contents of the file.
+        - lexed: the tuple returned by lex_unit().
+
+        Returns:
+        None.
+        """
+
+        self.path = path
+        self.digest = digest
+        self.token_stream, self.symbol_table, self.error_stream, self.token_list, self.line_numbers, \
+            self.interface, self.names = lexed
+        # the functions of the other files the unit was last analyzed against
+        self.seeds = None
+        self.result = None
+
+
+class Linker:
+    """Analyzes the files of a program independently and links them through
+    a global index of the functions every file defines, so that a file may
+    use the functions of the other files.
+
+    Linking is incremental: a file is lexed again only if it changed, and
+    analyzed again only if it changed or a function it uses from another file
+    was added, removed or changed its return type.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        """Initializes the linker.
+
+        Args:
+        - self: this linker, the one to create. Mandatory object reference.
+        - workers: the number of worker processes, defaults to the CPU count.
+
+        Returns:
+        None.
+        """
+
+        self.workers = workers or os.cpu_count() or 1
+        self.units: Dict[str, LinkUnit] = {}
+        # the file defining every function and its return type, by name
+        self.index: Dict[str, Tuple[str, str]] = {}
+        self.link_errors: List[str] = []
+        # the files lexed and analyzed again by the last link
+        self.lexed: List[str] = []
+        self.analyzed: List[str] = []
+
+    def __run(self, function: Callable, jobs: List[Tuple]) -> List:
+        """Runs jobs on a process pool, or in this process if there is only
+        one job or one worker, so that small edits do not pay for starting a
+        pool.
+
+        Args:
+        - self: mandatory object reference.
+        - function: the function to run.
+        - jobs: the arguments of every call.
+
+        Returns:
+        the results, in order.
+        """
+
+        if len(jobs) <= 1 or self.workers == 1:
+            return [function(*job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+            return list(pool.map(function, *zip(*jobs)))
+
+    def __build_index(self) -> None:
+        """Merges the interfaces of every file into the global index, in the
+        order the files were given. A function defined by more than one file
+        is a link error and resolves to its first definition.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        self.index = {}
+        self.link_errors = []
+        for unit in self.units.values():
+            for name, return_type in unit.interface:
+                defined = self.index.get(name)
+                if defined is None:
+                    self.index[name] = (unit.path, return_type)
+                elif defined[0] != unit.path:
+                    self.link_errors.append(f'Function {name} of {unit.path} is already defined in {defined[0]}')
+
+    def link(self, sources: Dict[str, List[str]]) -> Dict[str, Tuple]:
+        """Links the files of a program, analyzing again only what changed
+        since the last link.
+
+        Args:
+        - self: mandatory object reference.
+        - sources: the lines of every file of the program, by path. Files
+        linked before and missing now are dropped.
+
+        Returns:
+        the analysis of every file, by path, as the tuple returned by
+        analyze(). Uses of the functions of the other files resolve through
+        the global index.
+        """
+
+        units = {}
+        changed = []
+        for path, lines in sources.items():
+            digest = hashlib.blake2b("".join(lines).encode("utf-8"), digest_size=16).hexdigest()
+            unit = self.units.get(path)
+            if unit is not None and unit.digest == digest:
+                units[path] = unit
+            else:
+                units[path] = None
+                changed.append((path, digest, lines))
+
+        lexed = self.__run(lex_unit, [(lines,) for _, _, lines in changed])
+        for (path, digest, _), unit_lexed in zip(changed, lexed):
+            units[path] = LinkUnit(path, digest, unit_lexed)
+        self.units = units
+        self.lexed = [path for path, _, _ in changed]
+        self.__build_index()
+
+        stale = []
+        for unit in self.units.values():
+            own = {name for name, _ in unit.interface}
+            seeds = tuple((name, self.index[name][1]) for name in sorted(unit.names)
+                          if name in self.index and name not in own)
+            if unit.result is None or seeds != unit.seeds:
+                # dropped first, so a failed analysis is retried by the next link
+                unit.seeds = seeds
+                unit.result = None
+                stale.append(unit)
+
+        parsed = self.__run(parse_unit, [(unit.token_list, unit.symbol_table, unit.line_numbers, unit.seeds)
+                                         for unit in stale])
+        for unit, (parser_trace, parsing_errors, semantic_errors, records) in zip(stale, parsed):
+            semantic_symbol_table = SymbolTable()
+            semantic_symbol_table.table.extend(records)
+            unit.result = (unit.token_stream, unit.symbol_table, unit.error_stream, parser_trace, parsing_errors,
+                           semantic_errors, semantic_symbol_table)
+        self.analyzed = [unit.path for unit in stale]
+
+        return {path: unit.result for path, unit in self.units.items()}
+
+    def users(self, name: str) -> List[str]:
+        """Finds the files using a function defined in another file.
+
+        Args:
+        - self: mandatory object reference.
+        - name: the name of the function.
+
+        Returns:
+        the paths of the files.
+        """
+
+        return [unit.path for unit in self.units.values() if any(seed[0] == name for seed in unit.seeds or ())]
+
+
+def read_sources(paths: List[str]) -> Dict[str, List[str]]:
+    """Reads the files of a program.
+
+    Args:
+    - paths: the paths of the files.
+
+    Returns:
+    the lines of every file, by path.
+    """
+
+    sources = {}
+    for path in paths:
+        with open(path) as source:
+            sources[path] = source.readlines()
+    return sources
+
+
+# driver code
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Links the files of a TUPLE program and times relinking "
+                                                     "after editing one of them.")
+    arg_parser.add_argument("sources", nargs="+", help="the files of the program")
+    arg_parser.add_argument("--workers", type=int, default=None)
+    args = arg_parser.parse_args()
+
+    program = read_sources(args.sources)
+    linker = Linker(args.workers)
+
+    def timed_link(title: str) -> None:
+        start = time.perf_counter()
+        results = linker.link(program)
+        seconds = time.perf_counter() - start
+        errors = sum(len(errs) for result in results.values() for errs in result[5].values())
+        print(f'{title:<24} {seconds * 1000:10.2f} ms  lexed {len(linker.lexed):4d}  '
+              f'analyzed {len(linker.analyzed):4d}  semantic errors {errors}')
+
+    timed_link("first link")
+    for link_error in linker.link_errors:
+        print(link_error)
+    timed_link("nothing changed")
+
+    # a body edit, a blank line, only analyzes the edited file again
+    edited = args.sources[-1]
+    program[edited] = program[edited] + ["\n"]
+    timed_link("body edit")
+
+    # an interface edit also analyzes the files using the edited functions
+    edited = next((unit.path for unit in linker.units.values() if unit.interface), None)
+    if edited is not None:
+        name, return_type = linker.units[edited].interface[0]
+        lines = list(program[edited])
+        ix = next(ix for ix, line in enumerate(lines) if name in line)
+        lines[ix] = lines[ix].replace(return_type, "char" if return_type != "char" else "int", 1)
+        program[edited] = lines
+        timed_link("interface edit")
+        print(f'{name} is used by {", ".join(linker.users(name)) or "no other file"}')
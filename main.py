@@ -2,7 +2,14 @@ import os
 from lexer import *
 from rd_parser import *
 from symbol_table import *
-from typing import List, Dict, Tuple
+from error_budget import *
+from stream_format import *
+from intern_pool import InternPool
+from typing import TYPE_CHECKING, Callable, List, Dict, TextIO, Tuple
+
+if TYPE_CHECKING:
+    # only the callers running the semantic checks as passes import them
+    from semantic_passes import PassManager
 
 
 def get_abs_file_path(path) -> str:
@@ -20,13 +27,42 @@ def get_abs_file_path(path) -> str:
     return os.path.join(script_dir, path)
 
 
-def write_token_stream(token_stream: Dict[int, str], file_num: int) -> None:
+def dump_token_stream(token_stream: Dict[int, str], stream: TextIO, compact: bool = False) -> None:
+    """Writes the token stream from the lexical analysis to an open stream,
+    one line of tokens per line. The compact format starts with a header
+    line, by which read_token_stream() knows it.
+
+    Args:
+    - token_stream: all the tokenized lexemes, a CompactTokenStream if they
+    are in the compact format.
+    - stream: the stream to write to.
+    - compact: write repeated whitespace tokens run-length encoded instead
+    of in the verbose format.
+
+    Returns:
+    None.
+    """
+
+    lines = token_stream.values()
+    if compact:
+        stream.write(compact_header + '\n')
+        if not isinstance(token_stream, CompactTokenStream):
+            lines = map(compact_tokens, lines)
+    elif isinstance(token_stream, CompactTokenStream):
+        lines = map(expand_tokens, lines)
+    stream.write('\n'.join(lines))
+
+
+def write_token_stream(token_stream: Dict[int, str], file_num: int, compact: bool = False) -> None:
     """Writes the generated token stream from the lexical analysis to a file
     of the same name as the input file with the .out extension.
 
     Args:
-    - token_stream: all the tokenized lexemes.
+    - token_stream: all the tokenized lexemes, a CompactTokenStream if they
+    are in the compact format.
     - file_num: the test number of the file that was read.
+    - compact: write repeated whitespace tokens run-length encoded instead
+    of in the verbose format.
 
     Returns:
     None.
@@ -37,8 +73,23 @@ def write_token_stream(token_stream: Dict[int, str], file_num: int) -> None:
     
     # write the file
     with open(abs_file_path, "w") as stream:
-        # the entire stream is written in a single line
-        stream.write('\n'.join(token_stream.values()))
+        dump_token_stream(token_stream, stream, compact)
+
+
+def dump_symb_tbl(symbol_table: Dict[int, str], stream: TextIO) -> None:
+    """Writes the symbol table from the lexical analysis to an open stream.
+
+    Args:
+    - symbol_table: all recorded entries in the symbol table.
+    - stream: the stream to write to.
+
+    Returns:
+    None.
+    """
+
+    stream.write("{:<8} {:<15}\n".format('Key', 'Symbol'))
+    for ix, entry in symbol_table.items():
+        stream.write("{:<8} {:<15}\n".format(ix, entry))
 
 
 def write_symb_tbl(symbol_table: Dict[int, str], file_num: int) -> None:
@@ -58,9 +109,22 @@ def write_symb_tbl(symbol_table: Dict[int, str], file_num: int) -> None:
     
     # write the file
     with open(abs_file_path, "w") as table:
-        table.write("{:<8} {:<15}\n".format('Key', 'Symbol'))
-        for ix, entry in symbol_table.items():
-            table.write("{:<8} {:<15}\n".format(ix, entry))
+        dump_symb_tbl(symbol_table, table)
+
+def dump_semantic_symb_tbl(symbol_tabl: List, stream: TextIO) -> None:
+    ''' Writes the semantic symbol table to an open stream.
+
+    Args:
+    - symbol_table: all recorded entries in the symbol table.
+    - stream: the stream to write to.
+
+    Returns:
+    None.
+    '''
+
+    stream.write("{:<8} {:<15} {:<15} {:<15}\n".format('Name', 'Return Type', 'Scope', 'Size'))
+    for entry in symbol_tabl:
+        stream.write("{:<8} {:<15} {:<15} {:<15}\n".format(entry.name, entry.return_type, entry.scope, entry.size))
 
 def write_semantic_symb_tbl(symbol_tabl: List, file_num: int) -> None:
     ''' Writes the semantic symbol table to a file of the same name as the input
@@ -79,9 +143,26 @@ def write_semantic_symb_tbl(symbol_tabl: List, file_num: int) -> None:
 
     # write the file
     with open(abs_file_path, "w") as table:
-        table.write("{:<8} {:<15} {:<15} {:<15}\n".format('Name', 'Return Type', 'Scope', 'Size'))
-        for entry in symbol_tabl.table:
-            table.write("{:<8} {:<15} {:<15} {:<15}\n".format(entry.name, entry.return_type, entry.scope, entry.size))
+        dump_semantic_symb_tbl(symbol_tabl, table)
+
+def dump_error_stream(error_stream: Dict[int, List[str]], stream: TextIO, error_type: str, header: bool) -> None:
+    """Writes the errors of a phase of the analysis to an open stream.
+
+    Args:
+    - error_stream: all errors recorded during the phase.
+    - stream: the stream to write to.
+    - error_type: the phase, written alongside every error.
+    - header: write the column titles first.
+
+    Returns:
+    None.
+    """
+
+    if header:
+        stream.write("{:<8} {:<50} {:<80}\n".format('<line#>', '<error_found>', '<error_type>'))
+    for line, errors in error_stream.items():
+        for err in errors:
+            stream.write("{:<8} {:<50} {:<80}\n".format(line + 1, err, error_type))
 
 def write_error_stream(error_stream: Dict[int, List[str]], file_num: int, error_type: str, count: int) -> None:
     """Writes the error stream generated from the lexical analysis to a file
@@ -107,15 +188,12 @@ def write_error_stream(error_stream: Dict[int, List[str]], file_num: int, error_
     
     # write the file
     with open(abs_file_path, mode) as error:
-        if mode == "w":
-            error.write("{:<8} {:<50} {:<80}\n".format('<line#>', '<error_found>', '<error_type>'))
-        for line, errors in error_stream.items():
-            for err in errors:
-                error.write("{:<8} {:<50} {:<80}\n".format(line + 1, err, error_type))
+        dump_error_stream(error_stream, error, error_type, mode == "w")
 
 def tokenize(lexer: Lexer, symbol_table: Dict[int, str], symbol_count: int,
              error_stream: Dict[int, List[str]], token_stream: Dict[int, str],
-             line_num: int, token_list: List[str]) -> Tuple[int, Dict[int, str]]:
+             line_num: int, token_list: List[str], budget: ErrorBudget = None,
+             line_numbers: List[int] = None) -> Tuple[int, Dict[int, str]]:
     """Tokenizes the given portion of the input stream - the line being
     read.
 
@@ -129,6 +207,9 @@ def tokenize(lexer: Lexer, symbol_table: Dict[int, str], symbol_count: int,
     - token_stream: a dictionary recording the tokenized lexemes (by line).
     - line_num: the number of the line/portion of the input stream that is
     being processed.
+    - budget: the error budget of the analysis, if any.
+    - line_numbers: the line of every token in the token list. If given,
+    trivia is kept out of the token list and only goes to the token stream.
 
     Returns:
     updated values for the symbol count and table.
@@ -157,12 +238,33 @@ def tokenize(lexer: Lexer, symbol_table: Dict[int, str], symbol_count: int,
                 error_stream[line_num].append(error)
             except KeyError:
                 error_stream[line_num] = [error]
+            if budget is not None:
+                budget.record("Lexical")
 
-        token_list.append(token)
+        # whitespace and comments only go to the token stream
+        if line_numbers is None:
+            token_list.append(token)
+        elif parser_token(token):
+            token_list.append(token)
+            line_numbers.append(line_num)
 
     return symbol_count, symbol_table, token_list
 
 
+def dump_parser_trace(parser_stream: List[str], stream: TextIO) -> None:
+    """Writes the parser trace to an open stream.
+
+    Args:
+    - parser_stream: the trace of the parser.
+    - stream: the stream to write to.
+
+    Returns:
+    None.
+    """
+
+    stream.write('\n'.join(parser_stream))
+
+
 def write_parser_trace(parser_stream: List[str], file_num: int) -> None:
     """Writes the parser trace to a file.
 
@@ -178,7 +280,171 @@ def write_parser_trace(parser_stream: List[str], file_num: int) -> None:
     
     # write the file
     with open(abs_file_path, "w") as trace:
-        trace.write('\n'.join(parser_stream))
+        dump_parser_trace(parser_stream, trace)
+
+
+def lex_lines(lines: List[str], budget: ErrorBudget = None, compact: bool = False,
+              sink: Callable[[List[str], List[int], Dict[int, str]], None] = None, pool: InternPool = None) \
+        -> Tuple[Dict[int, str], Dict[int, str], Dict[int, List[str]], List[str], List[int]]:
+    """Runs the lexical analysis over the given lines of source text, one
+    lexer per line, threading the symbol table through all of them.
+
+    Whitespace and comments only go to the token stream; the token list
+    holds the tokens the parser needs, each with its line alongside.
+
+    Args:
+    - lines: the lines of the input stream, as returned by readlines().
+    - budget: the error budget of the analysis. Lexing stops once the
+    lexical errors use it up.
+    - compact: keep the token stream with repeated whitespace tokens
+    run-length encoded.
+    - sink: called with the tokens for the parser, their lines and the
+    symbol table after every line, e.g. to feed a parser running
+    concurrently. The tokens are then not collected in the returned list.
+    - pool: the interning pool to take the tokens and symbol table entries
+    from, if any.
+
+    Returns:
+    a tuple of the token stream (by line), the symbol table, the error stream
+    (by line), the list of tokens for the parser and the line of each of them.
+    """
+
+    # initialize all streams
+    symbol_count = 1
+    symbol_table = {}
+    error_stream = {}
+    token_stream = CompactTokenStream() if compact else {}
+    token_list = []
+    line_numbers = []
+    symbol_index = {}
+
+    # pass the input stream line by line
+    for i in range(len(lines)):
+        # initialize Lexer for the given portion of the stream
+        lexer = Lexer(lines[i], symbol_table, symbol_count, symbol_index, pool)
+
+        # tokenize the line
+        try:
+            symbol_count, symbol_table, token_list = tokenize(lexer, symbol_table, symbol_count, error_stream,
+                                                              token_stream, i, token_list, budget, line_numbers)
+        except ErrorBudgetExceeded as exceeded:
+            error_stream[i].append(str(exceeded))
+            break
+        finally:
+            # run-length encode the whitespace of the line once it is complete
+            if compact and i in token_stream:
+                token_stream[i] = compact_tokens(token_stream[i])
+            if sink is not None:
+                sink(token_list, line_numbers, symbol_table)
+                token_list = []
+                line_numbers = []
+
+    return token_stream, symbol_table, error_stream, token_list, line_numbers
+
+
+def parser_token(token: str) -> bool:
+    """Checks if a token is passed on to the parser. Whitespace and comments
+    are not, nor are the tokens of lexical errors, e.g. an unclosed comment
+    or string literal or a character outside the alphabet, as the lexer
+    already reports them.
+
+    Args:
+    - token: the token.
+
+    Returns:
+    True if the parser needs the token.
+    """
+
+    return token not in trivia and token not in error_tokens and token[:8] != "<Invalid"
+
+
+def filter_tokens(token_list: List[str]) -> List[str]:
+    """Removes the tokens that are not required by the parser, i.e., comments,
+    tabs, blanks and invalid tokens, from a full token list. Newlines are kept
+    for the parser to count lines by.
+
+    Args:
+    - token_list: the flat list of every token generated by the lexer.
+
+    Returns:
+    the tokens to be passed to the parser.
+    """
+
+    return [token for token in token_list
+            if token == "<newline>" or parser_token(token)]
+
+
+def parse_tokens(token_list: List[str], symbol_table: Dict[int, str], budget: ErrorBudget = None,
+                 line_numbers: List[int] = None, passes: "PassManager" = None, pool: InternPool = None) -> Tuple:
+    """Runs the syntax and semantic analysis over the tokens generated by the
+    lexer.
+
+    Args:
+    - token_list: the tokens for the parser, as returned by lex_lines(), or
+    a full token list if no line numbers are given.
+    - symbol_table: the lexical symbol table.
+    - budget: the error budget of the analysis, if any.
+    - line_numbers: the line of every token in the token list.
+    - passes: run the semantic checks as separate passes after parsing
+    instead of while parsing. With every check disabled only the syntax is
+    checked.
+    - pool: the interning pool to take the identifier names and the records
+    of the semantic symbol table from, if any.
+
+    Returns:
+    a tuple of the parser trace, parsing errors, semantic errors and the
+    semantic symbol table.
+    """
+
+    if line_numbers is None:
+        token_list = filter_tokens(token_list)
+
+    if passes is not None:
+        parser = Parser(token_list, symbol_table, budget=budget, line_numbers=line_numbers, build_tree=True,
+                        semantic=False, pool=pool)
+        parser.parseToken()
+        return passes.run(parser, budget)
+
+    # pass the token list to the parser
+    parser = Parser(token_list, symbol_table, budget=budget, line_numbers=line_numbers, pool=pool)
+
+    # obtain the parser trace and list of errors from the parser class after parsing all tokens
+    return parser.parseToken()
+
+
+def analyze(lines: List[str], budget: ErrorBudget = None, compact: bool = False,
+            passes: "PassManager" = None, pool: InternPool = None) -> Tuple:
+    """Runs the lexical, syntax and semantic analysis over the given lines
+    of source text entirely in memory.
+
+    Args:
+    - lines: the lines of the input stream, as returned by readlines().
+    - budget: the maximum number of errors per phase. The analysis stops
+    with a summary error once any phase uses up its budget.
+    - compact: keep the token stream with repeated whitespace tokens
+    run-length encoded.
+    - passes: run the semantic checks as separate passes, as for
+    parse_tokens().
+    - pool: the interning pool shared by the lexer, the parser and the
+    symbol tables. A batch of analyses may share one; by default every
+    analysis creates its own.
+
+    Returns:
+    a tuple of the token stream, lexical symbol table, lexical errors, parser
+    trace, parsing errors, semantic errors and the semantic symbol table.
+    """
+
+    if pool is None:
+        pool = InternPool()
+    token_stream, symbol_table, error_stream, token_list, line_numbers = lex_lines(lines, budget, compact, pool=pool)
+    if budget is not None and budget.exceeded is not None:
+        return token_stream, symbol_table, error_stream, [], {}, {}, SymbolTable()
+
+    parser_trace, parsing_errors, semantic_errors, semantic_symbol_table = \
+        parse_tokens(token_list, symbol_table, budget, line_numbers, passes, pool)
+
+    return token_stream, symbol_table, error_stream, parser_trace, parsing_errors, \
+        semantic_errors, semantic_symbol_table
 
 
 def main() -> None:
@@ -206,21 +472,9 @@ def main() -> None:
     with open(abs_file_path) as custom_test:
         lines = custom_test.readlines()
 
-    # initialize all streams
-    symbol_count = 1
-    symbol_table = {}
-    error_stream = {}
-    token_stream = {}
-    token_list = []
-
-    # pass the input stream line by line
-    for i in range(len(lines)):
-        # initialize Lexer for the given portion of the stream
-        lexer = Lexer(lines[i], symbol_table, symbol_count)
-
-        # tokenize the line
-        symbol_count, symbol_table, token_list = tokenize(lexer, symbol_table, symbol_count,
-                                              error_stream, token_stream, i, token_list)
+    # run all phases of the analysis
+    token_stream, symbol_table, error_stream, parser_trace, parsing_errors, semantic_errors, \
+        semantic_symbol_table = analyze(lines)
 
     # output the token stream to file
     write_token_stream(token_stream, file_num)
@@ -231,18 +485,6 @@ def main() -> None:
     # output the error stream
     write_error_stream(error_stream, file_num, "Lexical", 1)
 
-    # unwantd tokens for the parser
-    unwanted_tokens = {'<Comment>', '<tab>', '<blank>', '<Invalid Identifier!>', '<Invalid char constant!, \'a>'}
-
-    # remove all unrequired tokens by the parser
-    token_list = [token for token in token_list if token not in unwanted_tokens and token[:9] != '<Invalid']
-
-    # pass the token list to the parser
-    parser = Parser(token_list, symbol_table)
-    
-    # obtain the parser trace and list of errors from the parser class after parsing all tokens
-    parser_trace, parsing_errors, semantic_errors, semantic_symbol_table = parser.parseToken()
-
     # output the parser trace
     write_parser_trace(parser_trace, file_num)
 
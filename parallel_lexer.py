@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from incremental import LexedSource
+from main import parser_token
+from typing import Dict, List, Optional, Tuple
+
+
+def lex_chunk(lines: List[str]) -> Tuple[List[List[str]], List[List[str]], Dict[int, str]]:
+    """Lexes a chunk of lines against a chunk-local symbol table. Run on a
+    worker process.
+
+    Args:
+    - lines: the lines of the chunk.
+
+    Returns:
+    the tokens and errors of every line and the chunk-local symbol table.
+    """
+
+    lexed = LexedSource(lines)
+
+    # repeated tokens share one object so that pickling the result back to
+    # the parent sends every distinct token only once
+    seen = {}
+    line_tokens = [[seen.setdefault(token, token) for token in tokens] for tokens in lexed.line_tokens]
+
+    return line_tokens, lexed.line_errors, lexed.symbol_table
+
+
+def lex_parallel(lines: List[str], workers: Optional[int] = None, chunk_size: Optional[int] = None) \
+        -> Tuple[Dict[int, str], Dict[int, str], Dict[int, List[str]], List[str], List[int]]:
+    """Lexes the given lines in line-aligned chunks on a process pool. The
+    chunk-local identifier ids are renumbered afterwards so that the output
+    is identical to that of a sequential run.
+
+    Ids are handed out by first occurrence. A chunk-local table is itself in
+    order of first occurrence within the chunk, so walking the chunks in
+    order and giving every entry not seen in an earlier chunk the next free
+    id reproduces the sequential numbering.
+
+    Args:
+    - lines: the lines of the input stream, as returned by readlines().
+    - workers: the number of worker processes, defaults to the CPU count.
+    - chunk_size: the number of lines per chunk, defaults to an even split
+    over the workers.
+
+    Returns:
+    a tuple of the token stream (by line), the symbol table, the error stream
+    (by line), the list of tokens for the parser and the line of each of them.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-len(lines) // workers))
+    chunks = [lines[i:i + chunk_size] for i in range(0, len(lines), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lex_chunk, chunks))
+
+    # initialize all streams
+    symbol_table = {}
+    symbol_index = {}
+    error_stream = {}
+    token_stream = {}
+    token_list = []
+    line_numbers = []
+
+    line_num = 0
+    for line_tokens, line_errors, local_table in results:
+        # map every chunk-local id to its global id
+        remap = {}
+        for local_ix, entry in local_table.items():
+            if entry not in symbol_index:
+                symbol_index[entry] = len(symbol_index) + 1
+                symbol_table[symbol_index[entry]] = entry
+            if symbol_index[entry] != local_ix:
+                remap[f'<id, {local_ix}>'] = f'<id, {symbol_index[entry]}>'
+
+        for tokens, errors in zip(line_tokens, line_errors):
+            if remap:
+                tokens = [remap.get(token, token) for token in tokens]
+            if tokens:
+                token_stream[line_num] = ''.join(tokens)
+                for token in tokens:
+                    if parser_token(token):
+                        token_list.append(token)
+                        line_numbers.append(line_num)
+            if errors:
+                error_stream[line_num] = errors
+            line_num += 1
+
+    return token_stream, symbol_table, error_stream, token_list, line_numbers
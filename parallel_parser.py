@@ -0,0 +1,172 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from rd_parser import *
+from typing import Dict, List, Optional, Tuple
+
+# the lexical symbol table shared by the functions parsed on a worker
+worker_symbol_table = {}
+
+
+def init_worker(symbol_table: Dict[int, str]) -> None:
+    """Worker initializer. Stores the lexical symbol table once per worker
+    instead of sending it along with every function.
+
+    Args:
+    - symbol_table: the lexical symbol table.
+
+    Returns:
+    None.
+    """
+
+    global worker_symbol_table
+    worker_symbol_table = symbol_table
+
+
+def split_functions(token_list: List[str]) -> List[int]:
+    """Finds where every top-level function definition starts: at a data
+    type following the brace that closes the previous definition. Anything
+    before the first definition stays with it. The braces are counted as
+    written, so the starts only hold up to the first definition with a parse
+    error, whose recovery may skip braces.
+
+    Args:
+    - token_list: the tokens passed to the parser.
+
+    Returns:
+    the index of the first token of every function definition.
+    """
+
+    starts = [0]
+    depth = 0
+    closed = False
+    for ix, token in enumerate(token_list):
+        if token == "<punctuator, {>":
+            depth += 1
+        elif token == "<punctuator, }>":
+            depth -= 1
+            closed = closed or depth == 0
+        elif closed and depth == 0 and token.startswith("<dt"):
+            starts.append(ix)
+            closed = False
+
+    return starts
+
+
+def signature(tokens: List[str], symbol_table: Dict[int, str]) -> Optional[Tuple[str, str]]:
+    """Reads the name and return type of a function definition.
+
+    Args:
+    - tokens: the tokens of the function definition.
+    - symbol_table: the lexical symbol table.
+
+    Returns:
+    the name and return type of the function, or None if the definition does
+    not start with a data type and an identifier.
+    """
+
+    significant = [token for token in tokens[:8] if token != "<newline>"]
+    if len(significant) < 2 or not significant[0].startswith("<dt, ") or not significant[1].startswith("<id, "):
+        return None
+
+    return_type = significant[0][5:-1]
+    name = symbol_table[int(significant[1][5:-1])].split(", ")[0]
+    return name, return_type
+
+
+def parse_function(tokens: List[str], line_count: int, seeds: List[Tuple[str, str]],
+                   line_numbers: Optional[List[int]] = None) -> Tuple:
+    """Parses a single function definition. Run on a worker process.
+
+    Args:
+    - tokens: the tokens of the function definition.
+    - line_count: the line the function starts on.
+    - seeds: the name and return type of every earlier function.
+    - line_numbers: the line of every token, if the tokens hold no newlines.
+
+    Returns:
+    the parser trace, parsing errors, semantic errors and the records the
+    function added to the semantic symbol table.
+    """
+
+    parsing_symb_table = SymbolTable()
+    for name, return_type in seeds:
+        parsing_symb_table.enter(name, return_type, 0, 2)
+
+    parser = Parser(tokens, worker_symbol_table, line_count, parsing_symb_table, line_numbers=line_numbers)
+    parser_trace, parsing_errors, semantic_errors, semantic_symbol_table = parser.parseToken()
+
+    return parser_trace, parsing_errors, semantic_errors, semantic_symbol_table.table[len(seeds):]
+
+
+def parse_parallel(token_list: List[str], symbol_table: Dict[int, str], workers: Optional[int] = None,
+                   line_numbers: Optional[List[int]] = None) -> Tuple:
+    """Parses every top-level function definition independently on a process
+    pool and merges the results in source order.
+
+    Each function is parsed against the signatures of the functions before
+    it, which is what a sequential parse has in scope at that point. The
+    definitions are only known to be where a sequential parse finds them up
+    to the first one with a parse error, so the rest of the tokens from that
+    one on are parsed again as a whole. The result equals a sequential parse.
+
+    Args:
+    - token_list: the tokens passed to the parser.
+    - symbol_table: the lexical symbol table.
+    - workers: the number of worker processes, defaults to the CPU count.
+    - line_numbers: the line of every token, as returned by lex_lines(). If
+    not given, the token list holds newline tokens to count lines by.
+
+    Returns:
+    a tuple of the parser trace, parsing errors, semantic errors and the
+    semantic symbol table, as returned by Parser.parseToken().
+    """
+
+    starts = split_functions(token_list)
+    bounds = list(zip(starts, starts[1:] + [len(token_list)]))
+
+    # collect the signatures and starting lines before parsing any body
+    jobs = []
+    seeds = []
+    line_count = 0
+    for start, end in bounds:
+        tokens = token_list[start:end]
+        if line_numbers is None:
+            jobs.append((tokens, line_count, list(seeds), None))
+            line_count += tokens.count("<newline>")
+        else:
+            jobs.append((tokens, line_numbers[start], list(seeds), line_numbers[start:end]))
+        function = signature(tokens, symbol_table)
+        if function is not None:
+            seeds.append(function)
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=init_worker,
+                             initargs=(symbol_table,)) as pool:
+        results = list(pool.map(parse_function, *zip(*jobs)))
+        # the recovery from a parse error may skip the braces the functions
+        # were split at, so the rest is parsed as one after the first error
+        failed = next((ix for ix, result in enumerate(results) if result[1]), None)
+        if failed is not None and failed < len(jobs) - 1:
+            start = bounds[failed][0]
+            _, line_count, function_seeds, lines = jobs[failed]
+            rest = pool.submit(parse_function, token_list[start:], line_count, function_seeds,
+                               None if lines is None else line_numbers[start:])
+            results[failed:] = [rest.result()]
+
+    # merge the results in source order
+    parser_trace = []
+    parsing_errors = {}
+    semantic_errors = {}
+    semantic_symbol_table = SymbolTable()
+    for ix, (trace, errors, sem_errors, records) in enumerate(results):
+        # a single trace opens with the initial scope and closes with EOF
+        if ix > 0:
+            trace = trace[1:]
+        if ix < len(results) - 1 and trace and trace[-1] == "EOF":
+            trace = trace[:-1]
+        parser_trace.extend(trace)
+        for merged, partial in ((parsing_errors, errors), (semantic_errors, sem_errors)):
+            for line, errs in partial.items():
+                merged.setdefault(line, []).extend(errs)
+        semantic_symbol_table.table.extend(records)
+
+    return parser_trace, parsing_errors, semantic_errors, semantic_symbol_table
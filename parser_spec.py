@@ -1,41 +1,19 @@
-# the grammar specification for TUPLE
+# the grammar specification for TUPLE, compiled from tuple.grammar by
+# grammar_compiler.py into parser_tables.marshal
+from grammar_compiler import load_tables
 
-firstSet = {"program":{"<dt"},
-        "paramList":{"<dt"},
-        "pList":{",>", "epsilon"},
-        "stmts":{"<dt", "<id", "for>", "if>", "return>", "epsilon"},
-        "stmtsPrime":{"<dt", "<id", "for>", "if>", "return>", "epsilon"},
-        "decStmts":{"<dt"},
-        "list":{",>"},
-        "optionalAssign":{"=>"},
-        "assignStmt":{"<id"},
-        "expr":{"(>", "<id"},
-        "ePrime":{"+>", "epsilon"},
-        "t":{"(>", "<id"},
-        "tPrime":{"*>", "epsilon"},
-        "f":{"(>", "<id"},
-        "forStmt":{"for>"},
-        "type":{"<dt", "epsilon"},
-        "ifStmt":{"if>"},
-        "optionalElse":{"else>"},
-        "returnStmt":{"return>"}}
+parser_tables = load_tables()
 
-followSet = {"program":{"<$>"},
-        "paramList":{")>"},
-        "pList":{")>"},
-        "stmts":{"}>"},
-        "stmtsPrime":{"}>"},
-        "decStmts":{"<dt", "<id", "for>", "if>", "return>", "}>"},
-        "list":{"<dt", "<id", "for>", "if>", "return>", "}>"},
-        "optionalAssign":{",>", "<dt", "<id", "for>", "if>", "return>", "}>"},
-        "assignStmt":{"<dt", "<id", "for>", "if>", "return>", "}>"},
-        "expr":{";>", ")>", "<rel_op"},
-        "ePrime":{";>", ")>", "<rel_op"},
-        "t":{"+>", ";>", ")>", "<rel_op"},
-        "tPrime":{"+>", ";>", ")>", "<rel_op"},
-        "f":{"*>", "+>", ";>", ")>", "<rel_op"},
-        "forStmt":{"<dt", "<id", "for>", "if>", "return>", "}>"},
-        "type":{"<id"},
-        "ifStmt":{"<dt", "<id", "for>", "if>", "return>", "}>"},
-        "optionalElse":{"<dt", "<id", "for>", "if>", "return>", "}>"},
-        "returnStmt":{",>", "<dt", "<id", "for>", "if>", "return>", "}>"}}
\ No newline at end of file
+firstSet = parser_tables["first"]
+followSet = parser_tables["follow"]
+
+# the punctuators every production can resynchronize on after an error
+syncSet = parser_tables["sync"]
+
+# the tokens the panic recovery of every production resynchronizes on: the
+# ones that may follow the production and the synchronizing punctuators
+recoverySet = {nonterminal: follow | syncSet for nonterminal, follow in followSet.items()}
+
+# the production to expand every nonterminal by on every lookahead token
+predictTable = parser_tables["predict"]
+productions = parser_tables["productions"]
@@ -0,0 +1,373 @@
+import argparse
+import multiprocessing
+import queue
+import threading
+import time
+from main import *
+from typing import Dict, List, Optional, Tuple
+
+
+def new_entries(symbol_table: Dict[int, str], sent: int) -> Dict[int, str]:
+    """Returns the entries added to a symbol table since it had the given
+    number of entries. Keys are handed out in order, starting at 1.
+
+    Args:
+    - symbol_table: the lexical symbol table.
+    - sent: the number of entries already sent.
+
+    Returns:
+    the new entries.
+    """
+
+    return {ix: symbol_table[ix] for ix in range(sent + 1, len(symbol_table) + 1)}
+
+
+def lexing_stopped(budget: Optional[ErrorBudget]) -> Optional[ErrorBudgetExceeded]:
+    """Checks if the lexer stopped early because the lexical errors used up
+    their budget.
+
+    Args:
+    - budget: the error budget of the analysis, if any.
+
+    Returns:
+    the error that stopped the lexer, or None if it lexed every line.
+    """
+
+    limit = None if budget is None else budget.limits["Lexical"]
+    if limit is not None and budget.counts["Lexical"] >= limit:
+        return ErrorBudgetExceeded("Lexical", limit)
+    return None
+
+
+class TokenPipe:
+    """A bounded queue of tokens between a lexer producing them and a parser
+    consuming them concurrently.
+
+    The lexer puts the tokens of every line as one chunk, blocking while
+    'maxsize' chunks wait to be consumed. The parser reads the tokens and
+    their lines through the 'tokens' and 'lines' streams, which index like
+    lists: reading a token that has not been lexed yet blocks until it is,
+    and reading past the last token raises IndexError once the lexer is done.
+
+    Every chunk carries the symbol table entries added along with its tokens,
+    which are copied to 'symbol_table' as the chunk is consumed, so the parser
+    knows every identifier it reads without sharing the lexer's table.
+
+    The parser never looks back more than a token, so tokens behind that are
+    dropped as it advances.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """Initializes the pipe.
+
+        Args:
+        - self: this pipe, the one to create. Mandatory object reference.
+        - maxsize: the number of chunks that may wait to be consumed.
+
+        Returns:
+        None.
+        """
+
+        self.chunks = queue.Queue(maxsize)
+        self.detached = False
+        self.sent = 0
+        # consumer side: the symbol table and the tokens from position 'base' on
+        self.symbol_table = {}
+        self.finished = False
+        self.error = None
+        self.base = 0
+        self.buffer = ([], [])
+        self.tokens = PipeStream(self, 0)
+        self.lines = PipeStream(self, 1)
+
+    def put(self, token_list: List[str], line_numbers: List[int], symbol_table: Dict[int, str]) -> None:
+        """Adds the tokens of a line, blocking while the queue is full. Usable
+        as the sink of lex_lines().
+
+        Args:
+        - self: mandatory object reference.
+        - token_list: the tokens for the parser.
+        - line_numbers: the line of every token.
+        - symbol_table: the lexical symbol table.
+
+        Returns:
+        None.
+        """
+
+        entries = new_entries(symbol_table, self.sent)
+        self.sent += len(entries)
+        self.put_chunk(token_list, line_numbers, entries)
+
+    def put_chunk(self, token_list: List[str], line_numbers: List[int], entries: Dict[int, str]) -> None:
+        """Adds the tokens of a line along with the symbol table entries added
+        for them, blocking while the queue is full.
+
+        Args:
+        - self: mandatory object reference.
+        - token_list: the tokens for the parser.
+        - line_numbers: the line of every token.
+        - entries: the new symbol table entries.
+
+        Returns:
+        None.
+        """
+
+        if (token_list or entries) and not self.detached:
+            self.chunks.put((token_list, line_numbers, entries))
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Marks the end of the tokens. Called by the producer.
+
+        Args:
+        - self: mandatory object reference.
+        - error: the exception that stopped the producer, if any. It is
+        raised to the consumer once it has read every token before it.
+
+        Returns:
+        None.
+        """
+
+        if not self.detached:
+            self.chunks.put((None, None, error))
+
+    def detach(self) -> None:
+        """Stops consuming. Called by the consumer once it is done, so that
+        the producer can finish without blocking; its tokens are dropped.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        self.detached = True
+        try:
+            while True:
+                self.chunks.get_nowait()
+        except queue.Empty:
+            pass
+
+    def get(self, column: int, ix: int):
+        """Returns a token or line, blocking until it has been produced.
+
+        Args:
+        - self: mandatory object reference.
+        - column: 0 for the tokens, 1 for the lines.
+        - ix: the position of the token.
+
+        Returns:
+        the token or the line of the token at the given position.
+
+        Raises:
+        IndexError: if the position is past the last token.
+        """
+
+        values = self.buffer[column]
+        while ix - self.base >= len(values):
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                raise IndexError(ix)
+            token_list, line_numbers, entries = self.chunks.get()
+            if token_list is None:
+                self.finished = True
+                self.error = entries
+                continue
+
+            # drop the tokens more than one behind the position being read
+            drop = max(0, min(ix - 1 - self.base, len(self.buffer[0])))
+            if drop:
+                self.base += drop
+                for consumed in self.buffer:
+                    del consumed[:drop]
+            self.symbol_table.update(entries)
+            self.buffer[0].extend(token_list)
+            self.buffer[1].extend(line_numbers)
+
+        if ix < self.base:
+            raise LookupError(f'Token {ix} has already been dropped')
+        return values[ix - self.base]
+
+
+class PipeStream:
+    """The tokens or lines of a TokenPipe, indexed like a list."""
+
+    def __init__(self, pipe: TokenPipe, column: int) -> None:
+        """Initializes the stream.
+
+        Args:
+        - self: this stream, the one to create. Mandatory object reference.
+        - pipe: the pipe.
+        - column: 0 for the tokens, 1 for the lines.
+
+        Returns:
+        None.
+        """
+
+        self.pipe = pipe
+        self.column = column
+
+    def __getitem__(self, ix: int):
+        return self.pipe.get(self.column, ix)
+
+
+def lex_to_queue(lines: List[str], chunks, limits: Optional[Dict[str, Optional[int]]]) -> None:
+    """Lexes the given lines in a separate process, sending the tokens of
+    every line along with the symbol table entries added for them. The last
+    message holds the rest of what lex_lines() returns.
+
+    Args:
+    - lines: the lines of the input stream.
+    - chunks: the bounded multiprocessing queue to send the tokens through.
+    - limits: the error budget limits, if any.
+
+    Returns:
+    None.
+    """
+
+    budget = None
+    if limits is not None:
+        budget = ErrorBudget(limits["Lexical"], limits["Parsing"], limits["Semantic"])
+    sent = [0]
+
+    def send(token_list: List[str], line_numbers: List[int], symbol_table: Dict[int, str]) -> None:
+        entries = new_entries(symbol_table, sent[0])
+        sent[0] += len(entries)
+        if token_list or entries:
+            chunks.put((token_list, line_numbers, entries))
+
+    try:
+        lexed = lex_lines(lines, budget, sink=send)
+        chunks.put((None, None, (lexed[:3], None if budget is None else budget.counts["Lexical"])))
+    except BaseException as error:
+        chunks.put((None, None, error))
+
+
+def analyze_pipelined(lines: List[str], budget: ErrorBudget = None, maxsize: int = 256,
+                      process: bool = False) -> Tuple:
+    """Runs the analysis with the lexer and the parser working concurrently:
+    the lexer runs on a thread, or in a separate process, and feeds the parser
+    on the calling thread through a TokenPipe.
+
+    Args:
+    - lines: the lines of the input stream, as returned by readlines().
+    - budget: the maximum number of errors per phase, as for analyze().
+    - maxsize: the number of lines of tokens the lexer may run ahead.
+    - process: lex in a separate process instead of on a thread, so that
+    lexing and parsing do not contend for the interpreter lock.
+
+    Returns:
+    the same tuple as analyze().
+    """
+
+    pipe = TokenPipe(maxsize)
+    lexed = {}
+
+    def lex_on_thread() -> None:
+        try:
+            lexed["result"] = lex_lines(lines, budget, sink=pipe.put)[:3]
+        except BaseException as error:
+            pipe.close(error)
+            raise
+        # the analysis is not parsed if lexing stopped early
+        pipe.close(lexing_stopped(budget))
+
+    def lex_in_process() -> None:
+        context = multiprocessing.get_context()
+        chunks = context.Queue(maxsize)
+        limits = None if budget is None else budget.limits
+        lexer = context.Process(target=lex_to_queue, args=(lines, chunks, limits), daemon=True)
+        lexer.start()
+        while True:
+            token_list, line_numbers, entries = chunks.get()
+            if token_list is None:
+                break
+            pipe.put_chunk(token_list, line_numbers, entries)
+        lexer.join()
+        if isinstance(entries, BaseException):
+            pipe.close(entries)
+            return
+        lexed["result"], lexical_errors = entries
+        if budget is not None:
+            budget.counts["Lexical"] = lexical_errors
+        pipe.close(lexing_stopped(budget))
+
+    lexing = threading.Thread(target=lex_in_process if process else lex_on_thread, daemon=True)
+    lexing.start()
+    try:
+        parser = Parser(pipe.tokens, pipe.symbol_table, budget=budget, line_numbers=pipe.lines)
+        parse_result = parser.parseToken()
+    except ErrorBudgetExceeded as exceeded:
+        # lexing stopped before the parser read its first token, the parse is
+        # dropped below as for analyze()
+        if exceeded.phase != "Lexical":
+            raise
+    finally:
+        # let the lexer run to the end of the input for the token stream
+        pipe.detach()
+        lexing.join()
+
+    token_stream, symbol_table, error_stream = lexed["result"]
+    if lexing_stopped(budget) is not None:
+        budget.exceeded = "Lexical"
+        return token_stream, symbol_table, error_stream, [], {}, {}, SymbolTable()
+
+    return (token_stream, symbol_table, error_stream) + tuple(parse_result)
+
+
+class TimedBudget(ErrorBudget):
+    """An unbounded error budget noting when the parser reports its first
+    error, for the benchmark."""
+
+    def __init__(self) -> None:
+        """Initializes the budget.
+
+        Args:
+        - self: this budget, the one to create. Mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        super().__init__()
+        self.start = time.perf_counter()
+        self.first_diagnostic = None
+
+    def record(self, phase: str) -> None:
+        if phase != "Lexical" and self.first_diagnostic is None:
+            self.first_diagnostic = time.perf_counter() - self.start
+        super().record(phase)
+
+
+# driver code
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compares the sequential analysis to the lexer and the "
+                                                     "parser running concurrently.")
+    arg_parser.add_argument("source", help="the source file to analyze")
+    arg_parser.add_argument("--repeat", type=int, default=200, help="analyze the source this many times over")
+    arg_parser.add_argument("--runs", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with open(args.source) as source:
+        text = source.read()
+    if not text.endswith("\n"):
+        text += "\n"
+    source_lines = text.splitlines(True) * args.repeat
+
+    modes = {
+        "sequential": lambda budget: analyze(source_lines, budget),
+        "thread": lambda budget: analyze_pipelined(source_lines, budget),
+        "process": lambda budget: analyze_pipelined(source_lines, budget, process=True),
+    }
+    print(f'{len(source_lines)} lines')
+    print("{:<12} {:>12} {:>18}".format("mode", "total ms", "first error ms"))
+    for mode, run_mode in modes.items():
+        timings = []
+        for _ in range(args.runs):
+            timed = TimedBudget()
+            run_mode(timed)
+            timings.append((time.perf_counter() - timed.start, timed.first_diagnostic))
+        total, first = min(timings, key=lambda timing: timing[0])
+        first = "-" if first is None else f'{first * 1000:.2f}'
+        print(f'{mode:<12} {total * 1000:12.2f} {first:>18}')
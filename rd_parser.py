@@ -2,39 +2,291 @@ from lexer import *
 from parser_spec import *
 from compatibility_spec import *
 from symbol_table import *
+from error_budget import *
+from intern_pool import InternPool
 from typing import Dict, Tuple, List
+from array import array
 import re
 
+# the production rules that add a node to the syntax tree, by method name
+tree_productions = ("program", "paramList", "pList", "stmts", "stmtsPrime", "decStmt", "list", "optionalAssign",
+                    "assignStmt", "expr", "ePrime", "t", "tPrime", "f", "forStmt", "type", "ifStmt",
+                    "optionalElse", "returnStmt")
+
+
+class ParseCheckpoint:
+    """The state of a parser before a function definition, from which the
+    parse can be resumed."""
+
+    __slots__ = ("token_index", "line_count", "current_function", "scope", "return_stmt_type", "trace_length",
+                 "mark_length", "errors", "semantic_errors", "symbols")
+
+    def __init__(self, parser: "Parser") -> None:
+        """Captures the state of a parser. The semantic symbol table is taken
+        as a snapshot, in constant time; the errors as the number on every
+        line.
+
+        Args:
+        - self: this checkpoint, the one to create. Mandatory object reference.
+        - parser: the parser.
+
+        Returns:
+        None.
+        """
+
+        self.token_index = parser.token_index
+        self.line_count = parser.line_count
+        self.current_function = parser.current_function
+        self.scope = parser.scope
+        self.return_stmt_type = parser.return_stmt_type
+        self.trace_length = len(parser.parser_trace)
+        self.mark_length = len(parser.trace_marks)
+        self.errors = {line: len(errors) for line, errors in parser.error_stream.items()}
+        self.semantic_errors = {line: len(errors) for line, errors in parser.semantic_errors.items()}
+        self.symbols = parser.parsing_symb_table.snapshot()
+
+
+# the token the body of a function definition starts with
+body_start = frozenset({"{>"})
+# the tokens a statement list resynchronizes on: the start of a statement as
+# well as the tokens of its own recovery set
+statement_recovery = firstSet["stmtsPrime"] | recoverySet["stmtsPrime"]
+
 
 class Parser:
     """A recursive descent parser."""
 
-    def __init__(self, token_list: List[str], symbol_table: Dict[int, str]) -> None:
+    def __init__(self, token_list: List[str], symbol_table: Dict[int, str], line_count: int = 0,
+                 parsing_symb_table: SymbolTable = None, budget: ErrorBudget = None,
+                 line_numbers: List[int] = None, build_tree: bool = False, semantic: bool = True,
+                 pool: InternPool = None, snapshots: bool = False) -> None:
         """Initializes the parser with the token stream from the lexer and the
         symbol table.
 
         Args:
         - self: this parser, the one to create. Mandatory object reference.
-        - token_list: the token stream passed from the lexer.
+        - token_list: the token stream passed from the lexer. Any indexable
+        stream works that raises IndexError past the last token, e.g. one
+        filled by a concurrently running lexer.
         - symbol_table: the maintained symbol table.
+        - line_count: the line the token stream starts on, for parsing a part
+        of a larger stream.
+        - parsing_symb_table: the semantic symbol table to start from, e.g.
+        one holding the signatures of the other functions.
+        - budget: the error budget shared with the other phases, if any.
+        - line_numbers: the line of every token in the token list. If not
+        given, the token list holds newline tokens and the lines are counted
+        from them, starting at line_count.
+        - build_tree: also build the syntax tree of the input in 'tree'.
+        - semantic: run the semantic checks while parsing. Without them the
+        parser only checks the syntax; the checks can then be run over the
+        syntax tree by a semantic_passes.PassManager.
+        - pool: the interning pool of the analysis, if any. The identifier
+        names and the records of the semantic symbol table are taken from it.
+        - snapshots: keep a checkpoint before every function definition in
+        'checkpoints', which resume() can continue the parse from, and a
+        snapshot of the semantic symbol table at every scope entry in
+        'scope_snapshots'.
 
         Returns:
         None.
         """
 
+        if line_numbers is None:
+            token_list, line_numbers = self.__countLines(token_list, line_count)
         self.token_list = token_list
+        self.line_numbers = line_numbers
         self.symbol_table = symbol_table
         self.token_index = 0
-        self.current_token = self.token_list[self.token_index]
+        # the token list may be a list or a stream that blocks until the lexer
+        # has produced the requested token, so the end of the tokens is only
+        # ever found by indexing past it
+        try:
+            self.current_token = self.token_list[self.token_index]
+        except IndexError:
+            self.current_token = "<$>"
         self.current_function = ""
         self.parser_trace = []
         self.error_stream = {}
         self.semantic_errors = {}
-        self.line_count = 0
+        self.line_count = line_count
         self.scope = 0
-        self.parsing_symb_table = SymbolTable()
+        self.pool = pool
+        self.identifier_names = {}
+        self.parsing_symb_table = SymbolTable(pool) if parsing_symb_table is None else parsing_symb_table
         self.return_stmt_type = None
+        self.budget = budget
+        self.semantic = semantic
         self.parser_trace.append("Scope: " + str(self.scope))
+        self.tree = None
+        self.tree_node = None
+        # the length of the parser trace and the scope as every token is
+        # consumed, when building the syntax tree
+        self.trace_marks = array("I")
+        self.token_scopes = array("i")
+        self.checkpoints = [] if snapshots else None
+        # the token index, scope and symbol table snapshot at every scope entry
+        self.scope_snapshots = [] if snapshots else None
+        if build_tree:
+            self.__trackNodes()
+
+    @classmethod
+    def fromBinary(cls, path: str, parsing_symb_table: SymbolTable = None, budget: ErrorBudget = None) -> "Parser":
+        """Creates a parser over a binary token stream, as written by
+        token_binary.write_tokens(). The file is memory mapped and the tokens,
+        their lines and the lexical symbol table are read from it directly,
+        without lexing the source again.
+
+        Args:
+        - cls: the parser class.
+        - path: the path to the binary token stream.
+        - parsing_symb_table: the semantic symbol table to start from.
+        - budget: the error budget shared with the other phases, if any.
+
+        Returns:
+        The parser.
+        """
+
+        from token_binary import read_tokens
+
+        token_list, line_numbers, symbol_table = read_tokens(path)
+        return cls(token_list, symbol_table, parsing_symb_table=parsing_symb_table, budget=budget,
+                   line_numbers=line_numbers)
+
+    @staticmethod
+    def __countLines(token_list, line_count) -> Tuple[List[str], List[int]]:
+        """Separates the newline tokens from a token list, attaching to every
+        other token the line it is on.
+
+        Args:
+        - token_list: the token list, including newline tokens.
+        - line_count: the line the token list starts on.
+
+        Returns:
+        The tokens without the newlines and the line of each of them.
+        """
+
+        tokens = []
+        line_numbers = []
+        for token in token_list:
+            if token == "<newline>":
+                line_count += 1
+            else:
+                tokens.append(token)
+                line_numbers.append(line_count)
+
+        return tokens, line_numbers
+
+    def __trackNodes(self) -> None:
+        """Starts building the syntax tree. Every production rule adds a node
+        of its name, holding the type it returns, every consumed token adds a
+        'token' leaf and every error recovery an 'error' node holding the
+        skipped tokens. A production rule calling itself, e.g. for the next
+        statement of a list, extends its node rather than nesting another.
+        The length of the trace and the scope are noted as every token is
+        consumed, so that later passes can place their entries in the trace
+        and see every token in the scope the parser saw it in.
+
+        The rules are wrapped on this parser only, so parsing without a tree
+        costs nothing extra.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        from syntax_tree import SyntaxTree
+
+        self.tree = SyntaxTree()
+        self.tree_node = self.tree.add("source")
+        for kind in tree_productions:
+            self.__trackProduction(kind, "_Parser__" + kind)
+        self.__trackProduction("error", "_Parser__recordingErrors")
+
+        next_token = self.__nextToken
+
+        def consume() -> None:
+            try:
+                self.token_list[self.token_index]
+            except IndexError:
+                pass
+            else:
+                self.tree.add("token", self.token_index, self.tree_node)
+                self.trace_marks.append(len(self.parser_trace))
+                self.token_scopes.append(self.scope)
+            next_token()
+
+        self.__nextToken = consume
+
+    def __trackProduction(self, kind: str, method: str) -> None:
+        """Wraps a production rule of this parser to add its node to the
+        syntax tree.
+
+        Args:
+        - self: mandatory object reference.
+        - kind: the kind of the node.
+        - method: the name of the method implementing the rule.
+
+        Returns:
+        None.
+        """
+
+        rule = getattr(self, method)
+        code = None
+
+        def build(*args):
+            nonlocal code
+            parent = self.tree_node
+            if code is not None and self.tree.kinds[parent] == code:
+                return rule(*args)
+            node = self.tree_node = self.tree.add(kind, self.token_index, parent)
+            code = self.tree.kinds[node]
+            try:
+                node_type = rule(*args)
+            finally:
+                self.tree_node = parent
+            if isinstance(node_type, str):
+                self.tree.set_type(node, node_type)
+            return node_type
+
+        setattr(self, method, build)
+
+    def identifierName(self, attribute: str) -> str:
+        """Returns the name of the identifier an identifier token refers to.
+        Every name is read from the symbol table once and taken from the
+        interning pool, if any.
+
+        Args:
+        - self: mandatory object reference.
+        - attribute: the attribute of the token, its symbol table key
+        followed by '>', e.g. '3>'.
+
+        Returns:
+        the name.
+        """
+
+        name = self.identifier_names.get(attribute)
+        if name is None:
+            name = re.search("(.+?),", self.symbol_table[int(attribute[:-1])]).group(1)
+            if self.pool is not None:
+                name = self.pool.intern(name)
+            self.identifier_names[attribute] = name
+        return name
+
+    def __functionName(self) -> str:
+        """Returns the name of the function being parsed, empty if its
+        definition has no identifier.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        The name.
+        """
+
+        return self.identifierName(self.current_function) if self.current_function else ""
 
     def __checkToken(self) -> List[str]:
         """Returns the lexical unit and attribute of the current token.
@@ -59,9 +311,10 @@ class Parser:
         The lookahead token.
         """
 
-        if self.token_index + 1 >= len(self.token_list):
+        try:
+            return self.token_list[self.token_index + 1]
+        except IndexError:
             return "<$>"  # EOS token
-        return self.token_list[self.token_index + 1]  
 
     def __nextToken(self) -> None:
         """Updates the current token.
@@ -77,8 +330,10 @@ class Parser:
         self.token_index += 1
 
         # upadate token if within bounds
-        if self.token_index < len(self.token_list):
+        try:
             self.current_token = self.token_list[self.token_index]
+        except IndexError:
+            pass
 
     def __updateTokens(self) -> Tuple[List[str], str]:
         """Returns the lexical unit and attribute of the current token in 
@@ -93,54 +348,114 @@ class Parser:
 
         tok = self.__checkToken()
         peek_tok = self.__peekToken()
-        tok, peek_tok = self.__skipNewLine(tok, peek_tok)
+        try:
+            self.line_count = self.line_numbers[self.token_index]
+        except IndexError:
+            pass
 
         return tok, peek_tok
+    
+    def __atEnd(self) -> bool:
+        """Checks if every token has been consumed.
 
-    def __skipNewLine(self, tok, peek_tok) -> Tuple[List[str], str]:
-        """Skips the new line token.
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        True if the current position is past the last token.
+        """
+
+        try:
+            self.token_list[self.token_index]
+        except IndexError:
+            return True
+        return False
+
+    def __inSet(self, tok, symbols) -> bool:
+        """Checks if a token belongs to a FIRST/FOLLOW set, which hold either
+        the lexical unit or the attribute of a token.
 
         Args:
         - self: mandatory object reference.
+        - tok: the split token.
+        - symbols: the set to check against.
 
         Returns:
-        None.
+        True if the token is in the set, False otherwise.
         """
 
-        if tok[0] == "<newline>":
-            self.__nextToken()
-            tok, peek_tok = self.__updateTokens()
-            self.line_count += 1
-        
-        return tok, peek_tok
-    
-    def __recordingErrors(self, tok, peek_tok) -> Tuple[List[str], str]:
+        return tok[0] in symbols or tok[0][1:] in symbols or (len(tok) > 1 and tok[1] in symbols)
+
+    def __recordingErrors(self, tok, peek_tok, production, recovery=None) -> Tuple[List[str], str]:
         """Records the error and returns the next token.
 
+        The panic recovery skips the offending token and then every token up
+        to the next one the production can synchronize on - a token of its
+        FOLLOW set or one of the synchronizing punctuators - in a single loop,
+        recording one error for the whole skipped span. Tokens that only start
+        the production, such as the data type starting a definition, are not
+        synchronized on, so that the recovery never leaves the enclosing
+        production.
+
         Args:
         - self: mandatory object reference.
+        - tok: the offending token.
+        - peek_tok: the lookahead token.
+        - production: the non-terminal being parsed.
+        - recovery: the tokens to synchronize on instead, if any.
 
         Returns:
-        None.
+        The token to resume parsing from and its lookahead.
         """
 
         if len(tok) == 1:
             error = "Expected " + tok[0] + " but found " + peek_tok
         else:
             error = tok[1][:-1] + " cannot be parsed"
-        
-        self.parser_trace.append("Parsing Error!")
-        try:
-            self.error_stream[self.line_count].append(error)
-        except KeyError:
-            self.error_stream[self.line_count] = [error]
+        error_line = self.line_count
         
         # The panic recovery system
+        if recovery is None:
+            recovery = recoverySet[production]
+        skipped = 1
         self.__nextToken()
         tok, peek_tok = self.__updateTokens()
+        while not self.__inSet(tok, recovery) and not self.__atEnd():
+            skipped += 1
+            self.__nextToken()
+            tok, peek_tok = self.__updateTokens()
+
+        if skipped > 1:
+            error += " (" + str(skipped) + " tokens skipped)"
+
+        self.parser_trace.append("Parsing Error!")
+        try:
+            self.error_stream[error_line].append(error)
+        except KeyError:
+            self.error_stream[error_line] = [error]
+        if self.budget is not None:
+            self.budget.record("Parsing")
 
         return tok, peek_tok
     
+    def __semanticError(self, error) -> None:
+        """Records a semantic error on the current line.
+
+        Args:
+        - self: mandatory object reference.
+        - error: the error to record.
+
+        Returns:
+        None.
+        """
+
+        try:
+            self.semantic_errors[self.line_count].append(error)
+        except KeyError:
+            self.semantic_errors[self.line_count] = [error]
+        if self.budget is not None:
+            self.budget.record("Semantic")
+
     def __lookup(self, name, return_type) -> bool:
         """Checks if a variable/function is declared.
 
@@ -168,6 +483,9 @@ class Parser:
         None.
         """
 
+        if not self.semantic:
+            return
+
         if id_type == "Function":
             size = 2
         else:
@@ -178,10 +496,7 @@ class Parser:
         else:
             self.parser_trace.append("Re-declaration Error!")
             error = id_type + " " + name + " already defined in scope " + str(self.scope)
-            try:
-                self.semantic_errors[self.line_count].append(error)
-            except KeyError:
-                self.semantic_errors[self.line_count] = [error]
+            self.__semanticError(error)
     
     def __undeclared(self, name, return_type) -> None:
         """Checks if a variable/function is declared.
@@ -195,13 +510,13 @@ class Parser:
         True if the variable/function is declared, False otherwise.
         """
 
+        if not self.semantic:
+            return
+
         if self.__lookup(name, return_type) == False:
             self.parser_trace.append("Undeclared Error!")
             error = "Undeclared identifier " + name
-            try:
-                self.semantic_errors[self.line_count].append(error)
-            except KeyError:
-                self.semantic_errors[self.line_count] = [error]
+            self.__semanticError(error)
 
     def __incompatibility(self) -> None:
         """Checks for type incompatibility.
@@ -213,27 +528,47 @@ class Parser:
         None.
         """
 
+        if not self.semantic:
+            return
+
         self.parser_trace.append("Type Incompatibility Error!")
         error = "Type Incompatibility"
-        try:
-            self.semantic_errors[self.line_count].append(error)
-        except KeyError:
-            self.semantic_errors[self.line_count] = [error]
+        self.__semanticError(error)
     
     def __checkassignment(self, type_one, type_two) -> bool:
         """Checks for assignment incompatibility.
 
         Args:
         - self: mandatory object reference.
+        - type_one: the type of the assigned identifier.
+        - type_two: the type of the assigned expression.
 
         Returns:
-        None.
+        True if the expression may be assigned to the identifier.
+        """
+
+        return not self.semantic or assignable(type_one, type_two)
+
+    def __typeOf(self, name) -> str:
+        """Returns the type of a variable/function as seen from the current
+        scope.
+
+        Args:
+        - self: mandatory object reference.
+        - name: the name of the variable/function.
+
+        Returns:
+        The type, or None if it is not declared or the semantic checks are
+        not run.
         """
 
-        return type_one == type_two
+        if not self.semantic:
+            return None
+        return self.parsing_symb_table.check_return_type(name, self.scope)
 
-    def __program(self) -> None:
-        """The production rules for the 'Program' non-terminal.
+    def __snapshotScope(self) -> None:
+        """Snapshots the semantic symbol table on entering a scope, if the
+        parser keeps snapshots.
 
         Args:
         - self: mandatory object reference.
@@ -242,12 +577,31 @@ class Parser:
         None.
         """
 
+        if self.scope_snapshots is not None:
+            self.scope_snapshots.append((self.token_index, self.scope, self.parsing_symb_table.snapshot()))
+
+    def __program(self) -> bool:
+        """The production rules for the 'Program' non-terminal. A program is a
+        sequence of function definitions, one parsed per call.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        True if another function definition follows, False at the end of
+        the stream.
+        """
+
         # print("IN PROGRAM")
+        if self.checkpoints is not None:
+            self.checkpoints.append(ParseCheckpoint(self))
         tok, peek_tok = self.__updateTokens()
         function_name = None
         return_type = None
+        body = False
+        closed = False
 
-        if tok[0] in firstSet["program"]:
+        if tok[0] in firstSet["function"]:
             if tok[0] == "<dt":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
                 return_type = tok[1][:-1]
@@ -256,11 +610,13 @@ class Parser:
             if tok[0] == "<id":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
                 self.current_function = tok[1]
-                function_name = re.search("(.+?),", self.symbol_table[int(self.current_function[:-1])]).group(1)
+                if self.semantic:
+                    self.parsing_symb_table.begin_function()
+                function_name = self.identifierName(self.current_function)
                 self.__redeclaration(function_name, return_type, "Function")
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == "(>":
+            if len(tok) > 1 and tok[1] == "(>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
@@ -268,40 +624,48 @@ class Parser:
                 self.__paramList()
                 # print("IN PROGRAM")
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == ")>":
+            if len(tok) > 1 and tok[1] == ")>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == "{>":
+            if not (len(tok) > 1 and tok[1] == "{>") and not self.__atEnd():
+                # the rest of a header that cannot be parsed is skipped up to
+                # the brace opening the body
+                tok, peek_tok = self.__recordingErrors(tok, peek_tok, "function", body_start)
+            if len(tok) > 1 and tok[1] == "{>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-                self.parser_trace.append("In " + re.search("(.+?),", self.symbol_table[int(self.current_function[:-1])]).group(1) + "()")
+                self.parser_trace.append("In " + self.__functionName() + "()")
                 self.scope += 1
                 self.parser_trace.append("Scope: " + str(self.scope))
-            if tok[0] in firstSet["stmts"] or tok[1] in firstSet["stmts"]:
-                self.__stmts()
-                # print("IN PROGRAM")
-                self.__nextToken()
-                tok, peek_tok = self.__updateTokens()
-            if tok[1] == "}>":
+                self.__snapshotScope()
+                body = True
+            tok, peek_tok = self.__blockStmts(body)
+            if len(tok) > 1 and tok[1] == "}>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-                self.parser_trace.append("Exiting " + re.search("(.+?),", self.symbol_table[int(self.current_function[:-1])]).group(1) + "()")
+                self.parser_trace.append("Exiting " + self.__functionName() + "()")
                 self.scope -= 1
                 self.parser_trace.append("Scope: " + str(self.scope))
+                closed = True
+            if closed and tok[0] in firstSet["function"]:
+                # another function definition follows the closing brace
+                return True
             if peek_tok in followSet["program"]:
                 self.parser_trace.append("EOF")
-                return
+                return False
             
         if tok[0] in followSet["program"] or peek_tok in followSet["program"]:
             self.parser_trace.append("EOF")
-            return
+            return False
 
-        if tok[0] not in firstSet["program"] or tok[1] not in firstSet["program"]:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
-            self.__program()
+        if tok[0] not in firstSet["function"] or len(tok) < 2 or tok[1] not in firstSet["function"]:
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "function")
+            return True
+
+        return False
 
     def __paramList(self) -> None:
         """The production rules for the 'ParamList' non-terminal.
@@ -326,20 +690,20 @@ class Parser:
                 tok, peek_tok = self.__updateTokens()
             if tok[0] == "<id":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
-                param_name = re.search("(.+?),", self.symbol_table[int(tok[1][:-1])]).group(1)
+                param_name = self.identifierName(tok[1])
                 self.__redeclaration(param_name, param_type, "Identifier")
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] in firstSet["pList"]:
+            if len(tok) > 1 and tok[1] in firstSet["pList"]:
                 self.__pList()
                 # print("IN PARAMLIST")
                 tok, peek_tok = self.__updateTokens()
 
-        if tok[1] in followSet["paramList"]:
+        if len(tok) > 1 and tok[1] in followSet["paramList"]:
             return 
 
-        if tok[0] not in firstSet["paramList"] and tok[1] not in firstSet["paramList"]:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+        if tok[0] not in firstSet["paramList"] and (len(tok) < 2 or tok[1] not in firstSet["paramList"]):
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "paramList")
             return
 
     def __pList(self) -> None:
@@ -357,7 +721,7 @@ class Parser:
         param_name = None
         param_type = None
 
-        if tok[1] in firstSet["pList"]:
+        if len(tok) > 1 and tok[1] in firstSet["pList"]:
             if tok[1] == ",>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
@@ -369,20 +733,44 @@ class Parser:
                 tok, peek_tok = self.__updateTokens()
             if tok[0] == "<id":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
-                param_name = re.search("(.+?),", self.symbol_table[int(tok[1][:-1])]).group(1)
+                param_name = self.identifierName(tok[1])
                 self.__redeclaration(param_name, param_type, "Identifier")
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] in firstSet["pList"]:
+            if len(tok) > 1 and tok[1] in firstSet["pList"]:
                 self.__pList()
         
-        elif tok[1] in followSet["pList"]:
+        elif len(tok) > 1 and tok[1] in followSet["pList"]:
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "pList")
             return
 
+    def __blockStmts(self, opened: bool) -> Tuple[List[str], str]:
+        """Parses the statements of a block, i.e. the body of a function or of
+        a for, if or else statement.
+
+        Args:
+        - self: mandatory object reference.
+        - opened: whether the opening brace of the block was matched, in which
+        case statements that stop short of the closing brace go on up to it,
+        so that no brace of an enclosing block is taken for it.
+
+        Returns:
+        The token following the statements and its lookahead.
+        """
+
+        tok, peek_tok = self.__updateTokens()
+        if tok[0] in firstSet["stmts"] or (len(tok) > 1 and tok[1] in firstSet["stmts"]):
+            self.__stmts()
+            tok, peek_tok = self.__updateTokens()
+        while opened and not (len(tok) > 1 and tok[1] == "}>") and not self.__atEnd():
+            self.__stmtsPrime()
+            tok, peek_tok = self.__updateTokens()
+
+        return tok, peek_tok
+
     def __stmts(self) -> None:
         """The production rules for the 'Stmts' non-terminal.
 
@@ -396,7 +784,7 @@ class Parser:
         # print("IN STMTS")
         tok, peek_tok = self.__updateTokens()
 
-        if tok[0] in firstSet["stmts"] or tok[1] in firstSet["stmts"]:
+        if tok[0] in firstSet["stmts"] or (len(tok) > 1 and tok[1] in firstSet["stmts"]):
             if tok[0] in firstSet["stmtsPrime"] or tok[1] in firstSet["stmtsPrime"]:
                 self.__stmtsPrime()
                 # print("IN STMTS")
@@ -405,23 +793,26 @@ class Parser:
                 self.parser_trace.append("Parsing Error!")
                 return
         
-        elif tok[1] in followSet["stmts"]:
+        elif len(tok) > 1 and tok[1] in followSet["stmts"]:
             self.parser_trace.append("matched <" + tok[1])
             
             self.__nextToken()
             # print("IN STMTS")
         
-        elif "epsilon" in firstSet["stmts"] and tok[1] not in firstSet["stmts"] and tok[0] not in firstSet["stmts"]:
-            self.__stmts()
+        elif "epsilon" in firstSet["stmts"] and (len(tok) < 2 or tok[1] not in firstSet["stmts"]) and tok[0] not in firstSet["stmts"]:
+            self.__stmtsPrime()
             # print("IN STMTS")
             tok, peek_tok = self.__updateTokens()
         
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "stmts")
             return
 
     def __stmtsPrime(self) -> None:
-        """The production rules for the "Stmts'" non-terminal.
+        """The production rules for the "Stmts'" non-terminal. The statements
+        are parsed one after another up to the brace closing the list, in a
+        loop rather than by recursion, so that neither a long statement list
+        nor its recovery exhausts the stack.
 
         Args:
         - self: mandatory object reference.
@@ -431,38 +822,40 @@ class Parser:
         """
 
         # print("IN STMTSPRIME")
-        tok, peek_tok = self.__updateTokens()
+        # the braces opened by the tokens skipped as errors, whose closing
+        # braces do not close the statement list
+        depth = 0
+
+        while not self.__atEnd():
+            tok, peek_tok = self.__updateTokens()
+            start = self.token_index
 
-        if tok[0] in firstSet["stmtsPrime"] or tok[1] in firstSet["stmtsPrime"]:
             if tok[0] in firstSet["decStmts"]:
                 self.__decStmt()
-                tok, peek_tok = self.__updateTokens()
-                self.__stmtsPrime()
-            if tok[0] in firstSet["assignStmt"]:
+            elif tok[0] in firstSet["assignStmt"]:
                 self.__assignStmt()
-                tok, peek_tok = self.__updateTokens()
-                self.__stmtsPrime()
-            if tok[1] in firstSet["forStmt"]:
+            elif len(tok) > 1 and tok[1] in firstSet["forStmt"]:
                 self.__forStmt()
-                tok, peek_tok = self.__updateTokens()
-                self.__stmtsPrime()
-            if tok[1] in firstSet["ifStmt"]:
+            elif len(tok) > 1 and tok[1] in firstSet["ifStmt"]:
                 self.__ifStmt()
-                tok, peek_tok = self.__updateTokens()
-                self.__stmtsPrime()
-            if tok[1] in firstSet["returnStmt"]:
+            elif len(tok) > 1 and tok[1] in firstSet["returnStmt"]:
                 self.return_stmt_type = self.__returnStmt()
-                tok, peek_tok = self.__updateTokens()
-                self.__stmtsPrime()
-            else:
-                return
-
-        elif tok[1] in followSet["stmtsPrime"]:
-            return
+            elif len(tok) > 1 and tok[1] in followSet["stmtsPrime"]:
+                if depth == 0:
+                    return
+                depth -= 1
+                self.__nextToken()
 
-        else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
-            return
+            if self.token_index == start:
+                # the list goes on with the next statement the error stops at
+                tok, peek_tok = self.__recordingErrors(tok, peek_tok, "stmtsPrime", statement_recovery)
+                # a statement terminator or a block the error stopped at is
+                # skipped along with it
+                if len(tok) > 1 and tok[1] == ";>":
+                    self.__nextToken()
+                elif len(tok) > 1 and tok[1] == "{>":
+                    depth += 1
+                    self.__nextToken()
 
     def __decStmt(self) -> None:
         """The production rules for the 'DecStmts' non-terminal.
@@ -487,11 +880,11 @@ class Parser:
                 tok, peek_tok = self.__updateTokens()
             if tok[0] == "<id":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
-                identifier_name = re.search("(.+?),", self.symbol_table[int(tok[1][:-1])]).group(1)
+                identifier_name = self.identifierName(tok[1])
                 self.__redeclaration(identifier_name, identifier_type, "Identifier")
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] in firstSet["optionalAssign"]:
+            if len(tok) > 1 and tok[1] in firstSet["optionalAssign"]:
                 self.__optionalAssign()
                 # print("IN DECSTMT")
                 tok, peek_tok = self.__updateTokens()
@@ -510,11 +903,11 @@ class Parser:
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
 
-        elif tok[0] in followSet["decStmts"] or tok[1] in followSet["decStmts"]:
+        elif tok[0] in followSet["decStmts"] or (len(tok) > 1 and tok[1] in followSet["decStmts"]):
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "decStmts")
             return
 
     def __list(self) -> None:
@@ -530,7 +923,7 @@ class Parser:
         # print("IN LIST")
         tok, peek_tok = self.__updateTokens()
 
-        if tok[1] in firstSet["list"]:
+        if len(tok) > 1 and tok[1] in firstSet["list"]:
             if tok[1] == ",>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
@@ -539,11 +932,11 @@ class Parser:
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] in firstSet["optionalAssign"]:
+            if len(tok) > 1 and tok[1] in firstSet["optionalAssign"]:
                 self.__optionalAssign()
                 # print("IN DECSTMT")
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] in firstSet["list"]:
+            if len(tok) > 1 and tok[1] in firstSet["list"]:
                 self.__list()
             else:
                 return
@@ -551,11 +944,11 @@ class Parser:
         elif tok[0] in followSet["list"]:
             return
 
-        elif tok[1] in followSet["list"]:
+        elif len(tok) > 1 and tok[1] in followSet["list"]:
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "list")
             return
 
     def __optionalAssign(self) -> None:
@@ -571,11 +964,11 @@ class Parser:
         # print("IN OPTIONALASSIGN")
         tok, peek_tok = self.__updateTokens()
 
-        if tok[1] in firstSet["optionalAssign"]:
+        if len(tok) > 1 and tok[1] in firstSet["optionalAssign"]:
             self.parser_trace.append("matched <" + tok[1])
             self.__nextToken()
             tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+            if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                 self.__expr()
                 # print("IN OPTIONALASSIGN")
                 tok, peek_tok = self.__updateTokens()
@@ -595,11 +988,11 @@ class Parser:
         elif tok[0] in followSet["optionalAssign"]:
             return
 
-        elif tok[1] in followSet["optionalAssign"]:
+        elif len(tok) > 1 and tok[1] in followSet["optionalAssign"]:
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "optionalAssign")
             return
 
     def __assignStmt(self) -> None:
@@ -620,8 +1013,8 @@ class Parser:
         if tok[0] in firstSet["assignStmt"]:
             if tok[0] == "<id":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
-                identifier_name = re.search("(.+?),", self.symbol_table[int(tok[1][:-1])]).group(1)
-                identifier_type = self.parsing_symb_table.check_return_type(identifier_name, self.scope)
+                identifier_name = self.identifierName(tok[1])
+                identifier_type = self.__typeOf(identifier_name)
                 self.__undeclared(identifier_name, identifier_type)
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
@@ -635,10 +1028,7 @@ class Parser:
                 if self.__checkassignment(identifier_type, expr_type) == False:
                     self.parser_trace.append("ERROR: Type mismatch in assignment")
                     error = "ERROR: Type mismatch in assignment"
-                    try:
-                        self.semantic_errors[self.line_count].append(error)
-                    except KeyError:
-                        self.semantic_errors[self.line_count] = [error]
+                    self.__semanticError(error)
                 tok, peek_tok = self.__updateTokens()
             if len(tok) == 2 and tok[1] in firstSet["expr"]:
                 expr_type = self.__expr()
@@ -649,11 +1039,11 @@ class Parser:
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
 
-        elif tok[1] in followSet["assignStmt"]:
+        elif len(tok) > 1 and tok[1] in followSet["assignStmt"]:
             return
         
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "assignStmt")
             return
 
     def __expr(self) -> None:
@@ -669,15 +1059,15 @@ class Parser:
         # print("IN EXPR")
         tok, peek_tok = self.__updateTokens()
 
-        if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+        if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
             if tok[0] in firstSet["t"] or tok[1] in firstSet["t"]:
                 t_type = self.__t()
                 # print("IN EXPR")
-            if tok[1] in firstSet["ePrime"]:
+            if len(tok) > 1 and tok[1] in firstSet["ePrime"]:
                 e_prime_type = self.__ePrime(t_type)
                 return e_prime_type
                 # print("IN EXPR")
-            if "epsilon" in firstSet["ePrime"] and tok[1] not in firstSet["ePrime"]:
+            if "epsilon" in firstSet["ePrime"] and (len(tok) < 2 or tok[1] not in firstSet["ePrime"]):
                 e_prime_type = self.__ePrime(t_type)
                 return e_prime_type
                 # print("IN EXPR")
@@ -685,11 +1075,11 @@ class Parser:
         elif tok[0] in followSet["expr"]:
             return e_prime_type
 
-        elif tok[1] in followSet["expr"]:
+        elif len(tok) > 1 and tok[1] in followSet["expr"]:
             return e_prime_type
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "expr")
             return
 
     def __ePrime(self, left_type) -> None:
@@ -705,6 +1095,7 @@ class Parser:
 
         # print("IN EPRIME")
         tok, peek_tok = self.__updateTokens()
+        t_type = None
 
         if len(tok) == 1:
             if tok[0][1:] in firstSet["ePrime"]:
@@ -716,32 +1107,26 @@ class Parser:
                     t_type = self.__t()
                     # print("IN EPRIME")
                     # tok, peek_tok = self.__updateTokens()
-                    if (left_type, t_type, "+") not in type_equilvalence.keys():
+                    if result_type(left_type, t_type, "+") is None:
                         self.__incompatibility()
                         return None
                     else:
-                        return type_equilvalence[(left_type, t_type, "+")]
+                        return result_type(left_type, t_type, "+")
                 if len(tok) == 1:
                     if tok[0] in firstSet["ePrime"]:
-                        e_prime_type = self.__ePrime()
+                        e_prime_type = self.__ePrime(t_type)
                         tok, peek_tok = self.__updateTokens()
                 if len(tok) == 2:
                     if tok[1] in firstSet["ePrime"]:
-                        e_prime_type = self.__ePrime()
+                        e_prime_type = self.__ePrime(t_type)
                         tok, peek_tok = self.__updateTokens()
                 else:
-                    if (left_type, t_type, "+") not in type_equilvalence.keys():
-                        self.__incompatibility()
-                        return t_type
-                    else:
-                        return type_equilvalence[(left_type, t_type, "+")]
+                    # the '+' has no right operand, which is a parsing error
+                    # and not a type incompatibility
+                    return None
 
             else:
-                if (left_type, t_type, "+") not in type_equilvalence.keys():
-                    self.__incompatibility()
-                    return t_type
-                else:
-                    return type_equilvalence[(left_type, t_type, "+")]
+                return left_type
 
         elif len(tok) == 2:
             if tok[0] in firstSet["ePrime"]:
@@ -753,28 +1138,28 @@ class Parser:
                     t_type = self.__t()
                     # print("IN EPRIME")
                     tok, peek_tok = self.__updateTokens()
-                if tok[1] in firstSet["ePrime"]:
-                    e_prime_type = self.__ePrime()
+                if len(tok) > 1 and tok[1] in firstSet["ePrime"]:
+                    e_prime_type = self.__ePrime(t_type)
                 else:
-                    if (left_type, t_type, "+") not in type_equilvalence.keys():
+                    if result_type(left_type, t_type, "+") is None:
                         self.__incompatibility()
                         return t_type
                     else:
-                        return type_equilvalence[(left_type, t_type, "+")]
+                        return result_type(left_type, t_type, "+")
 
             else:
                 return left_type
-                # if (left_type, t_type, "+") not in type_equilvalence.keys():
+                # if result_type(left_type, t_type, "+") is None:
                 #     self.__incompatibility()
                 #     return t_type
                 # else:
-                #     return type_equilvalence[(left_type, t_type, "+")]
+                #     return result_type(left_type, t_type, "+")
 
         elif tok[0][1:] in followSet["ePrime"]:
             return t_type
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "ePrime")
             return t_type
 
     def __t(self) -> None:
@@ -790,7 +1175,7 @@ class Parser:
         # print("IN T")
         tok, peek_tok = self.__updateTokens()
 
-        if tok[0] in firstSet["t"] or tok[1] in firstSet["t"]:
+        if tok[0] in firstSet["t"] or (len(tok) > 1 and tok[1] in firstSet["t"]):
             if tok[0] in firstSet["f"] or tok[1] in firstSet["f"]:
                 f_type = self.__f()
                 # print("f_type: ", f_type)
@@ -811,11 +1196,11 @@ class Parser:
         elif tok[0] in followSet["t"]:
             return t_prime_type
 
-        elif tok[1] in followSet["t"]:
+        elif len(tok) > 1 and tok[1] in followSet["t"]:
             return t_prime_type
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "t")
             return t_prime_type
 
     def __tPrime(self, f_type) -> None:
@@ -834,14 +1219,14 @@ class Parser:
 
         if len(tok) == 2:
             if tok[1] in firstSet["tPrime"]:
-                if tok[1] == "*>":
+                if len(tok) > 1 and tok[1] == "*>":
                     self.parser_trace.append("matched <" + tok[1])
                     self.__nextToken()
-                if tok[0] in firstSet["f"] or tok[1] in firstSet["f"]:
+                if tok[0] in firstSet["f"] or (len(tok) > 1 and tok[1] in firstSet["f"]):
                     f_type = self.__f()
                     # print("IN TPRIME")
                     tok, peek_tok = self.__updateTokens()
-                if tok[1] in firstSet["tPrime"]:
+                if len(tok) > 1 and tok[1] in firstSet["tPrime"]:
                     f_type = self.__tPrime(f_type)
                     # print("IN TPRIME")
                 return f_type
@@ -856,14 +1241,18 @@ class Parser:
                     self.__nextToken()
                     tok, peek_tok = self.__updateTokens()
                 if tok[0] in firstSet["f"]:
-                    f_type = self.__f()
+                    right_type = self.__f()
                     # print("IN TPRIME")
+                    f_type = result_type(f_type, right_type, "*")
+                    if f_type is None:
+                        self.__incompatibility()
                     tok, peek_tok = self.__updateTokens()
                 if len(tok) == 2 and tok[1] in firstSet["tPrime"]:
                     f_type = self.__f()
                     # print("IN TPRIME")
                     tok, peek_tok = self.__updateTokens()
-                if tok[0][1:] in firstSet["tPrime"]:
+                # a '*' ending the stream is not matched again
+                if tok[0][1:] in firstSet["tPrime"] and not self.__atEnd():
                     f_type = self.__tPrime(f_type)
                     # print("IN TPRIME")
                     return f_type
@@ -877,7 +1266,7 @@ class Parser:
             return f_type
         
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "tPrime")
             return f_type
 
     def __f(self) -> None:
@@ -894,22 +1283,22 @@ class Parser:
         tok, peek_tok = self.__updateTokens()
         return_type = None
 
-        if tok[0] in firstSet["f"] or tok[1] in firstSet["f"]:
-            if tok[1] == "(>":
+        if tok[0] in firstSet["f"] or (len(tok) > 1 and tok[1] in firstSet["f"]):
+            if len(tok) > 1 and tok[1] == "(>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-                if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+                if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                     self.__expr()
                     # print("IN F")
-                if tok[1] == ")>":
+                if len(tok) > 1 and tok[1] == ")>":
                     self.parser_trace.append("matched <" + tok[1])
                     self.__nextToken()
                     tok, peek_tok = self.__updateTokens()
             if tok[0] == "<id":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
-                identifier_name = re.search("(.+?),", self.symbol_table[int(tok[1][:-1])]).group(1)
-                return_type = self.parsing_symb_table.check_return_type(identifier_name, self.scope)
+                identifier_name = self.identifierName(tok[1])
+                return_type = self.__typeOf(identifier_name)
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
                 return return_type
@@ -917,11 +1306,11 @@ class Parser:
         elif tok[0] in followSet["f"]:
             return return_type
 
-        elif tok[1] in followSet["f"]:
+        elif len(tok) > 1 and tok[1] in followSet["f"]:
             return return_type
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "f")
             return return_type
 
     def __forStmt(self) -> None:
@@ -936,13 +1325,14 @@ class Parser:
 
         # print("IN FORSTMT")
         tok, peek_tok = self.__updateTokens()
+        body = False
 
-        if tok[1] in firstSet["forStmt"]:  
+        if len(tok) > 1 and tok[1] in firstSet["forStmt"]:
             if tok[1] == "for>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == "(>":
+            if len(tok) > 1 and tok[1] == "(>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
@@ -950,22 +1340,22 @@ class Parser:
                 self.__type()
                 # print("IN FORSTMT")
                 tok, peek_tok = self.__updateTokens()
-            if "epsilon" in firstSet["type"] and tok[1] not in firstSet["type"]:
+            if "epsilon" in firstSet["type"] and (len(tok) < 2 or tok[1] not in firstSet["type"]):
                 self.__type()
                 # print("IN FORSTMT")
             if tok[0] == "<id":
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+            if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                 self.__expr()
                 # print("IN FORSTMT")
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == ";>":
+            if len(tok) > 1 and tok[1] == ";>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+            if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                 self.__expr()
                 # print("IN FORSTMT")
                 tok, peek_tok = self.__updateTokens()
@@ -973,11 +1363,11 @@ class Parser:
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+            if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                 self.__expr()
                 # print("IN FORSTMT")
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == ";>":
+            if len(tok) > 1 and tok[1] == ";>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
@@ -991,21 +1381,20 @@ class Parser:
                 tok, peek_tok = self.__updateTokens()
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == ")>":
+            if len(tok) > 1 and tok[1] == ")>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == "{>":
+            if len(tok) > 1 and tok[1] == "{>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
                 self.scope += 1
                 self.parser_trace.append("Scope: " + str(self.scope))
-            if tok[0] in firstSet["stmts"] or tok[1] in firstSet["stmts"]:
-                self.__stmts()
-                # print("IN FORSTMT")
-                tok, peek_tok = self.__updateTokens()
-            if tok[1] == "}>":
+                self.__snapshotScope()
+                body = True
+            tok, peek_tok = self.__blockStmts(body)
+            if len(tok) > 1 and tok[1] == "}>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
@@ -1015,11 +1404,11 @@ class Parser:
         elif tok[0] in followSet["forStmt"]:
             return
 
-        elif tok[1] in followSet["forStmt"]:
+        elif len(tok) > 1 and tok[1] in followSet["forStmt"]:
             return
         
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "forStmt")
             return
 
     def __type(self) -> None:
@@ -1047,7 +1436,7 @@ class Parser:
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "type")
             return
 
     def __ifStmt(self) -> None:
@@ -1062,17 +1451,18 @@ class Parser:
 
         # print("IN IFSTMT")
         tok, peek_tok = self.__updateTokens()
+        body = False
 
-        if tok[1] in firstSet["ifStmt"]:
+        if len(tok) > 1 and tok[1] in firstSet["ifStmt"]:
             if tok[1] == "if>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == "(>":
+            if len(tok) > 1 and tok[1] == "(>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+            if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                 self.__expr()
                 # print("IN IFSTMT")
                 tok, peek_tok = self.__updateTokens()
@@ -1080,31 +1470,30 @@ class Parser:
                 self.parser_trace.append("matched " + tok[0] + ", " + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+            if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                 self.__expr()
                 # print("IN IFSTMT")
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == ")>":
+            if len(tok) > 1 and tok[1] == ")>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == "{>":
+            if len(tok) > 1 and tok[1] == "{>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
                 self.scope += 1
                 self.parser_trace.append("Scope: " + str(self.scope))
-            if tok[0] in firstSet["stmts"] or tok[1] in firstSet["stmts"]:
-                self.__stmts()
-                # print("IN IFSTMT")
-                tok, peek_tok = self.__updateTokens()
-            if tok[1] == "}>":
+                self.__snapshotScope()
+                body = True
+            tok, peek_tok = self.__blockStmts(body)
+            if len(tok) > 1 and tok[1] == "}>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
                 self.scope -= 1
                 self.parser_trace.append("Scope: " + str(self.scope))
-            if tok[1] in firstSet["optionalElse"]:
+            if len(tok) > 1 and tok[1] in firstSet["optionalElse"]:
                 self.__optionalElse()
                 # print("IN IFSTMT")
                 tok, peek_tok = self.__updateTokens()
@@ -1112,11 +1501,11 @@ class Parser:
         elif tok[0] in followSet["ifStmt"]:
             return
 
-        elif tok[1] in followSet["ifStmt"]:
+        elif len(tok) > 1 and tok[1] in followSet["ifStmt"]:
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "ifStmt")
             return
 
     def __optionalElse(self) -> None:
@@ -1131,23 +1520,23 @@ class Parser:
 
         # print("IN OPTIONALELSE")
         tok, peek_tok = self.__updateTokens()
+        body = False
 
-        if tok[1] in firstSet["optionalElse"]:
+        if len(tok) > 1 and tok[1] in firstSet["optionalElse"]:
             if tok[1] == "else>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
                 self.scope += 1
                 self.parser_trace.append("Scope: " + str(self.scope))
-            if tok[1] == "{>":
+                self.__snapshotScope()
+            if len(tok) > 1 and tok[1] == "{>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["stmts"] or tok[1] in firstSet["stmts"]:
-                self.__stmts()
-                # print("IN OPTIONALELSE")
-                tok, peek_tok = self.__updateTokens()
-            if tok[1] == "}>":
+                body = True
+            tok, peek_tok = self.__blockStmts(body)
+            if len(tok) > 1 and tok[1] == "}>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
@@ -1159,11 +1548,11 @@ class Parser:
         elif tok[0] in followSet["optionalElse"]:
             return
 
-        elif tok[1] in followSet["optionalElse"]:
+        elif len(tok) > 1 and tok[1] in followSet["optionalElse"]:
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "optionalElse")
             return
 
     def __returnStmt(self) -> None:
@@ -1178,17 +1567,18 @@ class Parser:
 
         # print("IN RETURNSTMT")
         tok, peek_tok = self.__updateTokens()
+        expr_type = None
         
-        if tok[1] in firstSet["returnStmt"]:
+        if len(tok) > 1 and tok[1] in firstSet["returnStmt"]:
             if tok[1] == "return>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
-            if tok[0] in firstSet["expr"] or tok[1] in firstSet["expr"]:
+            if tok[0] in firstSet["expr"] or (len(tok) > 1 and tok[1] in firstSet["expr"]):
                 expr_type = self.__expr()
                 # print("IN RETURNSTMT")
                 tok, peek_tok = self.__updateTokens()
-            if tok[1] == ";>":
+            if len(tok) > 1 and tok[1] == ";>":
                 self.parser_trace.append("matched <" + tok[1])
                 self.__nextToken()
                 tok, peek_tok = self.__updateTokens()
@@ -1197,11 +1587,11 @@ class Parser:
         elif tok[0] in followSet["returnStmt"]:
             return
 
-        elif tok[1] in followSet["returnStmt"]:
+        elif len(tok) > 1 and tok[1] in followSet["returnStmt"]:
             return
 
         else:
-            tok, peek_tok = self.__recordingErrors(tok, peek_tok)
+            tok, peek_tok = self.__recordingErrors(tok, peek_tok, "returnStmt")
             return
 
     def parseToken(self) -> List[str]:
@@ -1214,7 +1604,77 @@ class Parser:
         The output of the parser in the form of a trace of the syntax analysis.
         """
 
-        self.__program()
+        try:
+            while self.__program():
+                pass
+        except ErrorBudgetExceeded as exceeded:
+            # stop cleanly, recording why the analysis ended early
+            errors = self.error_stream if exceeded.phase == "Parsing" else self.semantic_errors
+            errors.setdefault(self.line_count, []).append(str(exceeded))
+            self.parser_trace.append("Analysis stopped!")
+        if self.pool is not None:
+            self.internResults()
         # self.parsing_symb_table.print_table()
         return self.parser_trace, self.error_stream, self.semantic_errors, self.parsing_symb_table
+
+    def resume(self, checkpoint: ParseCheckpoint) -> List[str]:
+        """Continues the parse from a checkpoint, dropping everything parsed
+        after it. The tokens past the checkpoint are read again from
+        'token_list' and 'line_numbers', which may have been edited since.
+        The error budget is not given back the errors dropped.
+
+        Args:
+        - self: mandatory object reference.
+        - checkpoint: a checkpoint of this parser, from 'checkpoints' now or
+        before an earlier resume.
+
+        Returns:
+        The output of the parser, as returned by parseToken().
+        """
+
+        if self.tree is not None:
+            raise ValueError("a parse building a syntax tree cannot be resumed")
+
+        self.token_index = checkpoint.token_index
+        try:
+            self.current_token = self.token_list[self.token_index]
+        except IndexError:
+            self.current_token = "<$>"
+        self.line_count = checkpoint.line_count
+        self.current_function = checkpoint.current_function
+        self.scope = checkpoint.scope
+        self.return_stmt_type = checkpoint.return_stmt_type
+        del self.parser_trace[checkpoint.trace_length:]
+        del self.trace_marks[checkpoint.mark_length:]
+        for errors, counts in ((self.error_stream, checkpoint.errors),
+                               (self.semantic_errors, checkpoint.semantic_errors)):
+            for line in list(errors):
+                if line in counts:
+                    del errors[line][counts[line]:]
+                else:
+                    del errors[line]
+        self.parsing_symb_table.restore(checkpoint.symbols)
+
+        # the checkpoint itself is taken again as the parse continues
+        self.checkpoints[:] = [kept for kept in self.checkpoints if kept.token_index < checkpoint.token_index]
+        self.scope_snapshots[:] = [entry for entry in self.scope_snapshots if entry[0] < checkpoint.token_index]
+        return self.parseToken()
+
+    def internResults(self) -> None:
+        """Replaces the entries of the parser trace and the error messages by
+        the strings of the interning pool. Most of them repeat, e.g. every
+        match of a semicolon, but are built anew every time.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        intern = self.pool.intern
+        self.parser_trace[:] = map(intern, self.parser_trace)
+        for errors in (self.error_stream, self.semantic_errors):
+            for line in errors:
+                errors[line][:] = map(intern, errors[line])
             
\ No newline at end of file
@@ -0,0 +1,607 @@
+import time
+from array import array
+from compatibility_spec import result_type, assignable
+from error_budget import *
+from rd_parser import Parser
+from symbol_table import SymbolTable
+from syntax_tree import no_node
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# a diagnostic: the token it is found at, 0 if it is found while the token is
+# matched or 1 once the token is consumed, its entry in the parser trace and
+# the error
+Diagnostic = Tuple[int, int, str, str]
+
+# the productions declaring the identifiers they match
+declaring = {"program": "Function", "paramList": "Identifier", "pList": "Identifier", "decStmt": "Identifier"}
+
+
+class PassContext:
+    """The parsed input the passes run over, and the results of the passes
+    run so far, by name."""
+
+    def __init__(self, parser: Parser) -> None:
+        """Initializes the context from a parser that has built the syntax
+        tree of its input.
+
+        Args:
+        - self: this context, the one to create. Mandatory object reference.
+        - parser: the parser, after parsing.
+
+        Returns:
+        None.
+        """
+
+        self.tree = parser.tree
+        self.token_list = parser.token_list
+        self.symbol_table = parser.symbol_table
+        self.identifier_name = parser.identifierName
+        self.parsing_symb_table = parser.parsing_symb_table
+        self.scopes = parser.token_scopes
+        self.results = {}
+        self.parents = self.tree.parents()
+
+        # the number of tokens consumed up to and including every node
+        token_code = self.tree.kind_codes.get("token")
+        self.consumed = array("I")
+        count = 0
+        for code in self.tree.kinds:
+            if code == token_code:
+                count += 1
+            self.consumed.append(count)
+
+    def nodes(self, kind: str) -> Iterator[int]:
+        """Iterates over the nodes of a kind in preorder.
+
+        Args:
+        - self: mandatory object reference.
+        - kind: the kind of the nodes.
+
+        Returns:
+        an iterator over the nodes.
+        """
+
+        code = self.tree.kind_codes.get(kind)
+        if code is None:
+            return iter(())
+        return (node for node, node_code in enumerate(self.tree.kinds) if node_code == code)
+
+    def name(self, token: int) -> str:
+        """Returns the name of the identifier a token refers to.
+
+        Args:
+        - self: mandatory object reference.
+        - token: the index of an identifier token.
+
+        Returns:
+        the name.
+        """
+
+        return self.identifier_name(self.token_list[token].split(", ")[1])
+
+    def identifier(self, node: int) -> Optional[int]:
+        """Returns the identifier token matched directly by a node.
+
+        Args:
+        - self: mandatory object reference.
+        - node: the node.
+
+        Returns:
+        the index of the first identifier token among the children of the
+        node, or None if there is none.
+        """
+
+        tree = self.tree
+        for child in tree.children(node):
+            if tree.kind(child) == "token" and self.token_list[tree.tokens[child]].startswith("<id"):
+                return tree.tokens[child]
+        return None
+
+    def last_token(self, node: int) -> int:
+        """Returns the last token consumed by the end of a subtree.
+
+        Args:
+        - self: mandatory object reference.
+        - node: the root of the subtree.
+
+        Returns:
+        the index of the token.
+        """
+
+        first_child = self.tree.first_child
+        next_sibling = self.tree.next_sibling
+        # the last node of the subtree in preorder is down the last children
+        while first_child[node] != no_node:
+            node = first_child[node]
+            while next_sibling[node] != no_node:
+                node = next_sibling[node]
+        return self.consumed[node] - 1
+
+
+class Symbols:
+    """The declarations of the input, entered in the semantic symbol table
+    the way the parser enters them, and what the table answered for every
+    identifier as the parser reached it, so that the later passes see the
+    names as the parser saw them."""
+
+    def __init__(self, table: SymbolTable, scopes: array) -> None:
+        """Initializes the declarations.
+
+        Args:
+        - self: this object, the one to create. Mandatory object reference.
+        - table: the semantic symbol table to enter the declarations in.
+        - scopes: the scope the parser consumed every token in.
+
+        Returns:
+        None.
+        """
+
+        self.table = table
+        self.scopes = scopes
+        # the type of every identifier used, by token
+        self.types: Dict[int, Optional[str]] = {}
+        # whether every identifier assigned to was declared, by token
+        self.declared: Dict[int, bool] = {}
+        # the declarations not entered: their token, kind, name and scope
+        self.redeclarations: List[Tuple[int, str, str, int]] = []
+
+
+def find_symbols(context: PassContext) -> Symbols:
+    """Analysis pass: enters the declarations in the semantic symbol table
+    and looks up every identifier used, in the scope the parser consumed it
+    in.
+
+    Args:
+    - context: the pass context.
+
+    Returns:
+    the declarations.
+    """
+
+    tree = context.tree
+    table = context.parsing_symb_table
+    symbols = Symbols(table, context.scopes)
+    declared_types = {}
+    token_code = tree.kind_codes.get("token")
+
+    for node, code in enumerate(tree.kinds):
+        if code != token_code:
+            continue
+        token = tree.tokens[node]
+        parent = context.parents[node]
+        kind = tree.kind(parent)
+        tok = context.token_list[token].split(", ")
+        scope = symbols.scopes[token]
+
+        if kind in declaring:
+            if tok[0] == "<dt":
+                declared_types[parent] = tok[1][:-1]
+            elif kind == "pList" and tok[1:] == [",>"]:
+                # every further parameter is typed on its own
+                declared_types[parent] = None
+            elif tok[0] == "<id":
+                name = context.name(token)
+                return_type = declared_types.get(parent)
+                if kind == "program":
+                    table.begin_function()
+                if table.lookup(name, return_type, scope):
+                    symbols.redeclarations.append((token, declaring[kind], name, scope))
+                else:
+                    table.enter(name, return_type, scope, 2 if kind == "program" else 1)
+        elif tok[0] == "<id" and kind in ("f", "assignStmt"):
+            name = context.name(token)
+            symbols.types[token] = table.check_return_type(name, scope)
+            if kind == "assignStmt":
+                symbols.declared[token] = table.lookup(name, symbols.types[token], scope)
+
+    return symbols
+
+
+def infer_types(context: PassContext) -> Tuple[Dict[int, Optional[str]], List[Diagnostic]]:
+    """Analysis pass: infers the type of every expression node the way the
+    parser does and records it in the syntax tree.
+
+    Args:
+    - context: the pass context.
+
+    Returns:
+    the type of every expression node and the type incompatibilities found.
+    """
+
+    tree = context.tree
+    symbols = context.results["symbols"]
+    types = {}
+    incompatible = []
+
+    def child(node: int, kind: str) -> Optional[int]:
+        for found in tree.children(node):
+            if tree.kind(found) == kind:
+                return found
+        return None
+
+    def incompatibility(node: int) -> None:
+        incompatible.append((context.last_token(node), 1, "Type Incompatibility Error!", "Type Incompatibility"))
+
+    def f(node: int) -> Optional[str]:
+        parenthesized = False
+        for nested in tree.children(node):
+            if tree.kind(nested) == "expr":
+                expr(nested)
+            elif tree.kind(nested) == "token" and context.token_list[tree.tokens[nested]] == "<punctuator, (>":
+                parenthesized = True
+        if parenthesized:
+            # the parser types a parenthesized factor by the identifier its
+            # expression starts with, and leaves it untyped otherwise
+            types[node] = symbols.types.get(tree.tokens[tree.first_child[node]] + 1)
+        else:
+            token = context.identifier(node)
+            types[node] = None if token is None else symbols.types[token]
+        return types[node]
+
+    def t_prime(node: int, left_type: Optional[str]) -> Optional[str]:
+        for factor in tree.children(node):
+            if tree.kind(factor) == "f":
+                left_type = result_type(left_type, f(factor), "*")
+                if left_type is None:
+                    incompatibility(factor)
+        types[node] = left_type
+        return left_type
+
+    def t(node: int) -> Optional[str]:
+        factor = child(node, "f")
+        rest = child(node, "tPrime")
+        f_type = None if factor is None else f(factor)
+        types[node] = None if rest is None else t_prime(rest, f_type)
+        return types[node]
+
+    def e_prime(node: int, left_type: Optional[str]) -> Optional[str]:
+        node_type = left_type
+        for term in tree.children(node):
+            if tree.kind(term) == "token" and context.token_list[tree.tokens[term]] == "<+>":
+                node_type = None
+            elif tree.kind(term) == "t":
+                node_type = result_type(left_type, t(term), "+")
+                if node_type is None:
+                    incompatibility(term)
+        types[node] = node_type
+        return node_type
+
+    def expr(node: int) -> Optional[str]:
+        term = child(node, "t")
+        rest = child(node, "ePrime")
+        t_type = None if term is None else t(term)
+        types[node] = None if rest is None else e_prime(rest, t_type)
+        return types[node]
+
+    # the expressions within parentheses are inferred with the enclosing ones
+    for node in context.nodes("expr"):
+        if tree.kind(context.parents[node]) != "f":
+            expr(node)
+
+    for node, node_type in types.items():
+        if node_type is not None:
+            tree.set_type(node, node_type)
+
+    return types, incompatible
+
+
+def check_redeclarations(context: PassContext) -> List[Diagnostic]:
+    """Check pass: reports the variables and functions declared twice in the
+    same scope."""
+
+    return [(token, 0, "Re-declaration Error!", f'{kind} {name} already defined in scope {scope}')
+            for token, kind, name, scope in context.results["symbols"].redeclarations]
+
+
+def check_undeclared(context: PassContext) -> List[Diagnostic]:
+    """Check pass: reports the assignments to undeclared identifiers."""
+
+    symbols = context.results["symbols"]
+    diagnostics = []
+    for node in context.nodes("assignStmt"):
+        token = context.identifier(node)
+        if token is None:
+            continue
+        if not symbols.declared[token]:
+            diagnostics.append((token, 0, "Undeclared Error!", "Undeclared identifier " + context.name(token)))
+    return diagnostics
+
+
+def check_incompatibility(context: PassContext) -> List[Diagnostic]:
+    """Check pass: reports the operands of incompatible types."""
+
+    return context.results["types"][1]
+
+
+def check_assignments(context: PassContext) -> List[Diagnostic]:
+    """Check pass: reports the expressions assigned to identifiers of an
+    incompatible type."""
+
+    tree = context.tree
+    symbols = context.results["symbols"]
+    types = context.results["types"][0]
+    diagnostics = []
+    for node in context.nodes("assignStmt"):
+        token = context.identifier(node)
+        identifier_type = None if token is None else symbols.types[token]
+        # only an expression starting with an identifier is checked
+        for value in tree.children(node):
+            if tree.kind(value) == "expr" and context.token_list[tree.tokens[value]].startswith("<id") \
+                    and not assignable(identifier_type, types[value]):
+                error = "ERROR: Type mismatch in assignment"
+                diagnostics.append((context.last_token(value), 1, error, error))
+    return diagnostics
+
+
+class SemanticPass:
+    """A pass over the syntax tree. Analysis passes compute what other
+    passes need, check passes report diagnostics and can be disabled."""
+
+    def __init__(self, name: str, run: Callable[[PassContext], object], requires: Tuple[str, ...] = (),
+                 check: bool = True) -> None:
+        """Initializes the pass.
+
+        Args:
+        - self: this pass, the one to create. Mandatory object reference.
+        - name: the name of the pass.
+        - run: the function running the pass over a context.
+        - requires: the passes whose results the pass reads.
+        - check: whether the pass reports diagnostics.
+
+        Returns:
+        None.
+        """
+
+        self.name = name
+        self.run = run
+        self.requires = requires
+        self.check = check
+
+
+# in the order their diagnostics are reported for the same token
+semantic_passes = [
+    SemanticPass("symbols", find_symbols, check=False),
+    SemanticPass("types", infer_types, ("symbols",), check=False),
+    SemanticPass("redeclaration", check_redeclarations, ("symbols",)),
+    SemanticPass("undeclared", check_undeclared, ("symbols",)),
+    SemanticPass("incompatibility", check_incompatibility, ("types",)),
+    SemanticPass("assignment", check_assignments, ("symbols", "types")),
+]
+
+
+class PassManager:
+    """Runs the semantic checks as separate passes over the syntax tree of a
+    parser that did not check the semantics inline, i.e. one created with
+    build_tree=True and semantic=False.
+
+    Only the enabled checks and the analyses they need are run, so with every
+    check disabled only the syntax is checked. Passes whose requirements are
+    met run concurrently on up to 'workers' threads, and the time every pass
+    took is kept in 'timings'.
+    """
+
+    def __init__(self, disabled: Iterable[str] = (), workers: int = 1) -> None:
+        """Initializes the pass manager.
+
+        Args:
+        - self: this pass manager, the one to create. Mandatory object
+        reference.
+        - disabled: the names of the checks not to run.
+        - workers: the number of passes that may run at once.
+
+        Returns:
+        None.
+        """
+
+        self.passes = {semantic_pass.name: semantic_pass for semantic_pass in semantic_passes}
+        self.enabled = {name for name, semantic_pass in self.passes.items() if semantic_pass.check}
+        for name in disabled:
+            self.disable(name)
+        self.workers = workers
+        self.timings: Dict[str, float] = {}
+
+    def checks(self) -> List[str]:
+        """Returns the names of every check, enabled or not."""
+
+        return [name for name, semantic_pass in self.passes.items() if semantic_pass.check]
+
+    def enable(self, name: str) -> None:
+        """Enables a check.
+
+        Args:
+        - self: mandatory object reference.
+        - name: the name of the check.
+
+        Returns:
+        None.
+
+        Raises:
+        ValueError: if there is no such check.
+        """
+
+        if name not in self.checks():
+            raise ValueError(f'Unknown check {name}, expected one of {", ".join(self.checks())}')
+        self.enabled.add(name)
+
+    def disable(self, name: str) -> None:
+        """Disables a check.
+
+        Args:
+        - self: mandatory object reference.
+        - name: the name of the check.
+
+        Returns:
+        None.
+
+        Raises:
+        ValueError: if there is no such check.
+        """
+
+        if name not in self.checks():
+            raise ValueError(f'Unknown check {name}, expected one of {", ".join(self.checks())}')
+        self.enabled.discard(name)
+
+    def schedule(self) -> List[List[SemanticPass]]:
+        """Orders the passes to run in waves, every pass running after the
+        passes it requires.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        the waves of passes, the passes of a wave being independent.
+        """
+
+        needed = set()
+        pending = list(self.enabled)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.passes[name].requires)
+
+        waves = []
+        done = set()
+        while len(done) < len(needed):
+            wave = [semantic_pass for name, semantic_pass in self.passes.items()
+                    if name in needed and name not in done and done.issuperset(semantic_pass.requires)]
+            waves.append(wave)
+            done.update(semantic_pass.name for semantic_pass in wave)
+        return waves
+
+    def __timed(self, semantic_pass: SemanticPass, context: PassContext) -> Tuple[object, float]:
+        start = time.perf_counter()
+        result = semantic_pass.run(context)
+        return result, time.perf_counter() - start
+
+    def run(self, parser: Parser, budget: ErrorBudget = None) -> Tuple:
+        """Runs the enabled checks over the syntax tree of a parser and adds
+        their diagnostics to its trace and semantic errors, as if the parser
+        had checked the semantics inline.
+
+        Args:
+        - self: mandatory object reference.
+        - parser: the parser, after parsing with build_tree=True and
+        semantic=False.
+        - budget: the error budget of the analysis, if any. Once the semantic
+        errors use it up no further ones are reported; unlike the inline
+        checks, this does not cut the parse short.
+
+        Returns:
+        the same tuple as Parser.parseToken().
+        """
+
+        context = PassContext(parser)
+        self.timings = {}
+        executor = None
+        if self.workers > 1:
+            # imported on first use, concurrent.futures takes longer to import
+            # than a small file takes to analyze
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(self.workers)
+        try:
+            for wave in self.schedule():
+                if executor is not None and len(wave) > 1:
+                    timed = executor.map(self.__timed, wave, [context] * len(wave))
+                else:
+                    timed = [self.__timed(semantic_pass, context) for semantic_pass in wave]
+                for semantic_pass, (result, seconds) in zip(wave, timed):
+                    context.results[semantic_pass.name] = result
+                    self.timings[semantic_pass.name] = seconds
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        diagnostics = [diagnostic for name, semantic_pass in self.passes.items()
+                       if semantic_pass.check and name in self.enabled for diagnostic in context.results[name]]
+        self.__report(parser, diagnostics, budget)
+        if parser.pool is not None:
+            parser.internResults()
+
+        return parser.parser_trace, parser.error_stream, parser.semantic_errors, parser.parsing_symb_table
+
+    def __report(self, parser: Parser, diagnostics: List[Diagnostic], budget: ErrorBudget) -> None:
+        """Adds the diagnostics to the trace and the semantic errors of a
+        parser in the order the parser would have found them.
+
+        Args:
+        - self: mandatory object reference.
+        - parser: the parser.
+        - diagnostics: the diagnostics of every check.
+        - budget: the error budget of the analysis, if any.
+
+        Returns:
+        None.
+        """
+
+        trace = parser.parser_trace
+        marks = parser.trace_marks
+        line_numbers = parser.line_numbers
+        entries = []
+        stopped = False
+        for token, consumed, entry, error in sorted(diagnostics, key=lambda diagnostic: diagnostic[:2]):
+            # the parser reports on the line of its current token
+            line = line_numbers[min(token + consumed, len(line_numbers) - 1)]
+            entries.append((marks[token] if token < len(marks) else len(trace), entry))
+            parser.semantic_errors.setdefault(line, []).append(error)
+            if budget is not None:
+                try:
+                    budget.record("Semantic")
+                except ErrorBudgetExceeded as exceeded:
+                    parser.semantic_errors[line].append(str(exceeded))
+                    stopped = True
+                    break
+
+        merged = []
+        start = 0
+        for position, entry in entries:
+            merged.extend(trace[start:position])
+            merged.append(entry)
+            start = position
+        merged.extend(trace[start:])
+        if stopped:
+            merged.append("Analysis stopped!")
+        trace[:] = merged
+
+
+# driver code
+if __name__ == "__main__":
+    import argparse
+    from main import lex_lines
+
+    arg_parser = argparse.ArgumentParser(description="Times the semantic checks run inline and as passes.")
+    arg_parser.add_argument("source", help="the source file to analyze")
+    arg_parser.add_argument("--disable", action="append", default=[], help="a check not to run, may be repeated")
+    arg_parser.add_argument("--workers", type=int, default=1, help="the number of passes that may run at once")
+    arg_parser.add_argument("--runs", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with open(args.source) as source:
+        lines = source.readlines()
+    _, symbol_table, _, token_list, line_numbers = lex_lines(lines)
+
+    def best(function) -> float:
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def with_passes() -> Tuple:
+        parser = Parser(token_list, symbol_table, line_numbers=line_numbers, build_tree=True, semantic=False)
+        parser.parseToken()
+        return manager.run(parser)
+
+    manager = PassManager(args.disable, args.workers)
+    inline_time = best(lambda: Parser(token_list, symbol_table, line_numbers=line_numbers).parseToken())
+    syntax_time = best(lambda: Parser(token_list, symbol_table, line_numbers=line_numbers,
+                                      semantic=False).parseToken())
+    passes_time = best(with_passes)
+
+    print(f'{len(token_list)} tokens, checks: {", ".join(sorted(manager.enabled)) or "none"}')
+    print(f'inline checks        {inline_time * 1000:10.2f} ms')
+    print(f'syntax only          {syntax_time * 1000:10.2f} ms')
+    print(f'tree and passes      {passes_time * 1000:10.2f} ms')
+    for name, seconds in manager.timings.items():
+        print(f'  {name:<18} {seconds * 1000:10.2f} ms')
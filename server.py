@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from main import *
+from analysis import diagnostics_to_json, records_to_json, to_json
+from typing import Dict, List, TextIO
+
+
+def warm_up() -> None:
+    """Worker initializer. Runs a throwaway analysis so that every module and
+    specification table is imported and initialized before the first request
+    reaches the worker.
+
+    Args:
+    None.
+
+    Returns:
+    None.
+    """
+
+    analyze(["int abc (int b) {\n", "}"])
+
+
+def analyze_request(params: Dict) -> Dict:
+    """Runs a single analysis request. The source is either given inline as
+    text or read from the indicated path.
+
+    Args:
+    - params: the request parameters, holding either 'source' or 'path' and
+    optionally a 'budget' with the keyword arguments of ErrorBudget.
+
+    Returns:
+    the JSON serializable result of the analysis.
+    """
+
+    if "source" in params:
+        lines = params["source"].splitlines(keepends=True)
+    else:
+        with open(params["path"]) as source:
+            lines = source.readlines()
+
+    budget = ErrorBudget(**params["budget"]) if "budget" in params else None
+    return to_json(*analyze(lines, budget))
+
+
+class AnalysisServer:
+    """A resident analyzer that keeps the lexer and parser warm and answers
+    JSON-RPC requests, one JSON object per line.
+
+    Requests are pipelined: every request read is handed to the worker pool
+    straight away and its response is written as soon as it completes, so
+    responses may arrive out of order and are matched on their 'id'.
+    """
+
+    def __init__(self, workers: int = os.cpu_count() or 1) -> None:
+        """Initializes the server and its worker pool.
+
+        Args:
+        - self: this server, the one to create. Mandatory object reference.
+        - workers: the number of worker processes. Zero analyzes the requests
+        on a thread of the server process instead.
+
+        Returns:
+        None.
+        """
+
+        if workers > 0:
+            self.pool: Executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+        else:
+            warm_up()
+            self.pool = ThreadPoolExecutor(max_workers=1)
+        self.running = True
+
+    def __respond(self, output: TextIO, lock: threading.Condition, response: Dict) -> None:
+        """Writes a single response line to the output stream.
+
+        Args:
+        - self: mandatory object reference.
+        - output: the stream the responses are written to.
+        - lock: guards the output stream against interleaved writes.
+        - response: the response to write.
+
+        Returns:
+        None.
+        """
+
+        response["jsonrpc"] = "2.0"
+        with lock:
+            output.write(json.dumps(response) + "\n")
+            output.flush()
+
+    def __dispatch(self, line: str, output: TextIO, lock: threading.Condition, pending: List[int]) -> None:
+        """Decodes a request line and submits it to the worker pool.
+
+        Args:
+        - self: mandatory object reference.
+        - line: the raw request line.
+        - output: the stream the response is written to.
+        - lock: guards the output stream against interleaved writes.
+        - pending: a single-element counter of the requests still in flight.
+
+        Returns:
+        None.
+        """
+
+        try:
+            request = json.loads(line)
+        except ValueError as err:
+            self.__respond(output, lock, {"id": None, "error": {"code": -32700, "message": str(err)}})
+            return
+        if not isinstance(request, dict):
+            self.__respond(output, lock, {"id": None, "error": {"code": -32600,
+                                                                "message": "Invalid Request: expected an object"}})
+            return
+
+        request_id = request.get("id")
+        method = request.get("method")
+
+        if method == "ping":
+            self.__respond(output, lock, {"id": request_id, "result": "pong"})
+        elif method == "shutdown":
+            self.running = False
+            self.__respond(output, lock, {"id": request_id, "result": None})
+        elif method == "analyze":
+            with lock:
+                pending[0] += 1
+            future = self.pool.submit(analyze_request, request.get("params", {}))
+
+            def done(future) -> None:
+                try:
+                    self.__respond(output, lock, {"id": request_id, "result": future.result()})
+                except Exception as err:
+                    self.__respond(output, lock, {"id": request_id,
+                                                  "error": {"code": -32000, "message": repr(err)}})
+                with lock:
+                    pending[0] -= 1
+                    lock.notify_all()
+
+            future.add_done_callback(done)
+        else:
+            self.__respond(output, lock, {"id": request_id,
+                                          "error": {"code": -32601, "message": f'Unknown method {method}'}})
+
+    def serve(self, requests: TextIO, output: TextIO) -> None:
+        """Reads requests line by line until the stream ends or a shutdown
+        request is received, then waits for the responses still in flight.
+
+        Args:
+        - self: mandatory object reference.
+        - requests: the stream the requests are read from.
+        - output: the stream the responses are written to.
+
+        Returns:
+        None.
+        """
+
+        lock = threading.Condition()
+        pending = [0]
+        for line in requests:
+            if line.strip():
+                self.__dispatch(line, output, lock, pending)
+            if not self.running:
+                break
+
+        with lock:
+            lock.wait_for(lambda: pending[0] == 0)
+
+    def serve_unix(self, path: str) -> None:
+        """Serves requests on a Unix domain socket, each connection speaking
+        the same line-based protocol as the stdin/stdout loop.
+
+        Args:
+        - self: mandatory object reference.
+        - path: the path of the socket to listen on.
+
+        Returns:
+        None.
+        """
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                reader = (line.decode() for line in self.rfile)
+                server.serve(reader, _SocketWriter(self.wfile))
+                if not server.running:
+                    threading.Thread(target=unix_server.shutdown).start()
+
+        if os.path.exists(path):
+            os.unlink(path)
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+            unix_server.serve_forever()
+        os.unlink(path)
+
+    def close(self) -> None:
+        """Waits for the outstanding requests and stops the worker pool.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        self.pool.shutdown(wait=True)
+
+
+class _SocketWriter:
+    """Adapts the binary socket stream to the text interface used when
+    writing responses."""
+
+    def __init__(self, stream) -> None:
+        self.stream = stream
+
+    def write(self, text: str) -> None:
+        self.stream.write(text.encode())
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+# driver code
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Resident TUPLE analyzer.")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="number of worker processes (0 analyzes on a server thread)")
+    arg_parser.add_argument("--socket", help="serve on this Unix domain socket instead of stdin/stdout")
+    args = arg_parser.parse_args()
+
+    analysis_server = AnalysisServer(args.workers)
+    try:
+        if args.socket:
+            analysis_server.serve_unix(args.socket)
+        else:
+            analysis_server.serve(sys.stdin, sys.stdout)
+    finally:
+        analysis_server.close()
@@ -0,0 +1,199 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from main import lex_lines, parse_tokens
+from token_binary import dump_tokens, load_tokens
+from typing import Dict, List, Tuple
+
+
+def open_segment(**kwargs) -> SharedMemory:
+    """Creates or attaches to a shared memory segment that the resource
+    tracker of this process does not unlink when the process exits. The
+    segment is unlinked explicitly by its owner instead, which need not be
+    the process that created it.
+
+    Args:
+    - kwargs: the arguments of SharedMemory.
+
+    Returns:
+    the segment.
+    """
+
+    if sys.version_info >= (3, 13):
+        return SharedMemory(track=False, **kwargs)
+    segment = SharedMemory(**kwargs)
+    if os.name == "posix":
+        # the tracker knows a segment by its name with the leading slash
+        resource_tracker.unregister("/" + segment.name, "shared_memory")
+    return segment
+
+
+def share_tokens(token_list: List[str], line_numbers: List[int], symbol_table: Dict[int, str]) -> str:
+    """Writes the output of the lexer to a new shared memory segment in the
+    binary token stream format. Ownership of the segment passes to the
+    caller, which must release it with release_tokens() once it is parsed.
+
+    Args:
+    - token_list: the tokens for the parser, as returned by lex_lines().
+    - line_numbers: the line of every token.
+    - symbol_table: the lexical symbol table.
+
+    Returns:
+    the name of the segment.
+    """
+
+    data = dump_tokens(token_list, line_numbers, symbol_table)
+    segment = open_segment(create=True, size=len(data))
+    try:
+        segment.buf[:len(data)] = data
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    segment.close()
+
+    return segment.name
+
+
+def attach_tokens(name: str) -> Tuple[List[str], List[int], Dict[int, str]]:
+    """Attaches to a shared memory segment written by share_tokens() and
+    decodes the tokens straight from it. The tokens are not pickled and the
+    segment is not copied as a whole, but they are still built into lists of
+    this process, as the parser indexes them many times over.
+
+    Args:
+    - name: the name of the segment.
+
+    Returns:
+    the tokens for the parser, the line of every token and the lexical
+    symbol table.
+    """
+
+    segment = open_segment(name=name)
+    try:
+        return load_tokens(segment.buf)
+    finally:
+        segment.close()
+
+
+def release_tokens(name: str) -> None:
+    """Frees a shared memory segment written by share_tokens(). Releasing a
+    segment twice is harmless.
+
+    Args:
+    - name: the name of the segment.
+
+    Returns:
+    None.
+    """
+
+    try:
+        segment = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    # unlink() also unregisters the segment from the resource tracker
+    segment.unlink()
+
+
+def lex_to_list(lines: List[str]) -> Tuple[List[str], List[int], Dict[int, str]]:
+    """Benchmark stage: lexes on a worker and sends the tokens back pickled.
+
+    Args:
+    - lines: the lines of the input stream.
+
+    Returns:
+    the tokens for the parser, their lines and the lexical symbol table.
+    """
+
+    _, symbol_table, _, token_list, line_numbers = lex_lines(lines)
+    return token_list, line_numbers, symbol_table
+
+
+def lex_to_segment(lines: List[str]) -> str:
+    """Benchmark stage: lexes on a worker and sends back the name of a
+    shared memory segment holding the tokens.
+
+    Args:
+    - lines: the lines of the input stream.
+
+    Returns:
+    the name of the segment.
+    """
+
+    _, symbol_table, _, token_list, line_numbers = lex_lines(lines)
+    return share_tokens(token_list, line_numbers, symbol_table)
+
+
+def parse_from_list(token_list: List[str], line_numbers: List[int], symbol_table: Dict[int, str]) -> int:
+    """Benchmark stage: parses pickled tokens on a worker.
+
+    Args:
+    - token_list: the tokens for the parser.
+    - line_numbers: the line of every token.
+    - symbol_table: the lexical symbol table.
+
+    Returns:
+    the length of the parser trace.
+    """
+
+    return len(parse_tokens(token_list, symbol_table, line_numbers=line_numbers)[0])
+
+
+def parse_from_segment(name: str) -> int:
+    """Benchmark stage: parses the tokens of a shared memory segment on a
+    worker.
+
+    Args:
+    - name: the name of the segment.
+
+    Returns:
+    the length of the parser trace.
+    """
+
+    token_list, line_numbers, symbol_table = attach_tokens(name)
+    return len(parse_tokens(token_list, symbol_table, line_numbers=line_numbers)[0])
+
+
+# driver code
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compares handing tokens from a lexer pool to a parser "
+                                                     "pool pickled and through shared memory.")
+    arg_parser.add_argument("source", help="the source file to analyze")
+    arg_parser.add_argument("--repeat", type=int, default=100, help="analyze the source this many times over")
+    arg_parser.add_argument("--requests", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    with open(args.source) as source:
+        text = source.read()
+    if not text.endswith("\n"):
+        text += "\n"
+    source_lines = text.splitlines(True) * args.repeat
+
+    # separate pools, so that each side could be scaled on its own
+    with ProcessPoolExecutor(1) as lexer_pool, ProcessPoolExecutor(1) as parser_pool:
+        for pool in (lexer_pool, parser_pool):
+            pool.submit(len, "").result()
+
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            lexed = lexer_pool.submit(lex_to_list, source_lines).result()
+            parser_pool.submit(parse_from_list, *lexed).result()
+        pickled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            name = lexer_pool.submit(lex_to_segment, source_lines).result()
+            try:
+                parser_pool.submit(parse_from_segment, name).result()
+            finally:
+                release_tokens(name)
+        shared = time.perf_counter() - start
+
+    print(f'{len(source_lines)} lines, {args.requests} requests')
+    print(f'pickled         {pickled / args.requests * 1000:10.2f} ms per request')
+    print(f'shared memory   {shared / args.requests * 1000:10.2f} ms per request')
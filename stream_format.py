@@ -0,0 +1,67 @@
+import re
+from typing import Dict
+
+# a run of two or more identical whitespace tokens, starting on a token
+# boundary, and its compact form: <blank><blank><blank> is written <blank*3>.
+# Every '*' of the text of the tokens is written '**', so that a string
+# literal reading <blank*3> is not taken for a run
+whitespace_run = re.compile(r"(?<![^>])(<(blank|tab|newline)>)\1+")
+compact_run = re.compile(r"\*\*|<(blank|tab|newline)\*(\d+)>")
+# the first line of a token stream file in the compact format
+compact_header = "<compact token stream>"
+
+
+class CompactTokenStream(dict):
+    """A token stream (by line) whose lines are in the compact format."""
+
+
+def compact_tokens(line: str) -> str:
+    """Run-length encodes the repeated whitespace tokens of a line of the
+    token stream.
+
+    Args:
+    - line: the tokenized lexemes of a line.
+
+    Returns:
+    the line with every run of repeated whitespace tokens as a single token.
+    """
+
+    line = line.replace("*", "**")
+    return whitespace_run.sub(lambda run: f'<{run.group(2)}*{len(run.group(0)) // len(run.group(1))}>', line)
+
+
+def expand_tokens(line: str) -> str:
+    """Expands the run-length encoded whitespace tokens of a line of the
+    token stream in the compact format.
+
+    Args:
+    - line: the tokenized lexemes of a line, in the compact format.
+
+    Returns:
+    the line in the verbose format.
+    """
+
+    if "*" not in line:
+        return line
+    return compact_run.sub(lambda run: "*" if run.group(1) is None else f'<{run.group(1)}>' * int(run.group(2)),
+                           line)
+
+
+def read_token_stream(path: str) -> Dict[int, str]:
+    """Reads a token stream file written in either format, telling the
+    compact one by its header line.
+
+    Args:
+    - path: the path to the token stream file.
+
+    Returns:
+    the tokenized lexemes in the verbose format, keyed by their line in the
+    file. Lines without tokens are not written, so these need not match the
+    lines of the source.
+    """
+
+    with open(path) as stream:
+        lines = stream.read().split('\n')
+    if lines[0] != compact_header:
+        return dict(enumerate(lines))
+    return {ix: expand_tokens(line) for ix, line in enumerate(lines[1:])}
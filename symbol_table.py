@@ -1,5 +1,17 @@
+# the scope maps are 32-way tries: every level indexes five bits of a key,
+# and an update copies only the nodes on the path to its leaf, sharing the
+# rest with the map it was made from
+trie_bits = 5
+trie_width = 1 << trie_bits
+trie_mask = trie_width - 1
+empty_node = (None,) * trie_width
+
+
 class Record:
-    ''''A record in the symbol table'''
+    ''''A record in the symbol table. Records have no per-instance
+    dictionary, as a table may hold hundreds of thousands of them.'''
+
+    __slots__ = ("name", "return_type", "scope", "size")
     
     def __init__(self, name, return_type, scope, size):
         '''Initializes a record in the symbol table.
@@ -19,20 +31,283 @@ class Record:
         self.scope = scope
         self.size = size
 
+class ScopeMap:
+    '''A persistent map from small integer keys to values. Maps are never
+    changed: setting a key makes a new map sharing all but a few nodes with
+    the old one, so keeping an old map around costs nothing.'''
+
+    __slots__ = ("root", "depth")
+
+    def __init__(self, root=None, depth=0):
+        '''Initializes a map.
+
+        Args:
+        - root: the root node of the trie, None for the empty map.
+        - depth: the number of levels above the leaves.
+
+        Returns:
+        None.
+        '''
+
+        self.root = root
+        self.depth = depth
+
+    def get(self, key, default=None):
+        ''' Returns the value of a key.
+
+        Args:
+        - key: the key, a non-negative integer.
+        - default: the value of keys that are not in the map.
+
+        Returns:
+        - the value of the key.
+        '''
+
+        if key >> ((self.depth + 1) * trie_bits):
+            return default
+        node = self.root
+        for level in range(self.depth, -1, -1):
+            if node is None:
+                return default
+            node = node[(key >> (level * trie_bits)) & trie_mask]
+        return default if node is None else node
+
+    def set(self, key, value):
+        ''' Returns a map with the value of a key set.
+
+        Args:
+        - key: the key, a non-negative integer.
+        - value: the value, not None.
+
+        Returns:
+        - the new map.
+        '''
+
+        root = self.root
+        depth = self.depth
+        while key >> ((depth + 1) * trie_bits):
+            root = None if root is None else (root,) + empty_node[1:]
+            depth += 1
+        return ScopeMap(self.__set(root, depth, key, value), depth)
+
+    @staticmethod
+    def __set(node, level, key, value):
+        ''' Copies the path to the leaf of a key, setting its value.
+
+        Args:
+        - node: the node at the given level, None if it is empty.
+        - level: the level of the node above the leaves.
+        - key: the key.
+        - value: the value.
+
+        Returns:
+        - the copied node.
+        '''
+
+        if node is None:
+            node = empty_node
+        ix = (key >> (level * trie_bits)) & trie_mask
+        child = value if level == 0 else ScopeMap.__set(node[ix], level - 1, key, value)
+        return node[:ix] + (child,) + node[ix + 1:]
+
+    def values(self):
+        ''' Iterates over the values of the map, in the order of their keys.
+
+        Args:
+        None.
+
+        Returns:
+        - an iterator over the values.
+        '''
+
+        pending = [(self.root, self.depth)]
+        while pending:
+            node, level = pending.pop()
+            if node is None:
+                continue
+            if level == 0:
+                yield from (value for value in node if value is not None)
+            else:
+                pending.extend((child, level - 1) for child in reversed(node))
+
+
+class SymbolSnapshot:
+    '''The state of a symbol table at some point, taken in constant time.'''
+
+    __slots__ = ("names", "count", "last", "function_start")
+
+    def __init__(self, names, count, last, function_start):
+        '''Initializes a snapshot.
+
+        Args:
+        - names: the scope map of the table.
+        - count: the number of records in the table.
+        - last: the last record of the table, None if it is empty.
+        - function_start: the position of the first record of the function
+        being analyzed.
+
+        Returns:
+        None.
+        '''
+
+        self.names = names
+        self.count = count
+        self.last = last
+        self.function_start = function_start
+
+
 class SymbolTable:
-    '''A symbol table'''
+    '''A symbol table. The records are kept in order in 'table', and by name
+    in a persistent scope map, which the queries use and which snapshot()
+    captures in constant time.'''
 
-    def __init__(self):
+    def __init__(self, pool=None):
         '''Initializes a symbol table.
         
         Args:
-        None.
+        - pool: the interning pool to take the names and return types of
+        the records from, if any.
 
         Returns:
         None.
         '''
         
         self.table = []
+        self.function_start = 0
+        self.pool = pool
+        # the records by name id, each name's as a persistent list of
+        # (position, record, rest) links, the last entered first
+        self.names = ScopeMap()
+        self.name_ids = {}
+        self.indexed = 0
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __iter__(self):
+        return iter(self.table)
+
+    @staticmethod
+    def __entries(link):
+        ''' Iterates over a list of records, as kept in the scope map.
+
+        Args:
+        - link: the first link of the list, None if it is empty.
+
+        Returns:
+        - an iterator over the positions and records, the last entered first.
+        '''
+
+        while link is not None:
+            ix, record, link = link
+            yield ix, record
+
+    def __records(self, name):
+        ''' Iterates over the records of a name, indexing any records
+        appended to 'table' directly first.
+
+        Args:
+        - name: the name.
+
+        Returns:
+        - an iterator over the positions and records of the name, the last
+        entered first.
+        '''
+
+        if self.indexed != len(self.table):
+            self.__index()
+        name_id = self.name_ids.get(name)
+        return self.__entries(None if name_id is None else self.names.get(name_id))
+
+    def __index(self) -> None:
+        ''' Adds the records of 'table' past the indexed ones to the scope map,
+        indexing it anew if records were removed.
+
+        Args:
+        None.
+
+        Returns:
+        None.
+        '''
+
+        if self.indexed > len(self.table):
+            self.names = ScopeMap()
+            self.indexed = 0
+        names = self.names
+        for ix in range(self.indexed, len(self.table)):
+            record = self.table[ix]
+            name_id = self.name_ids.setdefault(record.name, len(self.name_ids))
+            names = names.set(name_id, (ix, record, names.get(name_id)))
+        self.names = names
+        self.indexed = len(self.table)
+
+    def snapshot(self) -> SymbolSnapshot:
+        ''' Takes a snapshot of the table, in constant time: the scope map is
+        persistent and records are only ever appended.
+
+        Args:
+        None.
+
+        Returns:
+        - the snapshot.
+        '''
+
+        if self.indexed != len(self.table):
+            self.__index()
+        return SymbolSnapshot(self.names, len(self.table), self.table[-1] if self.table else None,
+                              self.function_start)
+
+    def restore(self, snapshot) -> None:
+        ''' Brings the table back to a snapshot of it, taken before or after
+        the current state, or on another branch of edits.
+
+        Args:
+        - snapshot: the snapshot.
+
+        Returns:
+        None.
+        '''
+
+        count = snapshot.count
+        if len(self.table) >= count and (count == 0 or self.table[count - 1] is snapshot.last):
+            # the snapshot was taken earlier on the current branch
+            del self.table[count:]
+        else:
+            entries = [entry for link in snapshot.names.values() for entry in self.__entries(link)]
+            entries.sort(key=lambda entry: entry[0])
+            self.table[:] = [record for _, record in entries]
+        self.names = snapshot.names
+        self.indexed = count
+        self.function_start = snapshot.function_start
+
+    def __visible(self, ix, record) -> bool:
+        ''' Checks if a record can be seen from the function being analyzed.
+        Functions are global, everything else is local to the function that
+        declared it.
+
+        Args:
+        - ix: the position of the record in the table.
+        - record: the record to check.
+
+        Returns:
+        - True: if the record is visible.
+        - False: if the record belongs to an earlier function.
+        '''
+
+        return ix >= self.function_start or record.size == 2
+
+    def begin_function(self) -> None:
+        ''' Marks the start of a new function definition, hiding the locals
+        of the earlier functions.
+
+        Args:
+        None.
+
+        Returns:
+        None.
+        '''
+
+        self.function_start = len(self.table)
 
     def lookup(self, name, return_type, scope) -> bool:
         ''' Looks up a symbol in the symbol table.
@@ -47,14 +322,8 @@ class SymbolTable:
         - False: if the symbol is not in the symbol table.
         '''
 
-        if len(self.table) > 0:
-            for record in self.table:
-                if record.name == name and record.return_type == return_type and record.scope == scope:
-                    return True
-            return False
-
-        else:
-            return False
+        return any(record.return_type == return_type and record.scope == scope and self.__visible(ix, record)
+                   for ix, record in self.__records(name))
 
     def enter(self, name, return_type, scope, size) -> None:
         ''' Enters a symbol into the symbol table.
@@ -69,6 +338,10 @@ class SymbolTable:
         None.
         '''
 
+        if self.pool is not None:
+            name = self.pool.intern(name)
+            if return_type is not None:
+                return_type = self.pool.intern(return_type)
         self.table.append(Record(name, return_type, scope, size))
 
     def check_return_type(self, name, scope) -> str:
@@ -82,14 +355,13 @@ class SymbolTable:
         - return_type: the return type of the symbol.
         '''
 
-        if len(self.table) > 0:
-            for record in self.table:
-                if record.name == name and record.scope == scope:
-                    return record.return_type
-                elif record.name == name and record.scope != scope:
-                    if record.scope == 0:
-                        return record.return_type
-            return None
+        # the first record entered wins, and the records are kept the last
+        # entered first
+        return_type = None
+        for ix, record in self.__records(name):
+            if self.__visible(ix, record) and (record.scope == scope or record.scope == 0):
+                return_type = record.return_type
+        return return_type
 
     def print_table(self) -> None:
         ''' Prints the symbol table.
@@ -105,4 +377,69 @@ class SymbolTable:
             print("record name: ", record.name)
             print("record return type: ", record.return_type)
             print("record scope: ", record.scope)
-            print("record size: ", record.size)
\ No newline at end of file
+            print("record size: ", record.size)
+
+# driver code
+if __name__ == "__main__":
+    import argparse
+    import time
+    import tracemalloc
+
+    arg_parser = argparse.ArgumentParser(description="Compares the memory of slotted symbol table records to "
+                                                     "records with a per-instance dictionary, and the cost of "
+                                                     "snapshots to copies of the table.")
+    arg_parser.add_argument("--records", type=int, default=200000)
+    arg_parser.add_argument("--scopes", type=int, default=2000, help="take this many snapshots while filling a table")
+    args = arg_parser.parse_args()
+
+    class DictRecord:
+        '''A record with a per-instance dictionary, as Record was.'''
+
+        def __init__(self, name, return_type, scope, size):
+            self.name = name
+            self.return_type = return_type
+            self.scope = scope
+            self.size = size
+
+    # the names are made up front, so that only the records are measured
+    names = [f'name{ix}' for ix in range(args.records)]
+    types = ["int", "float", "char"]
+
+    measured = {}
+    for record_class in (DictRecord, Record):
+        tracemalloc.start()
+        table = SymbolTable()
+        table.table.extend(record_class(name, types[ix % 3], ix % 4, 1) for ix, name in enumerate(names))
+        measured[record_class.__name__] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del table
+
+    print(f'{args.records} records')
+    for title, size in measured.items():
+        print(f'{title:<12} {size / 1024 / 1024:8.2f} MiB  {size / args.records:6.1f} bytes per record')
+
+    # a snapshot at every scope entry, against a copy of the records and of
+    # the function start at every scope entry; timed apart from measuring the
+    # memory, as tracing allocations slows the snapshots down most
+    every = max(1, args.records // args.scopes)
+
+    def fill(save) -> list:
+        table = SymbolTable()
+        saved = []
+        for ix, name in enumerate(names):
+            table.enter(name, types[ix % 3], ix % 4, 1)
+            if ix % every == 0:
+                saved.append(save(table))
+        return saved
+
+    for title, save in (("copies", lambda table: (list(table.table), table.function_start)),
+                        ("snapshots", SymbolTable.snapshot)):
+        start = time.perf_counter()
+        fill(save)
+        seconds = time.perf_counter() - start
+        tracemalloc.start()
+        saved = fill(save)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f'{len(saved)} {title:<10} {seconds * 1000:10.1f} ms  {size / 1024 / 1024:8.2f} MiB')
+        del saved
@@ -0,0 +1,366 @@
+import struct
+import time
+import zlib
+from array import array
+from token_binary import uint_bytes, read_uints, string_table, read_string_table
+from typing import Iterator, List, Optional, Tuple
+
+# file layout, all integers little endian:
+#   header       magic, version, node count, kind count, type count, payload
+#                size, payload crc32, header crc32
+#   payload      kinds        string table of the node kinds, e.g. 'ifStmt'
+#                types        string table of the inferred types, e.g. 'int'
+#                columns      the kind code, first child, next sibling, token
+#                             index and type code of every node, one column
+#                             after the other
+# Absent children, siblings, tokens and types are written as no_node.
+magic = b"TPLA"
+version = 1
+header_format = struct.Struct("<4sHIIIII")
+header_crc_format = struct.Struct("<I")
+header_size = header_format.size + header_crc_format.size
+no_node = 0xFFFFFFFF
+
+
+class TreeFormatError(Exception):
+    """Raised when a serialized syntax tree is malformed, corrupted or of an
+    unsupported version."""
+
+
+class SyntaxTree:
+    """A syntax tree stored in flat parallel arrays instead of one Python
+    object per node. Nodes are numbered in the order they are added, which is
+    a preorder of the tree, and the root is node 0.
+
+    Every node has a kind, its first child and its next sibling, the index in
+    the parser's token list of the token it starts at and the type inferred
+    for it, if any. Token leaves have the kind 'token'.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty tree.
+
+        Args:
+        - self: this tree, the one to create. Mandatory object reference.
+
+        Returns:
+        None.
+        """
+
+        self.kinds = array("I")
+        self.first_child = array("I")
+        self.next_sibling = array("I")
+        self.tokens = array("I")
+        self.types = array("I")
+        self.kind_names: List[str] = []
+        self.type_names: List[str] = []
+        self.kind_codes = {}
+        self.type_codes = {}
+        # only needed while the tree is built, to append children in order
+        self.last_child = array("I")
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(self, kind: str, token: Optional[int] = None, parent: int = no_node) -> int:
+        """Adds a node as the last child of the given parent.
+
+        Args:
+        - self: mandatory object reference.
+        - kind: the kind of the node, e.g. the name of a production.
+        - token: the index of the token the node starts at, if any.
+        - parent: the parent node, or no_node for the root.
+
+        Returns:
+        the new node.
+        """
+
+        if self.last_child is None:
+            raise ValueError("A loaded syntax tree is read only")
+        code = self.kind_codes.get(kind)
+        if code is None:
+            code = self.kind_codes[kind] = len(self.kind_names)
+            self.kind_names.append(kind)
+
+        node = len(self.kinds)
+        self.kinds.append(code)
+        self.first_child.append(no_node)
+        self.next_sibling.append(no_node)
+        self.tokens.append(no_node if token is None else token)
+        self.types.append(no_node)
+        self.last_child.append(no_node)
+
+        if parent != no_node:
+            previous = self.last_child[parent]
+            if previous == no_node:
+                self.first_child[parent] = node
+            else:
+                self.next_sibling[previous] = node
+            self.last_child[parent] = node
+
+        return node
+
+    def set_type(self, node: int, node_type: str) -> None:
+        """Records the type inferred for a node.
+
+        Args:
+        - self: mandatory object reference.
+        - node: the node.
+        - node_type: the type, e.g. 'int'.
+
+        Returns:
+        None.
+        """
+
+        code = self.type_codes.get(node_type)
+        if code is None:
+            code = self.type_codes[node_type] = len(self.type_names)
+            self.type_names.append(node_type)
+        self.types[node] = code
+
+    def kind(self, node: int) -> str:
+        """Returns the kind of a node."""
+
+        return self.kind_names[self.kinds[node]]
+
+    def type(self, node: int) -> Optional[str]:
+        """Returns the type inferred for a node, or None if there is none."""
+
+        code = self.types[node]
+        return None if code == no_node else self.type_names[code]
+
+    def token(self, node: int) -> Optional[int]:
+        """Returns the index of the token a node starts at, or None if there
+        is none."""
+
+        token = self.tokens[node]
+        return None if token == no_node else token
+
+    def children(self, node: int) -> Iterator[int]:
+        """Iterates over the children of a node in order.
+
+        Args:
+        - self: mandatory object reference.
+        - node: the node.
+
+        Returns:
+        an iterator over the children.
+        """
+
+        child = self.first_child[node]
+        while child != no_node:
+            yield child
+            child = self.next_sibling[child]
+
+    def walk(self, node: int = 0) -> Iterator[Tuple[int, int]]:
+        """Iterates over a subtree in preorder, without recursing, so that
+        deeply nested trees can be walked too.
+
+        Args:
+        - self: mandatory object reference.
+        - node: the root of the subtree.
+
+        Returns:
+        an iterator over every node of the subtree and its depth below the
+        root of the subtree.
+        """
+
+        if not len(self):
+            return
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        pending = [(node, 0)]
+        while pending:
+            node, depth = pending.pop()
+            yield node, depth
+            child = first_child[node]
+            children = []
+            while child != no_node:
+                children.append((child, depth + 1))
+                child = next_sibling[child]
+            pending.extend(reversed(children))
+
+    def parents(self) -> array:
+        """Returns the parent of every node, no_node for the root.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        the parents, indexed by node.
+        """
+
+        parents = array("I", [no_node]) * len(self)
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        for node in range(len(self)):
+            child = first_child[node]
+            while child != no_node:
+                parents[child] = node
+                child = next_sibling[child]
+        return parents
+
+    def nbytes(self) -> int:
+        """Returns the size of the node columns in bytes."""
+
+        return sum(column.itemsize * len(column)
+                   for column in (self.kinds, self.first_child, self.next_sibling, self.tokens, self.types))
+
+    def dump(self) -> bytes:
+        """Serializes the tree.
+
+        Args:
+        - self: mandatory object reference.
+
+        Returns:
+        the serialized tree.
+        """
+
+        payload = b"".join((string_table(self.kind_names),
+                            string_table(self.type_names),
+                            uint_bytes(self.kinds),
+                            uint_bytes(self.first_child),
+                            uint_bytes(self.next_sibling),
+                            uint_bytes(self.tokens),
+                            uint_bytes(self.types)))
+
+        header = header_format.pack(magic, version, len(self), len(self.kind_names), len(self.type_names),
+                                    len(payload), zlib.crc32(payload))
+        return header + header_crc_format.pack(zlib.crc32(header)) + payload
+
+    @classmethod
+    def load(cls, buffer) -> "SyntaxTree":
+        """Deserializes a tree, verifying its header and checksums. The loaded
+        tree is read only.
+
+        Args:
+        - cls: the tree class.
+        - buffer: the serialized tree, any object supporting the buffer
+        protocol.
+
+        Returns:
+        the tree.
+
+        Raises:
+        TreeFormatError: if the tree is malformed, corrupted or of an
+        unsupported version.
+        """
+
+        buffer = memoryview(buffer)
+        if len(buffer) < header_size:
+            raise TreeFormatError("Truncated header")
+        header = buffer[:header_format.size]
+        tree_magic, tree_version, node_count, kind_count, type_count, payload_size, payload_crc = \
+            header_format.unpack(header)
+        if tree_magic != magic:
+            raise TreeFormatError("Not a serialized syntax tree")
+        if header_crc_format.unpack(buffer[header_format.size:header_size])[0] != zlib.crc32(header):
+            raise TreeFormatError("Header checksum mismatch")
+        if tree_version != version:
+            raise TreeFormatError(f'Unsupported version {tree_version}, expected {version}')
+
+        payload = buffer[header_size:header_size + payload_size]
+        if len(payload) != payload_size:
+            raise TreeFormatError(f'Payload is {len(payload)} bytes, expected {payload_size}')
+        if zlib.crc32(payload) != payload_crc:
+            raise TreeFormatError("Payload checksum mismatch")
+
+        tree = cls()
+        try:
+            tree.kind_names, offset = read_string_table(payload, 0, kind_count)
+            tree.type_names, offset = read_string_table(payload, offset, type_count)
+        except (TypeError, ValueError):
+            raise TreeFormatError("Malformed string table") from None
+        if len(payload) - offset != 5 * 4 * node_count:
+            raise TreeFormatError(f'Node columns are {len(payload) - offset} bytes, expected {5 * 4 * node_count}')
+        tree.kind_codes = {kind: code for code, kind in enumerate(tree.kind_names)}
+        tree.type_codes = {node_type: code for code, node_type in enumerate(tree.type_names)}
+        for column in ("kinds", "first_child", "next_sibling", "tokens", "types"):
+            setattr(tree, column, array("I", read_uints(payload[offset:offset + 4 * node_count])))
+            offset += 4 * node_count
+        tree.last_child = None
+
+        return tree
+
+    def write(self, path: str) -> None:
+        """Writes the serialized tree to a file.
+
+        Args:
+        - self: mandatory object reference.
+        - path: the path of the file.
+
+        Returns:
+        None.
+        """
+
+        with open(path, "wb") as stream:
+            stream.write(self.dump())
+
+    @classmethod
+    def read(cls, path: str) -> "SyntaxTree":
+        """Reads a serialized tree from a file.
+
+        Args:
+        - cls: the tree class.
+        - path: the path of the file.
+
+        Returns:
+        the tree.
+        """
+
+        with open(path, "rb") as stream:
+            return cls.load(stream.read())
+
+
+# driver code
+if __name__ == "__main__":
+    import argparse
+    import tracemalloc
+    from main import lex_lines
+    from rd_parser import Parser
+
+    arg_parser = argparse.ArgumentParser(description="Builds the syntax tree of a source file and compares its "
+                                                     "size to one Python object per node.")
+    arg_parser.add_argument("source", help="the source file to parse")
+    arg_parser.add_argument("--output", default="tree.bin", help="the serialized tree to write")
+    arg_parser.add_argument("--print", action="store_true", help="print the tree")
+    args = arg_parser.parse_args()
+
+    with open(args.source) as source:
+        lines = source.readlines()
+    _, symbol_table, _, token_list, line_numbers = lex_lines(lines)
+
+    start = time.perf_counter()
+    Parser(token_list, symbol_table, line_numbers=line_numbers).parseToken()
+    parse_time = time.perf_counter() - start
+    start = time.perf_counter()
+    parser = Parser(token_list, symbol_table, line_numbers=line_numbers, build_tree=True)
+    parser.parseToken()
+    tree_time = time.perf_counter() - start
+    tree = parser.tree
+
+    if args.print:
+        for node, depth in tree.walk():
+            token = tree.token(node)
+            text = token_list[token] if tree.kind(node) == "token" else ""
+            print(f'{"  " * depth}{tree.kind(node)} {text} {tree.type(node) or ""}'.rstrip())
+
+    tree.write(args.output)
+    loaded = SyntaxTree.read(args.output)
+    assert loaded.dump() == tree.dump() and list(loaded.walk()) == list(tree.walk())
+
+    # the same nodes as one dict per node, linked by child lists
+    tracemalloc.start()
+    objects = [{"kind": tree.kind(node), "token": tree.token(node), "type": tree.type(node), "children": []}
+               for node in range(len(tree))]
+    for node in range(len(tree)):
+        objects[node]["children"].extend(objects[child] for child in tree.children(node))
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f'{len(token_list)} tokens, {len(tree)} nodes')
+    print(f'parsing              {parse_time * 1000:10.2f} ms')
+    print(f'parsing with tree    {tree_time * 1000:10.2f} ms')
+    print(f'array columns        {tree.nbytes():10d} bytes')
+    print(f'serialized           {len(tree.dump()):10d} bytes')
+    print(f'object per node      {object_bytes:10d} bytes')
@@ -0,0 +1,71 @@
+import io
+import json
+import os
+
+import pytest
+
+from analysis import FileSink, JsonLinesSink, NullSink, StreamSink, analyze_source, sink_types
+from main import analyze
+
+root = os.path.join(os.path.dirname(__file__), "..")
+outputs = [("TokenStream", "out"), ("SymbolTable", "sym"), ("ErrorStream", "err"), ("ParserTrace", "tr"),
+           ("SemanticSymbolTable", "sym")]
+
+
+def read(*path: str) -> str:
+    with open(os.path.join(*path)) as stream:
+        return stream.read()
+
+
+@pytest.mark.parametrize("name", ["test01", "test02", "test03"])
+def test_file_sink_writes_the_files_main_writes(tmp_path, name):
+    analyze_source(read(root, "Tests", f'{name}.tpl'), name, [FileSink(str(tmp_path))])
+
+    for folder, extension in outputs:
+        assert read(tmp_path, folder, f'{name}.{extension}') == read(root, folder, f'{name}.{extension}'), folder
+
+
+def test_stream_sink_writes_every_section():
+    stream = io.StringIO()
+    result = analyze_source("int f() {\n    a = 1;\n}\n", "f", [StreamSink(stream)])
+
+    headers = [line for line in stream.getvalue().splitlines() if line.startswith("== ")]
+    assert headers == ["== f: Token Stream ==", "== f: Symbol Table ==", "== f: Parser Trace ==",
+                       "== f: Semantic Symbol Table ==", "== f: Errors =="]
+    assert result.error_count() > 0
+    errors = io.StringIO()
+    result.dump_errors(errors)
+    assert stream.getvalue().endswith("== f: Errors ==\n" + errors.getvalue())
+
+
+def test_json_lines_sink_writes_a_line_per_result():
+    stream = io.StringIO()
+    sink = JsonLinesSink(stream)
+    first = analyze_source("int f() {\n}\n", "first", [sink])
+    second = analyze_source("float g(int a) {\n}\n", "second", [sink])
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [first.to_json(), second.to_json()]
+    assert json.loads(lines[1])["semantic_symbol_table"][0]["name"] == "g"
+
+
+def test_stdout_is_the_default_stream(capsys):
+    analyze_source("int f() {\n}\n", "f", [JsonLinesSink(), StreamSink()])
+
+    out = capsys.readouterr().out
+    assert json.loads(out.splitlines()[0])["name"] == "f"
+    assert "== f: Token Stream ==" in out
+
+
+def test_null_sink_and_no_sinks_write_nothing(capsys):
+    source = "int f(int a) {\n    a = a + 1;\n}\n"
+    with_null = analyze_source(source, "f", [NullSink()])
+    without = analyze_source(source)
+
+    assert capsys.readouterr().out == ""
+    assert with_null.to_json() == dict(without.to_json(), name="f")
+    assert with_null.astuple()[:6] == analyze(source.splitlines(True))[:6]
+
+
+def test_sinks_are_selectable_by_name():
+    assert sink_types == {"file": FileSink, "stdout": StreamSink, "jsonl": JsonLinesSink, "null": NullSink}
@@ -0,0 +1,47 @@
+import asyncio
+import os
+
+import pytest
+
+from async_service import AnalysisService
+
+shm = "/dev/shm"
+small = ["int f(int a) {\n", " a = a + a;\n", "}\n"]
+# lexing takes far longer than the timeouts below
+large = ["int f(int a) {\n"] + [" a = a + a * a;\n"] * 20000 + ["}\n"]
+
+
+def segments():
+    return {name for name in os.listdir(shm) if name.startswith("psm_")}
+
+
+def test_results_with_and_without_shared_memory_agree():
+    async def run(shared_memory):
+        service = AnalysisService(workers=1, shared_memory=shared_memory)
+        try:
+            return await service.analyze(small)
+        finally:
+            service.close()
+
+    assert asyncio.run(run(True)) == asyncio.run(run(False))
+
+
+@pytest.mark.skipif(not os.path.isdir(shm), reason="no /dev/shm to count the segments in")
+def test_no_segment_leaks_when_lexing_times_out():
+    before = segments()
+
+    async def run():
+        service = AnalysisService(workers=1, shared_memory=True)
+        try:
+            # start the worker, so that the requests below time out while lexing
+            await service.analyze(small)
+            for _ in range(3):
+                with pytest.raises(asyncio.TimeoutError):
+                    await service.analyze(large, timeout=0.05)
+                # let the abandoned stage finish before the next request
+                await asyncio.sleep(1.5)
+        finally:
+            service.close()
+
+    asyncio.run(run())
+    assert segments() - before == set()
@@ -0,0 +1,21 @@
+from compatibility_spec import assignable, result_type
+
+
+def test_unknown_types_are_compared_by_value():
+    # a type name sliced from a token is a new string every time
+    target = "<dt, string>".split(", ")[1][:-1]
+    value = "".join(["str", "ing"])
+
+    assert target is not value
+    assert assignable(target, value)
+    assert not assignable(target, "int")
+    assert assignable(None, None)
+    assert not assignable(None, "int")
+
+
+def test_known_types_follow_the_tables():
+    assert assignable("int", "int")
+    assert not assignable("int", "float")
+    assert result_type("int", "float", "*") == "float"
+    assert result_type("int", "float", "+") is None
+    assert result_type("int", None, "+") is None
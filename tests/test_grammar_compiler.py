@@ -0,0 +1,55 @@
+import warnings
+
+import pytest
+
+from grammar_compiler import compile_grammar, grammar_path, load_tables, write_tables
+
+
+def read_grammar_text():
+    with open(grammar_path, encoding="utf-8") as stream:
+        return stream.read()
+
+
+def test_grammar_is_ll1():
+    assert compile_grammar(read_grammar_text())[1] == []
+
+
+def test_committed_tables_are_up_to_date():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        load_tables()
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_tables_of_a_grammar_with_other_line_endings_are_not_stale(tmp_path, newline):
+    grammar = tmp_path / "tuple.grammar"
+    tables = tmp_path / "parser_tables.marshal"
+    with open(grammar, "w", encoding="utf-8", newline=newline) as stream:
+        stream.write(read_grammar_text())
+    with open(grammar, encoding="utf-8") as stream:
+        write_tables(compile_grammar(stream.read())[0], str(tables))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        loaded = load_tables(str(tables), str(grammar))
+    assert loaded["first"] == load_tables()["first"]
+
+
+def test_stale_tables_are_recompiled(tmp_path):
+    grammar = tmp_path / "tuple.grammar"
+    tables = tmp_path / "parser_tables.marshal"
+    grammar.write_text(read_grammar_text(), encoding="utf-8")
+    write_tables(compile_grammar("program -> dt\n")[0], str(tables))
+    grammar.write_text(read_grammar_text() + "\n# changed\n", encoding="utf-8")
+
+    with pytest.warns(UserWarning, match="stale"):
+        loaded = load_tables(str(tables), str(grammar))
+    assert "function" in loaded["first"]
+
+
+def test_a_program_is_a_sequence_of_definitions():
+    tables = compile_grammar(read_grammar_text())[0]
+    assert tables["first"]["program"] == {"<dt"}
+    assert tables["follow"]["program"] == {"<$>"}
+    # a definition is followed by another one or by the end of the stream
+    assert tables["follow"]["function"] == {"<dt", "<$>"}
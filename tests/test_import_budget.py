@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from import_budget import import_budgets, import_times, lazy_modules
+
+root = os.path.join(os.path.dirname(__file__), "..")
+
+
+@pytest.mark.parametrize("module", list(import_budgets))
+def test_entry_point_does_not_import_lazy_modules(module):
+    imported = import_times(module)
+
+    assert module in imported
+    assert [name for name in lazy_modules if name in imported] == []
+
+
+def test_lazy_modules_are_imported_on_first_use():
+    script = ("import sys\n"
+              "from main import lex_lines\n"
+              "from rd_parser import Parser\n"
+              "assert 'syntax_tree' not in sys.modules\n"
+              "_, symbol_table, _, token_list, line_numbers = lex_lines(['int main() {\\n', '}\\n'])\n"
+              "parser = Parser(token_list, symbol_table, line_numbers=line_numbers, build_tree=True)\n"
+              "parser.parseToken()\n"
+              "print(type(parser.tree).__module__)\n")
+    completed = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True)
+
+    assert completed.stdout.strip() == "syntax_tree"
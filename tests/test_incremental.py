@@ -0,0 +1,70 @@
+import re
+
+from incremental import LexedSource
+from main import lex_lines
+
+source = ["int main(int a, float b) {\n", "    int c;\n", "    c = a + b;\n", "    @\n", "}\n"]
+
+
+def fresh(lines: list) -> tuple:
+    token_stream, symbol_table, error_stream, _, _ = lex_lines(lines)
+    return token_stream, error_stream, symbol_table
+
+
+def by_name(token_stream: dict, symbol_table: dict) -> dict:
+    """The token stream with every identifier id replaced by its name."""
+
+    def name(match) -> str:
+        return f'<id, {symbol_table[int(match.group(1))].split(", ")[0]}>'
+
+    return {line: re.sub(r"<id, (\d+)>", name, tokens) for line, tokens in token_stream.items()}
+
+
+def apply(lines: list, edits: list) -> list:
+    lines = list(lines)
+    for start, end, new_lines in sorted(edits, reverse=True):
+        lines[start:end] = new_lines
+    return lines
+
+
+def test_unedited_source_equals_a_fresh_lex():
+    lexed = LexedSource(source)
+    assert (lexed.token_stream(), lexed.error_stream(), lexed.symbol_table) == fresh(source)
+
+
+def test_inserts_deletes_and_replacements_equal_a_fresh_lex():
+    edits = [(1, 1, ["    float d;\n"]), (2, 3, ["    c = b * a;\n"]), (3, 4, [])]
+    lexed = LexedSource(source)
+    lexed.relex(edits)
+
+    edited = apply(source, edits)
+    token_stream, error_stream, symbol_table = fresh(edited)
+    assert lexed.lines == edited
+    # d is numbered after the identifiers already known rather than by its
+    # first occurrence, so the tokens are compared by name
+    assert by_name(lexed.token_stream(), lexed.symbol_table) == by_name(token_stream, symbol_table)
+    assert lexed.error_stream() == error_stream
+
+
+def test_splitting_a_line_equals_a_fresh_lex():
+    edits = [(2, 3, ["    c = a\n", "        + b;\n"])]
+    lexed = LexedSource(source)
+    lexed.relex(edits)
+
+    edited = apply(source, edits)
+    assert (lexed.token_stream(), lexed.error_stream(), lexed.symbol_table) == fresh(edited)
+
+
+def test_symbol_table_is_only_appended_to():
+    edits = [(0, 1, ["int main(float b) {\n"]), (2, 3, ["    c = zeta + b + a;\n"])]
+    lexed = LexedSource(source)
+    before = dict(lexed.symbol_table)
+    # drop the first use of a, then add a new identifier
+    lexed.relex(edits)
+
+    assert {ix: lexed.symbol_table[ix] for ix in before} == before
+    added = [entry.split(", ")[0] for ix, entry in sorted(lexed.symbol_table.items()) if ix not in before]
+    assert added == ["zeta"]
+    assert lexed.token_stream()[2].count(f'<id, {len(before) + 1}>') == 1
+    token_stream, _, symbol_table = fresh(apply(source, edits))
+    assert by_name(lexed.token_stream(), lexed.symbol_table) == by_name(token_stream, symbol_table)
@@ -0,0 +1,45 @@
+from compatibility_spec import types
+from intern_pool import InternPool
+from main import analyze, lex_lines
+
+first = ["int main(int count) {\n", "    float total;\n", "    total = count * 2.5;\n", "}\n"]
+second = ["float average(float total, int count) {\n", "    total = total * count;\n", "}\n"]
+
+
+def pooled(pool: InternPool, text: str) -> bool:
+    return text in pool and pool.strings[text] is text
+
+
+def test_pool_strings_are_identical_across_lexer_parser_and_table():
+    pool = InternPool()
+    _, symbol_table, _, token_list, _ = lex_lines(first, pool=pool)
+    assert all(pooled(pool, token) for token in token_list)
+    assert all(pooled(pool, entry) for entry in symbol_table.values())
+
+    result = analyze(first, pool=pool)
+    records = list(result[6])
+    assert all(pooled(pool, record.name) for record in records)
+    # the types are the very strings the compatibility tables compare
+    assert all(any(record.return_type is name for name in types) for record in records)
+    assert all(pooled(pool, entry) for entry in result[3])
+
+
+def test_analyses_sharing_a_pool_share_their_strings():
+    pool = InternPool()
+    records = list(analyze(first, pool=pool)[6]) + list(analyze(second, pool=pool)[6])
+    counts = [record for record in records if record.name == "count"]
+    totals = [record for record in records if record.name == "total"]
+
+    assert len(counts) == len(totals) == 2
+    assert counts[0].name is counts[1].name
+    assert totals[0].name is totals[1].name
+
+
+def test_pool_does_not_change_the_analysis():
+    pool = InternPool()
+    with_pool = analyze(first, pool=pool)
+    without_pool = analyze(first)
+
+    assert with_pool[:6] == without_pool[:6]
+    assert [(record.name, record.return_type, record.scope, record.size) for record in with_pool[6]] == \
+        [(record.name, record.return_type, record.scope, record.size) for record in without_pool[6]]
@@ -0,0 +1,60 @@
+import pytest
+
+from main import analyze, filter_tokens, lex_lines, parser_token
+from parallel_lexer import lex_parallel
+
+# sources holding lexemes the lexer reports as errors
+invalid_sources = [
+    "int f(int a) {\n /$ oops\n}\n",
+    "int f(int a) {\n x = \"ab;\n}\n",
+    "int f(int a) {\n char y;\n y = 'ab;\n}\n",
+    "int f(int a) {\n char y;\n y = 'ab';\n}\n",
+    "int f(int a) {\n x = @;\n}\n",
+    "int f(int a) {\n a = 1ab;\n}\n",
+]
+
+
+@pytest.mark.parametrize("token", ["<Invalid Comment>", "<Invalid Literal>", "<Invalid Identifier!>",
+                                   "<Invalid Float!>", "<Invalid char constant!, 'ab>",
+                                   "<Character not recognised!>", "<Unsupported character>"])
+def test_error_tokens_are_not_passed_on(token):
+    assert not parser_token(token)
+
+
+@pytest.mark.parametrize("token", ["<blank>", "<tab>", "<newline>", "<Comment>"])
+def test_trivia_is_not_passed_on(token):
+    assert not parser_token(token)
+
+
+@pytest.mark.parametrize("token", ["<dt, int>", "<id, 1>", "<punctuator, ;>", "<+>"])
+def test_other_tokens_are_passed_on(token):
+    assert parser_token(token)
+
+
+def test_full_token_list_is_filtered():
+    tokens = ["<id, 1>", "<blank>", "<assign, =>", "<blank>", "<Invalid Literal>", "<newline>", "<Comment>",
+              "<Invalid char constant!, 'ab>", "<punctuator, ;>", "<newline>"]
+    assert filter_tokens(tokens) == ["<id, 1>", "<assign, =>", "<newline>", "<punctuator, ;>", "<newline>"]
+
+
+@pytest.mark.parametrize("source", invalid_sources)
+def test_invalid_lexemes_are_lexical_errors_only(source):
+    lines = source.splitlines(True)
+    token_stream, symbol_table, error_stream, token_list, line_numbers = lex_lines(lines)
+    assert error_stream
+    assert all(parser_token(token) for token in token_list)
+
+    # every phase runs to the end
+    result = analyze(lines)
+    assert result[3][-1] == "EOF"
+
+
+@pytest.mark.parametrize("source", invalid_sources)
+def test_parallel_lexer_filters_the_same_tokens(source):
+    lines = source.splitlines(True)
+    assert lex_parallel(lines, workers=2, chunk_size=1)[3:] == lex_lines(lines)[3:]
+
+
+def test_fuzzed_inputs_are_analyzed_end_to_end():
+    from fuzz_lexer import run
+    assert run(size=200, growth=2, limit=5.0, fuzz_cases=50, seed=1) == []
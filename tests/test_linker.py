@@ -0,0 +1,58 @@
+from linker import Linker
+from main import analyze
+
+helper = ["int helper(int x) {\n", "    x = x * x;\n", "}\n"]
+user = ["int main(int y) {\n", "    int z;\n", "    z = helper * y;\n", "}\n"]
+unrelated = ["float other(float w) {\n", "    w = w * w;\n", "}\n"]
+
+
+def test_functions_of_other_files_resolve_through_the_index():
+    # analyzed alone, helper is untyped and its use incompatible
+    assert analyze(user)[5]
+
+    linker = Linker(1)
+    results = linker.link({"helper.tpl": helper, "user.tpl": user})
+
+    assert results["user.tpl"][5] == {}
+    assert linker.index["helper"] == ("helper.tpl", "int")
+    assert linker.users("helper") == ["user.tpl"]
+    assert linker.link_errors == []
+    # the function is not entered in the table of the file using it
+    assert [record.name for record in results["user.tpl"][6]] == ["main", "y", "z"]
+
+
+def test_function_defined_twice_is_a_link_error():
+    linker = Linker(1)
+    linker.link({"helper.tpl": helper, "again.tpl": ["float helper() {\n", "}\n"], "user.tpl": user})
+
+    assert linker.link_errors == ["Function helper of again.tpl is already defined in helper.tpl"]
+    # the use resolves to the first definition
+    assert linker.index["helper"] == ("helper.tpl", "int")
+
+
+def test_unchanged_files_are_not_analyzed_again():
+    linker = Linker(1)
+    sources = {"helper.tpl": helper, "user.tpl": user, "unrelated.tpl": unrelated}
+    first = linker.link(sources)
+    assert sorted(linker.lexed) == sorted(linker.analyzed) == sorted(sources)
+
+    assert linker.link(dict(sources)) == first
+    assert linker.lexed == linker.analyzed == []
+
+    # a new body with the same interface only touches its own file
+    sources["helper.tpl"] = ["int helper(int x) {\n", "    x = x + x;\n", "}\n"]
+    linker.link(sources)
+    assert linker.lexed == linker.analyzed == ["helper.tpl"]
+
+    # a new return type also touches the files using the function
+    sources["helper.tpl"] = ["float helper(float x) {\n", "}\n"]
+    results = linker.link(sources)
+    assert linker.lexed == ["helper.tpl"]
+    assert linker.analyzed == ["helper.tpl", "user.tpl"]
+    assert results["user.tpl"][5] == {2: ["ERROR: Type mismatch in assignment"]}
+
+    # as does removing the file defining it
+    del sources["helper.tpl"]
+    results = linker.link(sources)
+    assert linker.lexed == [] and linker.analyzed == ["user.tpl"]
+    assert results["user.tpl"][5] == analyze(user)[5]
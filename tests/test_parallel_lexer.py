@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from main import dump_symb_tbl, lex_lines
+from parallel_lexer import lex_parallel
+
+source = """int main(int a, float b) {
+    int c;
+    c = a + b;
+}
+float later(char d) {
+    d = 'x';
+    c = a * e;
+    float fresh;
+    @
+    fresh = d + zeta;
+}
+int last() {
+    zeta = omega + a;
+    return omega;
+}
+"""
+
+
+def symbol_file(symbol_table) -> str:
+    stream = io.StringIO()
+    dump_symb_tbl(symbol_table, stream)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5])
+def test_parallel_lexing_equals_sequential_lexing(chunk_size):
+    lines = source.splitlines(True)
+    assert chunk_size < len(lines)
+
+    sequential = lex_lines(lines)
+    parallel = lex_parallel(lines, workers=2, chunk_size=chunk_size)
+
+    assert parallel == sequential
+    assert symbol_file(parallel[1]) == symbol_file(sequential[1])
+
+
+def test_identifiers_first_seen_in_later_chunks_are_numbered_after_earlier_ones():
+    lines = ["a = b;\n", "c = a;\n", "d = c + b;\n"]
+    _, symbol_table, _, token_list, _ = lex_parallel(lines, workers=2, chunk_size=1)
+
+    assert [entry.split(", ")[0] for _, entry in sorted(symbol_table.items())] == ["a", "b", "c", "d"]
+    assert token_list[:3] == ["<id, 1>", "<assign, =>", "<id, 2>"]
+    assert token_list[4:7] == ["<id, 3>", "<assign, =>", "<id, 1>"]
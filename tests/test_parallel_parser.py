@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from main import lex_lines, parse_tokens
+from parallel_parser import parse_parallel, split_functions
+
+statements = ["int a;", "float b;", "a = b + 1;", "a = (a) * p;", "return a;", "if (a > (p + a * a + f0)) {", "}",
+              "{", "for (a = 1; a; a = 2) {", "@", "f1 = 1;"]
+
+
+def program(rng: random.Random) -> str:
+    """Builds a few function definitions, their bodies often unbalanced or
+    holding errors."""
+
+    functions = []
+    for _ in range(rng.randint(1, 5)):
+        params = ", ".join(f'{rng.choice(["int", "float", "char"])} {rng.choice("pabc")}'
+                           for _ in range(rng.randint(0, 3)))
+        body = "\n".join("    " + rng.choice(statements) for _ in range(rng.randint(0, 5)))
+        functions.append(f'{rng.choice(["int", "float", "char"])} f{rng.randint(0, 3)}({params}) {{\n{body}\n}}\n')
+    return "".join(functions)
+
+
+def outputs(result) -> tuple:
+    trace, errors, semantic_errors, table = result
+    return trace, errors, semantic_errors, [(record.name, record.return_type, record.scope, record.size)
+                                            for record in table]
+
+
+def sequential_and_parallel(source: str) -> tuple:
+    _, symbol_table, _, token_list, line_numbers = lex_lines(source.splitlines(True))
+    return outputs(parse_tokens(token_list, symbol_table, line_numbers=line_numbers)), \
+        outputs(parse_parallel(token_list, symbol_table, 2, line_numbers))
+
+
+@pytest.mark.parametrize("source", [
+    "int f(int a) {\n    a = a + 1;\n}\nfloat g() {\n    return f;\n}\nchar h(char c) {\n}\n",
+    # the recovery in f0 skips the brace of the if, so f2 is parsed as part of its body
+    "float f0(float p, float b, char a) {\n    if (a > (p + a * a + f0)) {\n    }\n}\n"
+    "int f2(int p, int p, float c) {\n}\n",
+])
+def test_parallel_parse_equals_sequential_parse(source):
+    sequential, parallel = sequential_and_parallel(source)
+    assert parallel == sequential
+
+
+def test_parallel_parse_equals_sequential_parse_on_random_programs():
+    rng = random.Random(30)
+    for _ in range(40):
+        source = program(rng)
+        sequential, parallel = sequential_and_parallel(source)
+        assert parallel == sequential, source
+
+
+def test_functions_split_after_their_closing_braces():
+    source = "int f() {\n    if (a) {\n    }\n}\nfloat g() {\n}\n"
+    token_list = lex_lines(source.splitlines(True))[3]
+
+    starts = split_functions(token_list)
+    assert [token_list[start] for start in starts] == ["<dt, int>", "<dt, float>"]
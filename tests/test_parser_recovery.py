@@ -0,0 +1,83 @@
+from main import analyze
+
+
+def parse(source):
+    """Runs the analysis over source text, returning the parsing errors and
+    the (name, scope) of every record of the semantic symbol table."""
+
+    result = analyze(source.splitlines(True))
+    return result[4], [(record.name, record.scope) for record in result[6]]
+
+
+def test_valid_program_has_no_parsing_errors():
+    errors, records = parse("int f(int a) {\n a = a + a;\n}\nfloat g(int b) {\n int c;\n}\n")
+    assert errors == {}
+    assert records == [("f", 0), ("a", 0), ("g", 0), ("b", 0), ("c", 1)]
+
+
+def test_aborted_body_is_not_taken_for_a_definition():
+    # the declaration following the garbled statement belongs to the body of f
+    errors, records = parse("int f(int a) {\n a = ) ;\n int b;\n}\nint g(int c) {\n c = c;\n}\n")
+    assert errors
+    assert records == [("f", 0), ("a", 0), ("b", 1), ("g", 0), ("c", 0)]
+
+
+def test_one_part_tokens_where_a_statement_is_expected():
+    errors, records = parse("int f(int a) {\n + a;\n}\nint g() {\n int c;\n}\n")
+    assert 1 in errors
+    assert records == [("f", 0), ("a", 0), ("g", 0), ("c", 1)]
+
+
+def test_missing_operand_is_not_a_type_incompatibility():
+    result = analyze("int f(int a) {\n a = a + ) ;\n}\n".splitlines(True))
+    assert 1 in result[4]
+    assert "Type Incompatibility" not in result[5][1]
+
+
+def test_garbled_header_resumes_at_the_body():
+    # the parameter c is not taken for the name of another function
+    errors, records = parse("int f0  b, int c) {\n a0 = b;\n}\nfloat f1(int b) {\n int a0;\n}\n")
+    assert list(errors) == [0]
+    assert records == [("f0", 0), ("f1", 0), ("b", 0), ("a0", 1)]
+
+
+def test_unterminated_body():
+    errors, records = parse("int f(int a) {\n a = a;\n")
+    assert records == [("f", 0), ("a", 0)]
+
+
+def test_garbage_inside_a_body_does_not_end_the_body():
+    # the declarations after the garbage are still statements of f
+    errors, records = parse("int f(int a) {\n ) ) ;\n int b;\n float c;\n}\nint g(int d) {\n}\n")
+    assert list(errors) == [1]
+    assert records == [("f", 0), ("a", 0), ("b", 1), ("c", 1), ("g", 0), ("d", 0)]
+
+
+def test_garbage_inside_a_nested_body():
+    errors, records = parse("int f(int a) {\n if (a > a) {\n ) ;\n int b;\n }\n int c;\n}\nint g() {\n}\n")
+    assert list(errors) == [2]
+    assert records == [("f", 0), ("a", 0), ("b", 2), ("c", 1), ("g", 0)]
+
+
+def test_garbage_block_inside_a_body():
+    # the braces of a block skipped as an error do not close the body
+    errors, records = parse("int f(int a) {\n ) { a = a; }\n int b;\n}\nint g() {\n}\n")
+    assert list(errors) == [1]
+    assert records == [("f", 0), ("a", 0), ("b", 1), ("g", 0)]
+
+
+def test_statement_without_terminator():
+    # recovery resumes at the next statement rather than skipping it
+    result = analyze("int f(int a) {\n a = ) \n a = a;\n}\n".splitlines(True))
+    assert list(result[4]) == [1]
+    assert "a = a" not in " ".join(result[4][1])
+
+
+def test_truncated_expression_at_end_of_stream():
+    errors, records = parse("int f(int a) {\n a = a * ")
+    assert records == [("f", 0), ("a", 0)]
+
+
+def test_long_statement_list():
+    errors, records = parse("int f(int a) {\n" + " a = a;\n" * 5000 + "}\n")
+    assert errors == {}
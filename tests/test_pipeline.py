@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from error_budget import ErrorBudget
+from main import analyze
+from pipeline import analyze_pipelined
+
+
+def outputs(result) -> tuple:
+    return result[:6] + ([(record.name, record.return_type, record.scope, record.size) for record in result[6]],)
+
+
+def read(name: str) -> list:
+    with open(os.path.join(os.path.dirname(__file__), "..", "Tests", f'{name}.tpl')) as source:
+        return source.readlines()
+
+
+@pytest.mark.parametrize("process", [False, True], ids=["thread", "process"])
+@pytest.mark.parametrize("name", ["test01", "test02", "test03"])
+def test_pipelined_analysis_equals_analyze(name, process):
+    lines = read(name)
+    assert outputs(analyze_pipelined(lines, maxsize=2, process=process)) == outputs(analyze(lines))
+
+
+@pytest.mark.parametrize("process", [False, True], ids=["thread", "process"])
+@pytest.mark.parametrize("limits", [(1, None, None), (None, 1, None), (None, None, 1)])
+def test_pipelined_analysis_stops_as_analyze_does(limits, process):
+    lines = read("test02")
+    pipelined_budget = ErrorBudget(*limits)
+    budget = ErrorBudget(*limits)
+
+    assert outputs(analyze_pipelined(lines, pipelined_budget, process=process)) == outputs(analyze(lines, budget))
+    assert pipelined_budget.exceeded == budget.exceeded is not None
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+import main
+from main import analyze
+from symbol_table import Record, SymbolTable
+
+root = os.path.join(os.path.dirname(__file__), "..")
+
+
+def test_records_have_no_instance_dictionary():
+    record = Record("a", "int", 1, 1)
+
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.line = 3
+
+
+@pytest.mark.parametrize("file_num", [1, 2, 3])
+def test_semantic_symbol_table_files_are_unchanged(tmp_path, monkeypatch, file_num):
+    with open(os.path.join(root, "Tests", f'test0{file_num}.tpl')) as source:
+        table = analyze(source.readlines())[6]
+    assert all(isinstance(record, Record) for record in table)
+    # write to a scratch file in place of the one next to the script
+    path = tmp_path / "table.sym"
+    monkeypatch.setattr(main, "get_abs_file_path", lambda _: str(path))
+    main.write_semantic_symb_tbl(table, file_num)
+
+    with open(os.path.join(root, "SemanticSymbolTable", f'test0{file_num}.sym')) as expected:
+        assert path.read_text() == expected.read()
+
+
+def test_records_print_their_fields(capsys):
+    table = SymbolTable()
+    table.enter("f", "float", 0, 2)
+    table.print_table()
+
+    assert capsys.readouterr().out.split("\n")[:4] == [
+        "record name:  f", "record return type:  float", "record scope:  0", "record size:  2"]
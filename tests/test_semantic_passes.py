@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from main import lex_lines
+from rd_parser import Parser
+from semantic_passes import PassManager
+
+# the building blocks of the malformed inputs: the tokens of TUPLE, keywords
+# run together and fragments of statements
+pieces = ["int", "float", "char", "a", "b", "main", "if", "else", "for", "return", "ifreturnreturn",
+          "{", "}", "(", ")", ";", ",", "=", "+", "*", "1", "2.5", "'c'", "int a;", "float b;",
+          "a = b;", "a = a + 1;", "return a;", "if (a) {", "else {", "for (a = 1; a; a = 2) {",
+          "a = (a) * a;", "a = (a + b) * a;", "b = (b) * (a);", "a = ((a)) * b;", "a = (1 + a) * a;", "(a) *"]
+
+
+def malformed(rng: random.Random) -> str:
+    """Builds a function definition whose body holds random pieces, often
+    unbalanced braces and statements cut short."""
+
+    body = " ".join(rng.choice(pieces) for _ in range(rng.randint(1, 30)))
+    header = rng.choice(["int main()", "float f(int a, float b)", "int a(", "main() "])
+    return f'{header} {{\n{body}\n}}\n' + rng.choice(["", "int g() { a = 1; }\n", "float main() { return b; }\n"])
+
+
+def outputs(result) -> tuple:
+    trace, errors, semantic_errors, table = result
+    return trace, errors, semantic_errors, [(record.name, record.return_type, record.scope, record.size)
+                                            for record in table]
+
+
+def inline_and_passes(source: str) -> tuple:
+    _, symbol_table, _, token_list, line_numbers = lex_lines(source.splitlines(True))
+    inline = Parser(token_list, dict(symbol_table), line_numbers=line_numbers).parseToken()
+    parser = Parser(token_list, dict(symbol_table), line_numbers=line_numbers, build_tree=True, semantic=False)
+    parser.parseToken()
+    return outputs(inline), outputs(PassManager().run(parser))
+
+
+@pytest.mark.parametrize("source", [
+    "int main() { ifreturnreturn }\n",
+    "int main() { if return return }\n",
+    "int main() { if (a) { int a; } else { a = 1; }\n",
+    "int main() { for (a = 1; a; a = 2) { float b; } } b = 1; }\n",
+    "int main() { else { int a; } a = a + 1; }\n",
+    "int a( {\nfor ; 'c'\n}\nfloat main() { return b; }\n",
+    "int main() { int a;\n a = (a) * a;\n}\n",
+    "int f(int a) {\n a = (a + a) * a;\n}\n",
+    "int main() { int a; float b;\n a = (b + a) * a;\n b = (1 + a) * ((a)) * (b);\n}\n",
+])
+def test_passes_match_inline_checks_on_malformed_input(source):
+    inline, passes = inline_and_passes(source)
+    assert passes == inline
+
+
+def test_passes_match_inline_checks_on_random_malformed_inputs():
+    rng = random.Random(43)
+    for _ in range(300):
+        source = malformed(rng)
+        inline, passes = inline_and_passes(source)
+        assert passes == inline, source
+
+
+def test_passes_see_the_scopes_the_parser_consumed_tokens_in():
+    source = "int main() { int a; if (a) { float a; a = 1; } }\n"
+    _, symbol_table, _, token_list, line_numbers = lex_lines(source.splitlines(True))
+    parser = Parser(token_list, symbol_table, line_numbers=line_numbers, build_tree=True, semantic=False)
+    parser.parseToken()
+
+    assert len(parser.token_scopes) == len(token_list)
+    # the second declaration of a is in the scope of the if statement
+    declarations = [ix for ix, token in enumerate(token_list) if token.startswith("<id") and
+                    token_list[ix - 1].startswith("<dt")]
+    assert [parser.token_scopes[ix] for ix in declarations] == [0, 1, 2]
@@ -0,0 +1,33 @@
+import io
+import json
+
+import pytest
+
+from server import AnalysisServer
+
+
+@pytest.fixture
+def server():
+    analysis_server = AnalysisServer(workers=0)
+    yield analysis_server
+    analysis_server.close()
+
+
+def serve(server: AnalysisServer, *lines: str) -> list:
+    output = io.StringIO()
+    server.serve(io.StringIO("".join(line + "\n" for line in lines)), output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+@pytest.mark.parametrize("request_line", ["[1]", "1", '"ping"', "null", "true", "[]"])
+def test_request_not_an_object_is_invalid(server, request_line):
+    responses = serve(server, request_line, '{"id": 2, "method": "ping"}')
+
+    assert responses[0]["id"] is None
+    assert responses[0]["error"]["code"] == -32600
+    # the server goes on to answer the next request
+    assert responses[1] == {"jsonrpc": "2.0", "id": 2, "result": "pong"}
+
+
+def test_malformed_json_is_a_parse_error(server):
+    assert serve(server, "{")[0]["error"]["code"] == -32700
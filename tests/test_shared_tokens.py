@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from main import lex_lines
+from shared_tokens import attach_tokens, release_tokens, share_tokens
+
+
+def test_tokens_round_trip_through_a_segment():
+    _, symbol_table, _, token_list, line_numbers = lex_lines(["int f(int a) {\n", "    a = a + 1;\n", "}\n"])
+    name = share_tokens(token_list, line_numbers, symbol_table)
+    try:
+        assert attach_tokens(name) == (token_list, line_numbers, symbol_table)
+    finally:
+        release_tokens(name)
+    # releasing twice is harmless, and the segment is gone
+    release_tokens(name)
+    with pytest.raises(FileNotFoundError):
+        attach_tokens(name)
+    if os.path.isdir("/dev/shm"):
+        assert name.lstrip("/") not in os.listdir("/dev/shm")
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+from main import dump_token_stream, lex_lines
+from stream_format import compact_tokens, expand_tokens, read_token_stream
+
+sources = [
+    'int main() {\n        a = "<blank*3>";\n}\n',
+    'int main() {\n    a = "x<blank><blank>";\n    b = "**";\n\t\t}\n',
+    'int main() {\n    a = "<blank**3>*";\n    b = "\\\\*";\n}\n',
+]
+
+
+@pytest.mark.parametrize("source", sources)
+def test_compact_lines_expand_to_the_verbose_ones(source):
+    verbose = lex_lines(source.splitlines(True))[0]
+    compact = lex_lines(source.splitlines(True), compact=True)[0]
+
+    assert compact != verbose
+    assert {line: compact_tokens(tokens) for line, tokens in verbose.items()} == compact
+    assert {line: expand_tokens(tokens) for line, tokens in compact.items()} == verbose
+
+
+@pytest.mark.parametrize("source", sources)
+@pytest.mark.parametrize("held_compact", [False, True])
+@pytest.mark.parametrize("write_compact", [False, True])
+def test_token_stream_files_round_trip(tmp_path, source, held_compact, write_compact):
+    verbose = lex_lines(source.splitlines(True))[0]
+    token_stream = lex_lines(source.splitlines(True), compact=held_compact)[0]
+    path = tmp_path / "test.out"
+    with open(path, "w") as stream:
+        dump_token_stream(token_stream, stream, write_compact)
+
+    assert list(read_token_stream(str(path)).values()) == list(verbose.values())
+
+
+def test_verbose_stream_is_written_unchanged():
+    verbose = lex_lines(['a = "<blank*3>";\n'])[0]
+    stream = io.StringIO()
+    dump_token_stream(verbose, stream)
+
+    assert stream.getvalue() == "\n".join(verbose.values())
+    assert "<blank*3>" in stream.getvalue()
@@ -0,0 +1,82 @@
+import time
+
+from symbol_table import Record, SymbolTable
+
+
+def records(table: SymbolTable) -> list:
+    return [(record.name, record.return_type, record.scope, record.size) for record in table]
+
+
+def test_locals_of_earlier_functions_are_hidden():
+    table = SymbolTable()
+    table.enter("f", "int", 0, 2)
+    table.enter("a", "int", 1, 1)
+    assert table.lookup("a", "int", 1)
+
+    table.begin_function()
+    table.enter("g", "float", 0, 2)
+    # the local of f is hidden, the function itself is not
+    assert not table.lookup("a", "int", 1)
+    assert table.check_return_type("a", 1) is None
+    assert table.lookup("f", "int", 0)
+    assert table.check_return_type("f", 1) == "int"
+    assert table.check_return_type("g", 0) == "float"
+
+
+def test_first_record_entered_gives_the_type():
+    table = SymbolTable()
+    table.enter("a", "int", 1, 1)
+    table.enter("a", "float", 1, 1)
+    table.enter("a", "char", 0, 1)
+
+    assert table.check_return_type("a", 1) == "int"
+    assert table.check_return_type("a", 2) == "char"
+    assert table.lookup("a", "float", 1)
+    assert not table.lookup("a", "char", 1)
+
+
+def test_restore_goes_back_and_forth_between_snapshots():
+    table = SymbolTable()
+    table.enter("f", "int", 0, 2)
+    table.enter("a", "int", 1, 1)
+    before = table.snapshot()
+    table.begin_function()
+    table.enter("a", "float", 1, 1)
+    after = table.snapshot()
+
+    table.restore(before)
+    assert records(table) == [("f", "int", 0, 2), ("a", "int", 1, 1)]
+    assert table.check_return_type("a", 1) == "int"
+    assert table.function_start == 0
+
+    # a snapshot taken later, on a branch of edits the table no longer holds
+    table.enter("b", "char", 1, 1)
+    table.restore(after)
+    assert records(table) == [("f", "int", 0, 2), ("a", "int", 1, 1), ("a", "float", 1, 1)]
+    assert table.function_start == 2
+    assert table.check_return_type("a", 1) == "float"
+    assert not table.lookup("b", "char", 1)
+
+
+def test_records_appended_directly_are_indexed():
+    table = SymbolTable()
+    table.table.extend([Record("f", "int", 0, 2), Record("a", "char", 1, 1)])
+
+    assert table.check_return_type("a", 1) == "char"
+    del table.table[1:]
+    assert table.check_return_type("a", 1) is None
+
+
+def test_entering_a_redeclared_name_takes_constant_time():
+    def fill(count: int) -> float:
+        table = SymbolTable()
+        start = time.perf_counter()
+        for scope in range(count):
+            table.enter("a", "int", scope, 1)
+            table.snapshot()
+        return time.perf_counter() - start
+
+    small = min(fill(2000) for _ in range(3))
+    large = min(fill(16000) for _ in range(3))
+    # linear growth is x8, copying the records of the name every time x64
+    assert large < small * 24
@@ -0,0 +1,78 @@
+import zlib
+
+import pytest
+
+from main import lex_lines
+from rd_parser import Parser
+from syntax_tree import SyntaxTree, TreeFormatError, header_crc_format, header_format, header_size
+
+
+def parsed_tree() -> SyntaxTree:
+    source = ["int main(int a) {\n", "    float b;\n", "    b = a * b;\n", "}\n"]
+    _, symbol_table, _, token_list, line_numbers = lex_lines(source)
+    parser = Parser(token_list, symbol_table, line_numbers=line_numbers, build_tree=True)
+    parser.parseToken()
+    return parser.tree
+
+
+def signed(payload: bytes, **fields) -> bytes:
+    """A serialized tree around a payload, its header holding the given
+    fields and correct checksums."""
+
+    header = dict(magic=b"TPLA", version=1, node_count=0, kind_count=0, type_count=0, payload_size=len(payload),
+                  payload_crc=zlib.crc32(payload))
+    header.update(fields)
+    packed = header_format.pack(*header.values())
+    return packed + header_crc_format.pack(zlib.crc32(packed)) + payload
+
+
+def test_round_trip(tmp_path):
+    tree = parsed_tree()
+    path = str(tmp_path / "tree.bin")
+    tree.write(path)
+    loaded = SyntaxTree.read(path)
+
+    assert loaded.dump() == tree.dump()
+    assert list(loaded.walk()) == list(tree.walk())
+    assert [loaded.kind(node) for node in range(len(loaded))] == [tree.kind(node) for node in range(len(tree))]
+    assert [loaded.type(node) for node in range(len(loaded))] == [tree.type(node) for node in range(len(tree))]
+    assert "float" in {loaded.type(node) for node in range(len(loaded))}
+
+
+def test_loaded_tree_is_read_only():
+    loaded = SyntaxTree.load(parsed_tree().dump())
+
+    with pytest.raises(ValueError):
+        loaded.add("token", 0, 0)
+
+
+@pytest.mark.parametrize("corrupt, message", [
+    (lambda data: data[:10], "Truncated header"),
+    (lambda data: b"XXXX" + data[4:], "Not a serialized syntax tree"),
+    (lambda data: data[:8] + bytes([data[8] ^ 1]) + data[9:], "Header checksum mismatch"),
+    (lambda data: data[:header_size] + bytes([data[header_size] ^ 1]) + data[header_size + 1:],
+     "Payload checksum mismatch"),
+    (lambda data: data[:-4], "Payload is"),
+])
+def test_corrupted_trees_are_rejected(corrupt, message):
+    with pytest.raises(TreeFormatError, match=message):
+        SyntaxTree.load(corrupt(parsed_tree().dump()))
+
+
+def test_unsupported_version_is_rejected():
+    with pytest.raises(TreeFormatError, match="Unsupported version"):
+        SyntaxTree.load(signed(b"", version=2))
+
+
+def test_short_node_columns_are_rejected():
+    tree = parsed_tree()
+    payload = tree.dump()[header_size:]
+    fields = dict(node_count=len(tree), kind_count=len(tree.kind_names), type_count=len(tree.type_names))
+    assert len(SyntaxTree.load(signed(payload, **fields))) == len(tree)
+
+    # a header claiming one node more than the columns hold
+    with pytest.raises(TreeFormatError, match="Node columns"):
+        SyntaxTree.load(signed(payload, **dict(fields, node_count=len(tree) + 1)))
+    # string tables running past the payload
+    with pytest.raises(TreeFormatError):
+        SyntaxTree.load(signed(payload[:12], **fields))
@@ -0,0 +1,65 @@
+import zlib
+
+import pytest
+
+from main import lex_lines, parse_tokens
+from rd_parser import Parser
+from token_binary import TokenFormatError, dump_tokens, header_crc_format, header_format, header_size, load_tokens, \
+    read_tokens, write_tokens
+
+source = ["int main(int a, float b) {\n", "    a = a + 1;\n", "    b = 'c' * 2.5;\n", "    @\n", "}\n"]
+
+
+def lexed() -> tuple:
+    _, symbol_table, _, token_list, line_numbers = lex_lines(source)
+    return token_list, line_numbers, symbol_table
+
+
+def test_round_trip_through_a_file(tmp_path):
+    token_list, line_numbers, symbol_table = lexed()
+    path = str(tmp_path / "test.tok")
+    write_tokens(path, token_list, line_numbers, symbol_table)
+
+    assert read_tokens(path) == (token_list, line_numbers, symbol_table)
+    # the parser reads the file directly, with the same result as parsing the tokens
+    assert Parser.fromBinary(path).parseToken()[:3] == \
+        parse_tokens(token_list, symbol_table, line_numbers=line_numbers)[:3]
+
+
+def test_padded_buffer_is_read():
+    token_list, line_numbers, symbol_table = lexed()
+    data = dump_tokens(token_list, line_numbers, symbol_table) + bytes(4096)
+
+    assert load_tokens(data) == (token_list, line_numbers, symbol_table)
+
+
+def test_repeated_tokens_are_stored_once():
+    token_list, line_numbers, symbol_table = lexed()
+    data = dump_tokens(token_list, line_numbers, symbol_table)
+    distinct_count = header_format.unpack(data[:header_format.size])[3]
+
+    assert distinct_count == len(set(token_list)) < len(token_list)
+
+
+@pytest.mark.parametrize("corrupt, message", [
+    (lambda data: data[:header_size - 1], "Truncated header"),
+    (lambda data: b"TPLA" + data[4:], "Not a binary token stream"),
+    (lambda data: data[:10] + bytes([data[10] ^ 1]) + data[11:], "Header checksum mismatch"),
+    (lambda data: data[:-1] + bytes([data[-1] ^ 1]), "Payload checksum mismatch"),
+    (lambda data: data[:-1], "Payload is"),
+])
+def test_corrupted_streams_are_rejected(corrupt, message):
+    data = dump_tokens(*lexed())
+    with pytest.raises(TokenFormatError, match=message):
+        load_tokens(corrupt(data))
+
+
+def test_streams_of_the_first_version_are_rejected():
+    data = dump_tokens(*lexed())
+    fields = list(header_format.unpack(data[:header_format.size]))
+    fields[1] = 1
+    header = header_format.pack(*fields)
+    old = header + header_crc_format.pack(zlib.crc32(header)) + data[header_size:]
+
+    with pytest.raises(TokenFormatError, match="Unsupported version 1"):
+        load_tokens(old)
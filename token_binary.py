@@ -0,0 +1,265 @@
+import mmap
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+# file layout, all integers little endian:
+#   header       magic, version, token count, distinct token count, kind
+#                count, attribute count, symbol count, payload size, payload
+#                crc32, header crc32
+#   payload      kinds        string table of the token kinds, e.g. '<id'
+#                attributes   string table of the token attributes, e.g. '3>'
+#                distinct     kind code and attribute code of every distinct
+#                             token
+#                symbols      the keys of the lexical symbol table, then a
+#                             string table of its entries
+#                tokens       the distinct token code of every token, then
+#                             the line of every token
+# A string table is the byte length of every string followed by the UTF-8
+# encoded strings back to back. A token without an attribute, e.g.
+# '<Invalid Literal>', has the attribute code no_attribute.
+magic = b"TPLT"
+version = 2
+header_format = struct.Struct("<4sHIIIIIII")
+header_crc_format = struct.Struct("<I")
+header_size = header_format.size + header_crc_format.size
+no_attribute = 0xFFFFFFFF
+
+
+class TokenFormatError(Exception):
+    """Raised when a binary token stream is malformed, corrupted or of an
+    unsupported version."""
+
+
+def uint_bytes(values) -> bytes:
+    """Encodes unsigned integers as 32-bit little endian.
+
+    Args:
+    - values: the integers to encode.
+
+    Returns:
+    the encoded integers.
+    """
+
+    values = array("I", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def read_uints(buffer: memoryview) -> Sequence[int]:
+    """Decodes 32-bit little endian unsigned integers, without copying them
+    on a little endian machine.
+
+    Args:
+    - buffer: the encoded integers.
+
+    Returns:
+    the integers.
+    """
+
+    values = buffer.cast("I")
+    if sys.byteorder == "big":
+        values = array("I", values)
+        values.byteswap()
+    return values
+
+
+def string_table(strings: List[str]) -> bytes:
+    """Encodes a list of strings as a string table.
+
+    Args:
+    - strings: the strings to encode.
+
+    Returns:
+    the encoded string table.
+    """
+
+    encoded = [string.encode("utf-8") for string in strings]
+    return uint_bytes(map(len, encoded)) + b"".join(encoded)
+
+
+def read_string_table(buffer: memoryview, offset: int, count: int) -> Tuple[List[str], int]:
+    """Decodes a string table.
+
+    Args:
+    - buffer: the payload.
+    - offset: the offset of the string table in the payload.
+    - count: the number of strings in the table.
+
+    Returns:
+    the strings and the offset just after the table.
+    """
+
+    lengths = read_uints(buffer[offset:offset + 4 * count])
+    offset += 4 * count
+    strings = []
+    for length in lengths:
+        strings.append(str(buffer[offset:offset + length], "utf-8"))
+        offset += length
+    return strings, offset
+
+
+def dump_tokens(token_list: List[str], line_numbers: List[int], symbol_table: Dict[int, str]) -> bytes:
+    """Serializes the output of the lexer for the parser.
+
+    Args:
+    - token_list: the tokens for the parser, as returned by lex_lines().
+    - line_numbers: the line of every token.
+    - symbol_table: the lexical symbol table.
+
+    Returns:
+    the binary token stream.
+    """
+
+    # split every distinct token into its kind and attribute once
+    token_codes = {token: code for code, token in enumerate(dict.fromkeys(token_list))}
+    kind_codes = {}
+    attribute_codes = {}
+    distinct = array("I")
+    for token in token_codes:
+        kind, separator, attribute = token.partition(", ")
+        distinct.append(kind_codes.setdefault(kind, len(kind_codes)))
+        distinct.append(attribute_codes.setdefault(attribute, len(attribute_codes)) if separator else no_attribute)
+
+    payload = b"".join((string_table(list(kind_codes)),
+                        string_table(list(attribute_codes)),
+                        uint_bytes(distinct),
+                        uint_bytes(symbol_table.keys()),
+                        string_table(list(symbol_table.values())),
+                        uint_bytes(map(token_codes.__getitem__, token_list)),
+                        uint_bytes(line_numbers)))
+
+    header = header_format.pack(magic, version, len(token_list), len(token_codes), len(kind_codes),
+                                len(attribute_codes), len(symbol_table), len(payload), zlib.crc32(payload))
+    return header + header_crc_format.pack(zlib.crc32(header)) + payload
+
+
+def load_tokens(buffer) -> Tuple[List[str], List[int], Dict[int, str]]:
+    """Deserializes a binary token stream, verifying its header and
+    checksums.
+
+    Args:
+    - buffer: the binary token stream, any object supporting the buffer
+    protocol, e.g. a memory map.
+
+    Returns:
+    the tokens for the parser, the line of every token and the lexical
+    symbol table.
+
+    Raises:
+    TokenFormatError: if the stream is malformed, corrupted or of an
+    unsupported version.
+    """
+
+    buffer = memoryview(buffer)
+    if len(buffer) < header_size:
+        raise TokenFormatError("Truncated header")
+    header = buffer[:header_format.size]
+    stream_magic, stream_version, token_count, distinct_count, kind_count, attribute_count, symbol_count, \
+        payload_size, payload_crc = header_format.unpack(header)
+    if stream_magic != magic:
+        raise TokenFormatError("Not a binary token stream")
+    if header_crc_format.unpack(buffer[header_format.size:header_size])[0] != zlib.crc32(header):
+        raise TokenFormatError("Header checksum mismatch")
+    if stream_version != version:
+        raise TokenFormatError(f'Unsupported version {stream_version}, expected {version}')
+
+    # the buffer may be padded, e.g. a shared memory segment rounded up to a page
+    payload = buffer[header_size:header_size + payload_size]
+    if len(payload) != payload_size:
+        raise TokenFormatError(f'Payload is {len(payload)} bytes, expected {payload_size}')
+    if zlib.crc32(payload) != payload_crc:
+        raise TokenFormatError("Payload checksum mismatch")
+
+    kinds, offset = read_string_table(payload, 0, kind_count)
+    attributes, offset = read_string_table(payload, offset, attribute_count)
+    distinct = read_uints(payload[offset:offset + 8 * distinct_count])
+    offset += 8 * distinct_count
+    keys = read_uints(payload[offset:offset + 4 * symbol_count])
+    entries, offset = read_string_table(payload, offset + 4 * symbol_count, symbol_count)
+    token_codes = read_uints(payload[offset:offset + 4 * token_count])
+    line_numbers = read_uints(payload[offset + 4 * token_count:offset + 8 * token_count])
+
+    # every distinct token is built once and shared
+    tokens = [kinds[kind] if attribute == no_attribute else kinds[kind] + ", " + attributes[attribute]
+              for kind, attribute in zip(distinct[0::2], distinct[1::2])]
+    token_list = list(map(tokens.__getitem__, token_codes.tolist()))
+
+    return token_list, line_numbers.tolist(), dict(zip(keys, entries))
+
+
+def write_tokens(path: str, token_list: List[str], line_numbers: List[int], symbol_table: Dict[int, str]) -> None:
+    """Writes a binary token stream to a file.
+
+    Args:
+    - path: the path of the file.
+    - token_list: the tokens for the parser.
+    - line_numbers: the line of every token.
+    - symbol_table: the lexical symbol table.
+
+    Returns:
+    None.
+    """
+
+    with open(path, "wb") as stream:
+        stream.write(dump_tokens(token_list, line_numbers, symbol_table))
+
+
+def read_tokens(path: str) -> Tuple[List[str], List[int], Dict[int, str]]:
+    """Memory maps a binary token stream file and deserializes it.
+
+    Args:
+    - path: the path of the file.
+
+    Returns:
+    the tokens for the parser, the line of every token and the lexical
+    symbol table.
+    """
+
+    with open(path, "rb") as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return load_tokens(view)
+        finally:
+            view.release()
+
+
+# driver code
+if __name__ == "__main__":
+    import argparse
+    from main import lex_lines
+
+    arg_parser = argparse.ArgumentParser(description="Compares loading a binary token stream to re-lexing.")
+    arg_parser.add_argument("source", help="the source file to lex")
+    arg_parser.add_argument("--output", default="tokens.bin", help="the binary token stream to write")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="lex the source this many times over")
+    arg_parser.add_argument("--runs", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with open(args.source) as source:
+        text = source.read()
+    if not text.endswith("\n"):
+        text += "\n"
+    lines = text.splitlines(True) * args.repeat
+
+    _, symbol_table, _, token_list, line_numbers = lex_lines(lines)
+    write_tokens(args.output, token_list, line_numbers, symbol_table)
+    assert read_tokens(args.output) == (token_list, line_numbers, symbol_table)
+
+    def best(function) -> float:
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    lex_time = best(lambda: lex_lines(lines))
+    load_time = best(lambda: read_tokens(args.output))
+    print(f'{len(lines)} lines, {len(token_list)} tokens')
+    print(f're-lexing   {lex_time * 1000:10.2f} ms')
+    print(f'loading     {load_time * 1000:10.2f} ms  x{lex_time / load_time:.1f}')
@@ -10,5 +10,5 @@ arithmetic_op = ["+", "-", "*", "/", "^"]
 assignment = "="
 underscore = "_"
 whitespaces = {" ": "blank", "\n": "newline", "\t": "tab"}
-letters = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUWXYZ"
+letters = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
 digits = "0123456789"